@@ -0,0 +1,48 @@
+"""
+Fans out ``matches.get`` calls against a local server with a simulated round-trip time, first one after another
+with the blocking client and then concurrently with ``AsyncChallongeApi``.
+
+Run from the repository root with ``python -m benchmarks.aio``.
+"""
+
+import json
+import time
+import asyncio
+
+from benchmarks.local_server import LocalServer
+from src.chyllonge.api import ChallongeApi
+from src.chyllonge.aio import AsyncChallongeApi
+
+CALLS = 200
+ROUND_TRIP = 0.05
+
+
+async def _fan_out(base_url):
+    async with AsyncChallongeApi(max_concurrency=CALLS, pool_maxsize=CALLS) as api:
+        api.http.base_challonge_url = base_url
+
+        started = time.perf_counter()
+        await asyncio.gather(*[api.matches.get(1, match_id) for match_id in range(CALLS)])
+
+        return time.perf_counter() - started
+
+
+def main():
+    body = json.dumps({"match": {"id": 1, "state": "open"}}).encode("utf-8")
+
+    with LocalServer(body=body, latency=ROUND_TRIP) as server:
+        api = ChallongeApi()
+        api.http.base_challonge_url = server.base_url
+
+        started = time.perf_counter()
+
+        for match_id in range(CALLS):
+            api.matches.get(1, match_id)
+
+        print(f"{CALLS} blocking matches.get calls:   {time.perf_counter() - started:6.3f} s")
+        print(f"{CALLS} concurrent matches.get calls: {asyncio.run(_fan_out(server.base_url)):6.3f} s")
+        print(f"(simulated round-trip: {ROUND_TRIP:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures how quickly archived tournament snapshots can be read back from a TournamentArchive, compared with
+fetching them from a local server with a simulated round-trip time.
+
+Run from the repository root with ``python -m benchmarks.archive``.
+"""
+
+import os
+import json
+import time
+import tempfile
+
+from benchmarks.local_server import LocalServer
+from src.chyllonge.api import ChallongeApi
+from src.chyllonge.archive import TournamentArchive
+
+TOURNAMENTS = 2000
+FETCHED = 50
+PARTICIPANTS = 64
+ROUND_TRIP = 0.05
+
+
+def _snapshot(tournament_id):
+    return {
+        "id": tournament_id,
+        "url": f"bracket_{tournament_id}",
+        "state": "complete",
+        "participants": [{"participant": {"id": p, "name": f"Player {p}"}} for p in range(PARTICIPANTS)],
+        "matches": [
+            {"match": {"id": m, "player1_id": m, "player2_id": m + 1, "winner_id": m, "scores_csv": "3-1"}}
+            for m in range(PARTICIPANTS - 1)
+        ]
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        with TournamentArchive(os.path.join(directory, "archive.sqlite3")) as archive:
+            for tournament_id in range(1, TOURNAMENTS + 1):
+                archive.put(_snapshot(tournament_id))
+
+            api = ChallongeApi(archive=archive)
+
+            started = time.perf_counter()
+
+            for tournament_id in range(1, TOURNAMENTS + 1):
+                api.tournaments.get_snapshot(tournament_id)
+
+            archived = time.perf_counter() - started
+
+        body = json.dumps({"tournament": _snapshot(0)}).encode("utf-8")
+
+        with LocalServer(body=body, latency=ROUND_TRIP) as server:
+            api = ChallongeApi()
+            api.http.base_challonge_url = server.base_url
+
+            started = time.perf_counter()
+
+            for tournament_id in range(1, FETCHED + 1):
+                api.tournaments.get_snapshot(tournament_id)
+
+            fetched = (time.perf_counter() - started) / FETCHED * TOURNAMENTS
+
+    print(f"{TOURNAMENTS} snapshots from the archive: {archived:8.3f} s")
+    print(f"{TOURNAMENTS} snapshots over the network: {fetched:8.3f} s (extrapolated from {FETCHED}, "
+          f"{ROUND_TRIP:.3f} s round-trip)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares decoding large responses the way chyllonge used to (``response.text`` decoded once for the status check and
+once more for ``json.loads``, then a separate unwrapping loop) against ``chyllonge.codec.decode``, which parses the
+raw bytes and unwraps them in one call, with the standard library's json and (if installed) with orjson.
+
+The payloads are a ``tournaments.get(include_participants=1, include_matches=1)`` response of a large round robin,
+and a ``matches.get_all`` response of the same tournament.
+
+On these payloads the bytes path is not a speed-up in itself: with the standard library's json, it runs at about
+the same speed as the old path (1.0x), since parsing dominates and decoding the text is cheap next to it. The gain
+comes from orjson, at about 1.4x for ``tournaments.get`` and 1.1 to 1.2x for ``matches.get_all``.
+
+Run from the repository root with ``python -m benchmarks.decode``.
+"""
+
+import json
+import time
+
+import requests
+
+from benchmarks.fixtures import match_record, participant_record
+from src.chyllonge.codec import decode
+
+PARTICIPANTS = 256
+REPEAT = 5
+
+
+def _response(payload) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode("utf-8")
+    response.encoding = "utf-8"
+
+    return response
+
+
+def _old_decode(response, envelope):
+    # what ChallongeApiHttpMethods._perform used to do; requests decodes ``text`` anew on every access
+    if response.status_code != 200:
+        raise AssertionError(response.text)
+
+    response.text  # the status check used to receive the decoded text, even for successful responses
+    data = json.loads(response.text)
+
+    return [d[envelope] for d in data] if isinstance(data, list) else data[envelope]
+
+
+def _best(function) -> float:
+    timings = []
+
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    return min(timings)
+
+
+def _run(label, response, envelope):
+    expected = _old_decode(response, envelope)
+
+    assert decode(response.content, envelope, json.loads) == expected
+
+    old = _best(lambda: _old_decode(response, envelope))
+    stdlib = _best(lambda: decode(response.content, envelope, json.loads))
+
+    print(f"{label} ({len(response.content) / 2 ** 20:.1f} MiB):")
+    print(f"  text + json.loads + unwrap    {old * 1000:8.1f} ms")
+    print(f"  codec.decode (json)           {stdlib * 1000:8.1f} ms ({old / stdlib:.1f}x)")
+
+    try:
+        import orjson
+    except ImportError:
+        print("  codec.decode (orjson)         skipped (orjson is not installed)")
+        return
+
+    assert decode(response.content, envelope, orjson.loads) == expected
+
+    fast = _best(lambda: decode(response.content, envelope, orjson.loads))
+
+    print(f"  codec.decode (orjson)         {fast * 1000:8.1f} ms ({old / fast:.1f}x)")
+
+
+def main():
+    participants = [participant_record(100000 + p) for p in range(PARTICIPANTS)]
+    matches = [match_record(m) for m in range(PARTICIPANTS * (PARTICIPANTS - 1) // 2)]
+
+    tournament = {"tournament": {"id": 9000001, "name": "Round robin", "state": "underway",
+                                 "participants": participants, "matches": matches}}
+
+    _run(f"tournaments.get with {len(participants)} participants and {len(matches)} matches", _response(tournament),
+         "tournament")
+    _run(f"matches.get_all with {len(matches)} matches", _response(matches), "match")
+
+
+if __name__ == "__main__":
+    main()
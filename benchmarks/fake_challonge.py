@@ -0,0 +1,635 @@
+"""
+An in-process stand-in for the Challonge v1 API, so the client can be exercised, load-tested and benchmarked without
+a network connection or an account. It keeps tournaments, participants, matches and match attachments in memory and
+implements every endpoint the sub-APIs use, with Challonge's envelopes and JSON errors. Single elimination and round
+robin brackets are generated on start; match results advance winners the way Challonge does.
+
+Latency, server errors and throttling (429 Too Many Requests, with a Retry-After header) can be injected at
+configurable rates. Injected failures are decided before a request is handled, so they never apply it.
+
+Usage::
+
+    with FakeChallonge(latency=0.01, throttle_rate=0.05) as server:
+        api = ChallongeApi(rate_limiter=TokenBucket(rate=100))
+        api.http.base_challonge_url = server.base_url
+"""
+
+import json
+import time
+import random
+import socket
+import threading
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.local_server import _Server
+
+_STATE_FILTERS = {
+    "pending": ("pending", "checking_in", "checked_in"),
+    "in_progress": ("underway", "awaiting_review"),
+    "ended": ("complete",),
+}
+
+_CLOUDFLARE_PAGE = (b"<!DOCTYPE html><html><head><title>api.challonge.com | 502: Bad gateway</title></head>"
+                    b"<body><h1>Bad gateway</h1><p>The web server reported a bad gateway error.</p></body></html>")
+
+
+class FakeChallongeError(Exception):
+    """
+    Answers a request with an error status and Challonge's JSON error body.
+    """
+
+    def __init__(self, status: int, *errors):
+        super().__init__(*errors)
+
+        self.status = status
+        self.errors = list(errors)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).astimezone().isoformat(timespec="milliseconds")
+
+
+def _seeding(size: int) -> list:
+    # the standard bracket order of seeds 1..size (a power of two), so that the top seeds meet last
+    order = [1]
+
+    while len(order) < size:
+        order = [s for seed in order for s in (seed, 2 * len(order) + 1 - seed)]
+
+    return order
+
+
+class FakeChallonge:
+    """
+    Serves a fake Challonge v1 API on a random local port (see ``base_url``), for the duration of a ``with`` block.
+    The in-memory store survives across requests, so a whole tournament can be run through it.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.0, error_status: int = 502, seed: int = None):
+        """
+        :param latency: The number of seconds every response is delayed by, to simulate a network round-trip.
+        :param error_rate: The fraction of requests answered with ``error_status`` (and an HTML error page).
+        :param throttle_rate: The fraction of requests answered with 429 Too Many Requests.
+        :param retry_after: The Retry-After value (in seconds) sent with 429 responses.
+        :param error_status: The status of injected server errors.
+        :param seed: Seeds the random fault injection (and participant randomization), for repeatable runs.
+        """
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_status = error_status
+
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.injected = {"errors": 0, "throttled": 0}
+
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._tournaments = {}  # tournament ID -> tournament record
+        self._participants = {}  # tournament ID -> {participant ID: participant record}
+        self._matches = {}  # tournament ID -> {match ID: match record}
+        self._attachments = {}  # match ID -> {attachment ID: attachment record}
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1/"
+
+    def __enter__(self):
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _read_body(self) -> str:
+                if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    return self.rfile.read(length).decode("utf-8") if length else ""
+
+                # requests sends an empty form (every parameter None) as a chunked body
+                chunks = []
+
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+
+                    if not size:
+                        return b"".join(chunks).decode("utf-8")
+
+            def _respond(self):
+                body = self._read_body()
+                url = urlsplit(self.path)
+
+                if outer.latency:
+                    time.sleep(outer.latency)
+
+                status, headers, payload = outer.handle(self.command, url.path, parse_qsl(url.query) +
+                                                        parse_qsl(body, keep_blank_values=True),
+                                                        authorized="Authorization" in self.headers)
+
+                self.send_response(status)
+
+                for name, value in headers.items():
+                    self.send_header(name, value)
+
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, method: str, path: str, params: list, authorized: bool = True):
+        """
+        Answers one request.
+
+        :param method: The HTTP method.
+        :param path: The URL path, e.g. "/v1/tournaments/1/matches.json".
+        :param params: The query string and form parameters, as (key, value) pairs in their original order.
+        :param authorized: False if the request carried no credentials.
+        :return: A (status, headers, body) tuple.
+        """
+
+        with self._lock:
+            self.requests += 1
+            roll = self.random.random()
+
+            if roll < self.throttle_rate:
+                self.injected["throttled"] += 1
+                return 429, {"Content-Type": "application/json", "Retry-After": f"{self.retry_after:g}"}, \
+                    b'{"errors": ["Too many requests"]}'
+
+            if roll < self.throttle_rate + self.error_rate:
+                self.injected["errors"] += 1
+                return self.error_status, {"Content-Type": "text/html"}, _CLOUDFLARE_PAGE
+
+            try:
+                if not authorized:
+                    raise FakeChallongeError(401, "Unauthorized")
+
+                data = self._route(method, path, params)
+            except FakeChallongeError as e:
+                return e.status, {"Content-Type": "application/json"}, json.dumps({"errors": e.errors}).encode()
+
+        return 200, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+    def _route(self, method: str, path: str, params: list):
+        segments = path.split("/v1/", 1)[-1].rsplit(".json", 1)[0].split("/")
+        values = dict(params)
+
+        if segments == ["tournaments"]:
+            return self._tournament_collection(method, values)
+
+        if segments[0] != "tournaments":
+            raise FakeChallongeError(404, "Not found")
+
+        tournament = self._tournament(segments[1])
+        rest = segments[2:]
+
+        if not rest:
+            return self._tournament_record(method, tournament, values)
+
+        if len(rest) == 1 and method == "POST" and rest[0] not in ("participants", "matches"):
+            return self._tournament_action(rest[0], tournament, values)
+
+        if rest[0] == "participants":
+            return self._participant_route(method, tournament, rest[1:], params)
+
+        if rest[0] == "matches":
+            return self._match_route(method, tournament, rest[1:], values)
+
+        raise FakeChallongeError(404, "Not found")
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    @staticmethod
+    def _fields(values: dict, envelope: str) -> dict:
+        # "tournament[name]" -> "name"
+        prefix = f"{envelope}["
+
+        return {k[len(prefix):-1]: v for k, v in values.items() if k.startswith(prefix) and k.endswith("]")}
+
+    # tournaments
+
+    def _tournament(self, tournament_id: str) -> dict:
+        tournament = self._tournaments.get(int(tournament_id)) if tournament_id.isdigit() else next(
+            (t for t in self._tournaments.values() if t["url"] == tournament_id), None
+        )
+
+        if tournament is None:
+            raise FakeChallongeError(404, "Tournament not found")
+
+        return tournament
+
+    def _tournament_envelope(self, tournament: dict, values: dict = None) -> dict:
+        record = dict(tournament, participants_count=len(self._participants[tournament["id"]]))
+
+        if (values or {}).get("include_participants") in ("1", "true"):
+            record["participants"] = [{"participant": p} for p in self._participants[tournament["id"]].values()]
+
+        if (values or {}).get("include_matches") in ("1", "true"):
+            record["matches"] = [{"match": m} for m in self._matches[tournament["id"]].values()]
+
+        return {"tournament": record}
+
+    def _tournament_collection(self, method: str, values: dict):
+        if method == "GET":
+            states = _STATE_FILTERS.get(values.get("state"))
+            tournament_type = (values.get("tournament_type") or "").replace("_", " ")
+
+            return [
+                self._tournament_envelope(t) for t in self._tournaments.values()
+                if (states is None or t["state"] in states)
+                and (not tournament_type or t["tournament_type"] == tournament_type)
+                and (not values.get("created_after") or t["created_at"][:10] >= values["created_after"])
+                and (not values.get("created_before") or t["created_at"][:10] <= values["created_before"])
+            ]
+
+        if method != "POST":
+            raise FakeChallongeError(405, "Method not allowed")
+
+        fields = self._fields(values, "tournament")
+
+        if not fields.get("name"):
+            raise FakeChallongeError(422, "Name can't be blank")
+
+        tournament_id = self._next_id()
+        url = fields.get("url") or f"fake_{tournament_id}"
+
+        if any(t["url"] == url for t in self._tournaments.values()):
+            raise FakeChallongeError(422, "URL is already taken")
+
+        now = _now()
+        tournament = dict(fields, id=tournament_id, url=url, state="pending", started_at=None, completed_at=None,
+                          created_at=now, updated_at=now,
+                          tournament_type=(fields.get("tournament_type") or "single elimination").replace("_", " "))
+
+        self._tournaments[tournament_id] = tournament
+        self._participants[tournament_id] = {}
+        self._matches[tournament_id] = {}
+
+        return self._tournament_envelope(tournament)
+
+    def _tournament_record(self, method: str, tournament: dict, values: dict):
+        if method == "GET":
+            return self._tournament_envelope(tournament, values)
+
+        if method == "PUT":
+            tournament.update(self._fields(values, "tournament"), updated_at=_now())
+            return self._tournament_envelope(tournament)
+
+        if method == "DELETE":
+            envelope = self._tournament_envelope(tournament)
+
+            del self._tournaments[tournament["id"]]
+            del self._participants[tournament["id"]]
+
+            for match_id in self._matches.pop(tournament["id"]):
+                self._attachments.pop(match_id, None)
+
+            return envelope
+
+        raise FakeChallongeError(405, "Method not allowed")
+
+    def _tournament_action(self, action: str, tournament: dict, values: dict):
+        participants = self._participants[tournament["id"]]
+
+        if action == "start":
+            if tournament["state"] not in _STATE_FILTERS["pending"]:
+                raise FakeChallongeError(422, "Tournament has already been started")
+
+            if len(participants) < 2:
+                raise FakeChallongeError(422, "Tournaments need at least 2 participants to start")
+
+            self._generate_matches(tournament)
+            tournament.update(state="underway", started_at=_now())
+        elif action == "finalize":
+            if tournament["state"] not in _STATE_FILTERS["in_progress"]:
+                raise FakeChallongeError(422, "Tournament is not underway")
+
+            if any(m["state"] != "complete" for m in self._matches[tournament["id"]].values()):
+                raise FakeChallongeError(422, "All matches must be complete before finalizing")
+
+            tournament.update(state="complete", completed_at=_now())
+        elif action == "reset":
+            self._matches[tournament["id"]] = {}
+            tournament.update(state="pending", started_at=None)
+        elif action == "process_check_ins":
+            for participant_id in [p["id"] for p in participants.values() if not p["checked_in"]]:
+                del participants[participant_id]
+
+            tournament["state"] = "checked_in"
+        elif action == "abort_check_in":
+            tournament["state"] = "pending"
+        elif action == "open_for_predictions":
+            tournament["state"] = "pending"
+        else:
+            raise FakeChallongeError(404, "Not found")
+
+        tournament["updated_at"] = _now()
+
+        return self._tournament_envelope(tournament, values)
+
+    # participants
+
+    def _new_participant(self, tournament: dict, fields: dict, seed: int) -> dict:
+        participants = self._participants[tournament["id"]]
+        name = fields.get("name") or fields.get("invite_name_or_email") or fields.get("challonge_username")
+
+        if not name:
+            raise FakeChallongeError(422, "Name can't be blank")
+
+        if any(p["name"] == name for p in participants.values()):
+            raise FakeChallongeError(422, f"Name {name} has already been taken")
+
+        now = _now()
+
+        return {
+            "id": self._next_id(), "tournament_id": tournament["id"], "name": name, "seed": seed, "active": True,
+            "misc": fields.get("misc") or None, "challonge_username": fields.get("challonge_username") or None,
+            "invite_email": fields.get("email") or None, "checked_in": False, "checked_in_at": None,
+            "final_rank": None, "created_at": now, "updated_at": now,
+        }
+
+    def _participant_route(self, method: str, tournament: dict, rest: list, params: list):
+        participants = self._participants[tournament["id"]]
+        values = dict(params)
+
+        if not rest and method == "GET":
+            return [{"participant": p} for p in sorted(participants.values(), key=lambda p: p["seed"])]
+
+        if (not rest or rest[0] in ("bulk_add", "randomize", "clear")) and tournament["state"] == "underway":
+            raise FakeChallongeError(422, "Participants can't be changed once the tournament has started")
+
+        if not rest and method == "POST":
+            participant = self._new_participant(tournament, self._fields(values, "participant"),
+                                                len(participants) + 1)
+            participants[participant["id"]] = participant
+            return {"participant": participant}
+
+        if rest == ["bulk_add"]:
+            # ordered "participants[][name]", "participants[][misc]", ... pairs; a repeated key starts a new row
+            rows = []
+
+            for key, value in params:
+                if key.startswith("participants[]["):
+                    field = key[len("participants[]["):-1]
+
+                    if not rows or field in rows[-1]:
+                        rows.append({})
+
+                    rows[-1][field] = value
+
+            added = []
+
+            for row in rows:
+                participant = self._new_participant(tournament, row, len(participants) + len(added) + 1)
+
+                if any(p["name"] == participant["name"] for p in added):
+                    raise FakeChallongeError(422, f"Name {participant['name']} has already been taken")
+
+                added.append(participant)
+
+            # all or nothing, as on Challonge
+            participants.update((p["id"], p) for p in added)
+
+            return [{"participant": p} for p in added]
+
+        if rest == ["clear"] and method == "DELETE":
+            participants.clear()
+            return {"message": "Participants successfully cleared"}
+
+        if rest == ["randomize"]:
+            shuffled = list(participants.values())
+            self.random.shuffle(shuffled)
+
+            for seed, participant in enumerate(shuffled, 1):
+                participant["seed"] = seed
+
+            return [{"participant": p} for p in shuffled]
+
+        participant = participants.get(int(rest[0])) if rest[0].isdigit() else None
+
+        if participant is None:
+            raise FakeChallongeError(404, "Participant not found")
+
+        if len(rest) == 2 and method == "POST" and rest[1] in ("check_in", "undo_check_in"):
+            checked_in = rest[1] == "check_in"
+            participant.update(checked_in=checked_in, checked_in_at=_now() if checked_in else None)
+        elif len(rest) == 1 and method == "PUT":
+            participant.update(self._fields(values, "participant"), updated_at=_now())
+        elif len(rest) == 1 and method == "DELETE":
+            del participants[participant["id"]]
+        elif len(rest) != 1 or method != "GET":
+            raise FakeChallongeError(404, "Not found")
+
+        return {"participant": participant}
+
+    # matches
+
+    def _new_match(self, tournament: dict, round_number: int, player1_id=None, player2_id=None,
+                   player1_prereq_match_id=None, player2_prereq_match_id=None) -> dict:
+        match = {
+            "id": self._next_id(), "tournament_id": tournament["id"], "round": round_number,
+            "state": "open" if player1_id and player2_id else "pending",
+            "player1_id": player1_id, "player2_id": player2_id,
+            "player1_prereq_match_id": player1_prereq_match_id, "player2_prereq_match_id": player2_prereq_match_id,
+            "player1_is_prereq_match_loser": False, "player2_is_prereq_match_loser": False,
+            "winner_id": None, "loser_id": None, "scores_csv": "", "underway_at": None, "completed_at": None,
+            "suggested_play_order": len(self._matches[tournament["id"]]) + 1,
+        }
+
+        self._matches[tournament["id"]][match["id"]] = match
+
+        return match
+
+    def _generate_matches(self, tournament: dict):
+        seeded = sorted(self._participants[tournament["id"]].values(), key=lambda p: p["seed"])
+        players = [p["id"] for p in seeded]
+
+        if tournament["tournament_type"] == "round robin":
+            # the circle method: one player stays put while the others rotate around them
+            rotation = players + ([None] if len(players) % 2 else [])
+
+            for round_number in range(1, len(rotation)):
+                for i in range(len(rotation) // 2):
+                    player1_id, player2_id = rotation[i], rotation[-1 - i]
+
+                    if player1_id and player2_id:
+                        self._new_match(tournament, round_number, player1_id, player2_id)
+
+                rotation = [rotation[0], rotation[-1]] + rotation[1:-1]
+
+            return
+
+        if tournament["tournament_type"] != "single elimination":
+            raise FakeChallongeError(422, f"FakeChallonge cannot start {tournament['tournament_type']} tournaments")
+
+        size = 1
+
+        while size < len(players):
+            size *= 2
+
+        # each slot is either a player (who had a bye) or the ID of the match that decides the slot
+        slots = [("player", players[seed - 1]) if seed <= len(players) else None for seed in _seeding(size)]
+        round_number = 1
+
+        while len(slots) > 1:
+            next_slots = []
+
+            for first, second in zip(slots[::2], slots[1::2]):
+                if first is None or second is None:
+                    next_slots.append(first or second)
+                    continue
+
+                match = self._new_match(
+                    tournament, round_number,
+                    player1_id=first[1] if first[0] == "player" else None,
+                    player2_id=second[1] if second[0] == "player" else None,
+                    player1_prereq_match_id=first[1] if first[0] == "match" else None,
+                    player2_prereq_match_id=second[1] if second[0] == "match" else None,
+                )
+                next_slots.append(("match", match["id"]))
+
+            slots = next_slots
+            round_number += 1
+
+    def _match_route(self, method: str, tournament: dict, rest: list, values: dict):
+        matches = self._matches[tournament["id"]]
+
+        if not rest and method == "GET":
+            state, participant_id = values.get("state"), values.get("participant_id")
+
+            return [
+                {"match": m} for m in matches.values()
+                if (not state or state == "all" or m["state"] == state)
+                and (not participant_id or participant_id in (str(m["player1_id"]), str(m["player2_id"])))
+            ]
+
+        match = matches.get(int(rest[0])) if rest and rest[0].isdigit() else None
+
+        if match is None:
+            raise FakeChallongeError(404, "Match not found")
+
+        if len(rest) >= 2 and rest[1] == "attachments":
+            return self._attachment_route(method, match, rest[2:], values)
+
+        if len(rest) == 1 and method == "GET":
+            pass
+        elif len(rest) == 1 and method == "PUT":
+            self._report(matches, match, self._fields(values, "match"))
+        elif len(rest) == 2 and method == "POST" and rest[1] in ("mark_as_underway", "unmark_as_underway"):
+            match["underway_at"] = _now() if rest[1] == "mark_as_underway" else None
+        elif len(rest) == 2 and method == "POST" and rest[1] == "reopen":
+            self._reopen(matches, match)
+        else:
+            raise FakeChallongeError(404, "Not found")
+
+        return {"match": match}
+
+    def _report(self, matches: dict, match: dict, fields: dict):
+        if match["state"] == "pending":
+            raise FakeChallongeError(422, "Match is not open yet")
+
+        if "scores_csv" in fields:
+            match["scores_csv"] = fields["scores_csv"]
+
+        winner = fields.get("winner_id")
+
+        if not winner:
+            return
+
+        if winner == "tie":
+            match.update(state="complete", winner_id=None, loser_id=None, completed_at=_now())
+            return
+
+        if winner not in (str(match["player1_id"]), str(match["player2_id"])):
+            raise FakeChallongeError(422, "Winner must be one of the match's players")
+
+        if match["state"] == "complete":
+            self._reopen(matches, match)
+
+        winner_id = int(winner)
+        loser_id = match["player2_id"] if winner_id == match["player1_id"] else match["player1_id"]
+
+        match.update(state="complete", winner_id=winner_id, loser_id=loser_id, completed_at=_now())
+
+        for following in matches.values():
+            for slot in ("player1", "player2"):
+                if following[f"{slot}_prereq_match_id"] == match["id"]:
+                    following[f"{slot}_id"] = winner_id
+
+                    if following["player1_id"] and following["player2_id"]:
+                        following["state"] = "open"
+
+    def _reopen(self, matches: dict, match: dict):
+        # clears the match's result, and resets every match it fed a player into
+        match.update(state="open", winner_id=None, loser_id=None, completed_at=None)
+
+        for following in matches.values():
+            for slot in ("player1", "player2"):
+                if following[f"{slot}_prereq_match_id"] == match["id"] and following[f"{slot}_id"] is not None:
+                    following[f"{slot}_id"] = None
+
+                    if following["state"] == "complete":
+                        self._reopen(matches, following)
+
+                    following["state"] = "pending"
+
+    # attachments
+
+    def _attachment_route(self, method: str, match: dict, rest: list, values: dict):
+        attachments = self._attachments.setdefault(match["id"], {})
+
+        if not rest and method == "GET":
+            return [{"match_attachment": a} for a in attachments.values()]
+
+        if not rest and method == "POST":
+            if len(attachments) >= 4:
+                raise FakeChallongeError(422, "A match can have no more than 4 attachments")
+
+            fields = self._fields(values, "match_attachment")
+            attachment = {"id": self._next_id(), "match_id": match["id"], "url": fields.get("url") or None,
+                          "description": fields.get("description") or None,
+                          "asset_file_name": fields.get("asset") or None, "created_at": _now()}
+            attachments[attachment["id"]] = attachment
+            match["attachment_count"] = len(attachments)
+
+            return {"match_attachment": attachment}
+
+        attachment = attachments.get(int(rest[0])) if rest and rest[0].isdigit() else None
+
+        if attachment is None or len(rest) != 1:
+            raise FakeChallongeError(404, "Attachment not found")
+
+        if method == "PUT":
+            fields = self._fields(values, "match_attachment")
+            attachment.update({k: fields[k] or None for k in ("url", "description") if k in fields})
+        elif method == "DELETE":
+            del attachments[attachment["id"]]
+            match["attachment_count"] = len(attachments)
+
+        return {"match_attachment": attachment}
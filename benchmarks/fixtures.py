@@ -0,0 +1,49 @@
+"""
+Builders for realistic Challonge records, as the API returns them (wrapped in their envelope), shared by the
+benchmarks.
+"""
+
+
+def match_record(match_id: int) -> dict:
+    """
+    Returns a completed match record, with every field Challonge sends.
+    """
+
+    return {
+        "match": {
+            "id": 100000000 + match_id, "tournament_id": 9000001, "identifier": "A", "state": "complete",
+            "round": match_id % 8 + 1, "group_id": None, "player1_id": 200000000 + match_id,
+            "player2_id": 200000001 + match_id, "player1_prereq_match_id": None, "player2_prereq_match_id": None,
+            "player1_is_prereq_match_loser": False, "player2_is_prereq_match_loser": False,
+            "winner_id": 200000000 + match_id, "loser_id": 200000001 + match_id, "scores_csv": "3-1",
+            "player1_votes": None, "player2_votes": None, "attachment_count": None, "has_attachment": False,
+            "location": None, "optional": False, "forfeited": None, "suggested_play_order": match_id,
+            "prerequisite_match_ids_csv": "", "rushb_id": None, "scheduled_time": None,
+            "started_at": "2015-01-19T16:57:17.000-05:00", "underway_at": None,
+            "completed_at": "2015-01-19T17:21:42.000-05:00", "created_at": "2015-01-19T16:57:17.000-05:00",
+            "updated_at": "2015-01-19T17:21:42.000-05:00", "open_graph_image_file_name": None,
+            "open_graph_image_content_type": None, "open_graph_image_file_size": None,
+        }
+    }
+
+
+def participant_record(participant_id: int) -> dict:
+    """
+    Returns an active participant record, with every field Challonge sends.
+    """
+
+    return {
+        "participant": {
+            "id": participant_id, "tournament_id": 9000001, "name": f"Player {participant_id}", "seed": participant_id,
+            "active": True, "created_at": "2015-01-19T16:54:40.000-05:00",
+            "updated_at": "2015-01-19T16:54:40.000-05:00",
+            "invite_email": None, "final_rank": None, "misc": None, "icon": None, "on_waiting_list": False,
+            "invitation_id": None, "group_id": None, "checked_in_at": None, "ranked_member_id": None,
+            "challonge_username": None, "challonge_email_address_verified": None, "removable": True,
+            "participatable_or_invitation_attached": False, "confirm_remove": True, "invitation_pending": False,
+            "display_name_with_invitation_email_address": f"Player {participant_id}", "email_hash": None,
+            "username": None, "display_name": f"Player {participant_id}", "attached_participatable_portrait_url": None,
+            "can_check_in": False, "checked_in": False, "reactivatable": False, "check_in_open": False,
+            "group_player_ids": [], "has_irrelevant_seed": False,
+        }
+    }
@@ -0,0 +1,139 @@
+"""
+Runs whole single elimination tournaments through ``FakeChallonge`` (an in-process stand-in for the Challonge API)
+and measures the throughput and request latency of each stage of their life: create, bulk add (streamed with
+``participants.import_participants``), start, bulk scoring (every open match of a round at once, with
+``matches.update_many``, until the bracket is decided) and finalize, at 8 to 4,096 participants.
+
+Every size is run twice: against a server that answers at once, and against one with a simulated round-trip that
+throttles a share of the requests (which the client's TokenBucket absorbs).
+
+Run from the repository root with ``python -m benchmarks.lifecycle``, optionally followed by the sizes to run (e.g.
+``python -m benchmarks.lifecycle 8 64``).
+"""
+
+import sys
+import time
+import statistics
+
+from benchmarks.fake_challonge import FakeChallonge
+from src.chyllonge.api import ChallongeApi
+from src.chyllonge.instrumentation import RequestHook
+from src.chyllonge.throttle import TokenBucket
+
+SIZES = (8, 64, 512, 4096)
+
+# (label, FakeChallonge options, client options); client options are built anew for every run
+SCENARIOS = (
+    ("instant", {}, dict),
+    ("2 ms round-trip, 1% throttled", {"latency": 0.002, "throttle_rate": 0.01, "seed": 1},
+     lambda: {"rate_limiter": TokenBucket(rate=2000, min_rate=200, max_throttle_retries=20)}),
+)
+
+CHUNK_SIZE = 100
+MAX_WORKERS = 8
+
+STAGES = ("create", "bulk add", "start", "bulk scoring", "finalize")
+
+
+class _StageLatencies(RequestHook):
+    """
+    Collects the latency of every request, by the stage that sent it.
+    """
+
+    def __init__(self):
+        self.stage = None
+        self.latencies = {}
+
+    def after_request(self, info):
+        self.latencies.setdefault(self.stage, []).append(info.total)
+
+
+def _run(api, latencies: _StageLatencies, participants: int) -> dict:
+    """
+    Runs one tournament, returning the (wall time, items processed) of each stage.
+    """
+
+    results = {}
+
+    def stage(name):
+        latencies.stage = name
+        return time.perf_counter()
+
+    started = stage("create")
+    tournament = api.tournaments.create(name=f"Benchmark {participants}", tournament_type="single elimination")
+    results["create"] = (time.perf_counter() - started, 1)
+
+    rows = (f"Player {p}" for p in range(participants))
+    started = stage("bulk add")
+    added = sum(r.ok for r in api.participants.import_participants(tournament["id"], rows, CHUNK_SIZE, MAX_WORKERS))
+    results["bulk add"] = (time.perf_counter() - started, added)
+
+    started = stage("start")
+    api.tournaments.start(tournament["id"])
+    results["start"] = (time.perf_counter() - started, 1)
+
+    started = stage("bulk scoring")
+    scored = 0
+
+    while True:
+        matches = api.matches.get_all(tournament["id"], state="open")
+
+        if not matches:
+            break
+
+        updates = [(m["id"], "3-1", m["player1_id"]) for m in matches]
+        scored += sum(r.ok for r in api.matches.update_many(tournament["id"], updates, MAX_WORKERS, matches))
+
+    results["bulk scoring"] = (time.perf_counter() - started, scored)
+
+    started = stage("finalize")
+    api.tournaments.finalize(tournament["id"])
+    results["finalize"] = (time.perf_counter() - started, 1)
+
+    assert added == participants and scored == participants - 1, (added, scored)
+
+    return results
+
+
+def _milliseconds(values: list, q: float) -> float:
+    if len(values) == 1:
+        return values[0] * 1000
+
+    return statistics.quantiles(values, n=100, method="inclusive")[round(q * 100) - 1] * 1000
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or SIZES
+
+    for label, server_options, client_options in SCENARIOS:
+        print(f"{label}:")
+        print(f"  {'participants':>12}  {'stage':<13} {'wall':>9} {'items/s':>10} {'requests':>9} "
+              f"{'p50':>8} {'p95':>8} {'p99':>8}")
+
+        for participants in sizes:
+            latencies = _StageLatencies()
+
+            with FakeChallonge(**server_options) as server:
+                api = ChallongeApi(pool_maxsize=MAX_WORKERS, hooks=[latencies], **client_options())
+                api.http.base_challonge_url = server.base_url
+
+                results = _run(api, latencies, participants)
+                api.http.close()
+
+            for name in STAGES:
+                wall, items = results[name]
+                requests = latencies.latencies[name]
+
+                print(f"  {participants:>12}  {name:<13} {wall * 1000:7.1f}ms {items / wall:10.0f} {len(requests):9} "
+                      f"{_milliseconds(requests, 0.5):6.2f}ms {_milliseconds(requests, 0.95):6.2f}ms "
+                      f"{_milliseconds(requests, 0.99):6.2f}ms")
+
+            if server.injected["throttled"] or server.injected["errors"]:
+                print(f"  {'':>12}  (injected: {server.injected['throttled']} throttled, "
+                      f"{server.injected['errors']} errors, of {server.requests} requests)")
+
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+A minimal local HTTP server that answers every request with a canned JSON body, used by the benchmarks so they
+never touch api.challonge.com.
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("CHALLONGE_USER", "chyllonge-benchmark")
+os.environ.setdefault("CHALLONGE_KEY", "chyllonge-benchmark")
+
+DEFAULT_BODY = json.dumps([{"match": {"id": i, "state": "open"}} for i in range(8)]).encode("utf-8")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default listen backlog of 5 drops connections when hundreds of requests arrive at once
+    request_queue_size = 1024
+
+
+class LocalServer:
+    """
+    Serves ``body`` for every request on a random local port, optionally waiting ``latency`` seconds first to
+    simulate a network round-trip.
+    """
+
+    def __init__(self, body: bytes = DEFAULT_BODY, latency: float = 0.0):
+        self.body = body
+        self.latency = latency
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1/"
+
+    def __enter__(self):
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # headers and body are written separately; without this, delayed ACKs stall kept-alive responses
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+
+                if length:
+                    self.rfile.read(length)
+
+                if outer.latency:
+                    time.sleep(outer.latency)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(outer.body)))
+                self.end_headers()
+                self.wfile.write(outer.body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
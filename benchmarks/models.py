@@ -0,0 +1,50 @@
+"""
+Compares the memory held by a large match list as raw dicts (what chyllonge returns by default) against the same
+list as ``__slots__``-based Match models (``ChallongeApiHttpMethods(models=True)``).
+
+Run from the repository root with ``python -m benchmarks.models``.
+"""
+
+import json
+import time
+import tracemalloc
+
+from benchmarks.fixtures import match_record
+from src.chyllonge.models import Match, to_models
+
+MATCHES = 200_000
+
+
+def _measure(build):
+    # time an untraced run first, since tracing allocations slows everything down
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    data = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return data, size, elapsed
+
+
+def main():
+    body = json.dumps([match_record(m) for m in range(MATCHES)])
+
+    dicts, dict_size, dict_time = _measure(lambda: [m["match"] for m in json.loads(body)])
+    del dicts
+
+    models, model_size, model_time = _measure(lambda: to_models([m["match"] for m in json.loads(body)], "match"))
+
+    assert isinstance(models[0], Match)
+
+    print(f"{MATCHES} matches as dicts      {dict_size / 2 ** 20:8.1f} MiB ({dict_size / MATCHES:6.0f} B/match), "
+          f"decoded in {dict_time:.2f}s")
+    print(f"{MATCHES} matches as models     {model_size / 2 ** 20:8.1f} MiB ({model_size / MATCHES:6.0f} B/match), "
+          f"decoded in {model_time:.2f}s")
+    print(f"models use {1 - model_size / dict_size:.0%} less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares summarizing the scores of 1,000,000 synthetic matches with ad-hoc string splitting (one match at a time)
+against ``chyllonge.scores.score_columns``, which parses each distinct scores_csv string only once, and
+``score_arrays``, which parses them all in a few vectorized NumPy passes.
+
+Only score_arrays is faster on both datasets. score_columns is about twice as fast as ad-hoc splitting on game
+counts, whose strings repeat heavily, but about half as fast on point scores, where nearly a third of the strings
+are distinct.
+
+Run from the repository root with ``python -m benchmarks.scores``.
+"""
+
+import time
+import random
+
+from src.chyllonge.scores import score_arrays, score_columns
+
+MATCHES = 1_000_000
+
+
+def _match_scores(rng):
+    # game counts of a best-of-three or best-of-five match, e.g. "2-1", or the games of each set, e.g. "6-4,3-6,7-5"
+    if rng.random() < 0.5:
+        winner, loser = rng.choice((2, 3)), rng.randint(0, 1)
+        return f"{winner}-{loser}" if rng.random() < 0.5 else f"{loser}-{winner}"
+
+    return ",".join(f"{rng.choice((6, 7))}-{rng.randint(0, 5)}" if rng.random() < 0.5
+                    else f"{rng.randint(0, 5)}-{rng.choice((6, 7))}" for _ in range(rng.choice((2, 3))))
+
+
+def _point_scores(rng):
+    # a mix of single-game results, sets of points and (possibly negative) point totals; this makes nearly a third of
+    # the strings distinct, which is the worst case for parsing each distinct string once
+    kind = rng.random()
+
+    if kind < 0.4:
+        return f"{rng.randint(0, 3)}-{rng.randint(0, 3)}"
+
+    if kind < 0.8:
+        return ",".join(f"{rng.randint(0, 11)}-{rng.randint(0, 11)}" for _ in range(rng.choice((2, 3, 5))))
+
+    return f"{rng.randint(-5, 150)}-{rng.randint(-5, 150)}"
+
+
+def _ad_hoc(matches):
+    player1_games, player2_games, player1_sets, player2_sets = [], [], [], []
+
+    for match in matches:
+        scores_csv = match["scores_csv"]
+        p1_games = p2_games = p1_sets = p2_sets = 0
+
+        for score in scores_csv.split(","):
+            p1, p2 = score[1:].split("-", 1) if score.startswith("-") else score.split("-", 1)
+            p1 = -int(p1) if score.startswith("-") else int(p1)
+            p2 = int(p2)
+
+            p1_games += p1
+            p2_games += p2
+            p1_sets += p1 > p2
+            p2_sets += p2 > p1
+
+        player1_games.append(p1_games)
+        player2_games.append(p2_games)
+        player1_sets.append(p1_sets)
+        player2_sets.append(p2_sets)
+
+    return player1_games, player2_games, player1_sets, player2_sets
+
+
+def _run(label, matches):
+    started = time.perf_counter()
+    expected = _ad_hoc(matches)
+    ad_hoc = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columns = score_columns(matches)
+    bulk = time.perf_counter() - started
+
+    assert columns["player1_games"] == expected[0] and columns["player2_sets"] == expected[3]
+
+    distinct = len({m["scores_csv"] for m in matches})
+
+    print(f"{label}: {len(matches)} matches, {distinct} distinct scores_csv strings")
+    print(f"  ad-hoc splitting      {ad_hoc:6.2f}s")
+    print(f"  score_columns         {bulk:6.2f}s ({ad_hoc / bulk:.1f}x, including validation)")
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("  score_arrays          skipped (numpy is not installed)")
+        return
+
+    started = time.perf_counter()
+    arrays = score_arrays(matches)
+    vectorized = time.perf_counter() - started
+
+    assert arrays["player1_games"].tolist() == expected[0] and arrays["player2_sets"].tolist() == expected[3]
+
+    print(f"  score_arrays          {vectorized:6.2f}s ({ad_hoc / vectorized:.1f}x, including validation)")
+
+
+def main():
+    rng = random.Random(42)
+
+    _run("match scores", [{"id": m, "scores_csv": _match_scores(rng)} for m in range(MATCHES)])
+    _run("point scores", [{"id": m, "scores_csv": _point_scores(rng)} for m in range(MATCHES)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the cold-start cost of the client in fresh interpreters: importing ``chyllonge.api``, constructing a
+``ChallongeApi``, and the deferred work that only runs on first use (resolving the timezone offset and creating the
+pooled session). For reference, it also times importing the modules the client used to load eagerly.
+
+Run from the repository root with ``python -m benchmarks.startup``.
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+RUNS = 15
+
+# the modules that used to be imported (and the work that used to run) as soon as a client was constructed
+EAGER_MODULES = ("requests", "tzlocal", "zoneinfo", "asyncio", "concurrent.futures", "sqlite3", "email.utils")
+
+_PROBE = """
+import sys, json, time
+
+started = time.perf_counter()
+import src.chyllonge.api as api
+imported = time.perf_counter()
+client = api.ChallongeApi()
+constructed = time.perf_counter()
+loaded = [m for m in %r if m in sys.modules]
+client.http.tz_utc_offset_string
+resolved = time.perf_counter()
+client.http.session
+connected = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - started, "construct": constructed - imported, "timezone": resolved - constructed,
+    "session": connected - resolved, "loaded": loaded,
+}))
+""" % (EAGER_MODULES,)
+
+_REFERENCE = """
+import time
+
+started = time.perf_counter()
+import %s
+print(time.perf_counter() - started)
+""" % ", ".join(EAGER_MODULES)
+
+
+def _run(code: str) -> str:
+    env = dict(os.environ, CHALLONGE_USER=os.environ.get("CHALLONGE_USER", "chyllonge-benchmark"),
+               CHALLONGE_KEY=os.environ.get("CHALLONGE_KEY", "chyllonge-benchmark"))
+
+    return subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+
+
+def main():
+    probes = [json.loads(_run(_PROBE)) for _ in range(RUNS)]
+    reference = [float(_run(_REFERENCE)) for _ in range(RUNS)]
+
+    def median_ms(values):
+        return statistics.median(values) * 1000
+
+    print(f"median of {RUNS} fresh interpreters:")
+    print(f"  import chyllonge.api        {median_ms([p['import'] for p in probes]):8.2f} ms")
+    print(f"  ChallongeApi()              {median_ms([p['construct'] for p in probes]):8.2f} ms")
+    print(f"  first tz_utc_offset_string  {median_ms([p['timezone'] for p in probes]):8.2f} ms (deferred)")
+    print(f"  first session               {median_ms([p['session'] for p in probes]):8.2f} ms (deferred)")
+    print(f"  eager imports, for reference {median_ms(reference):7.2f} ms ({', '.join(EAGER_MODULES)})")
+    print(f"  modules loaded by import + construction: {probes[0]['loaded'] or 'none of the above'}")
+
+    if sys.flags.dont_write_bytecode:
+        print("  note: bytecode caching is disabled, so every import above includes compiling the module")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares per-call latency of one-off ``requests.get`` calls (a new connection per call, which is how chyllonge
+used to send requests) against the pooled, keep-alive session used by ``ChallongeApiHttpMethods``.
+
+The benchmark runs against a local HTTP server, so it measures connection setup and client overhead only. Against
+api.challonge.com every new connection also pays for a TLS handshake, so the real-world difference is larger.
+
+Run from the repository root with ``python -m benchmarks.transport``.
+"""
+
+import time
+import statistics
+
+import requests
+
+from benchmarks.local_server import LocalServer
+from src.chyllonge.api import ChallongeApiHttpMethods
+
+CALLS = 500
+
+
+def _summarize(label, timings):
+    timings = sorted(timings)
+
+    print(
+        f"{label:<28} mean {statistics.mean(timings) * 1000:7.3f} ms | "
+        f"p50 {timings[len(timings) // 2] * 1000:7.3f} ms | "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1000:7.3f} ms"
+    )
+
+
+def _time_calls(call):
+    timings = []
+
+    for _ in range(CALLS):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+
+    return timings
+
+
+def main():
+    with LocalServer() as server:
+        http = ChallongeApiHttpMethods()
+        http.base_challonge_url = server.base_url
+
+        _summarize(
+            "one-off requests.get",
+            _time_calls(lambda: requests.get(server.base_url + "tournaments/1/matches.json",
+                                             headers=http.user_agent_param, auth=http.basic_auth_param).json())
+        )
+
+        _summarize("pooled session", _time_calls(lambda: http.get("tournaments/1/matches.json")))
+
+        http.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,593 @@
+import time
+import base64
+import asyncio
+import inspect
+from typing import List
+
+from .api import (ChallongeAPIException, ChallongeApiHttpMethods, ChallongeValidationException, TournamentAPI,
+                  ParticipantAPI, MatchAPI, AttachmentAPI)
+from .archive import TournamentArchive
+from .bulk import BulkResult, _aiter, prefetch_async, run_batches_async, run_chains_async, run_concurrently_async
+from .cache import ResponseCache, ValidatorCache, request_key
+from .codec import decode
+from .exceptions import response_error
+from .instrumentation import RequestInfo, aiohttp_trace_config
+from .models import to_models
+from .retry import RetryPolicy, VerifyBeforeRetry
+from .throttle import TokenBucket
+from .tracing import traced
+from .validation import ValidationPolicy
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency; see the "async" extra in pyproject.toml
+    aiohttp = None
+
+
+class AsyncChallongeApi:
+    """
+    An asyncio counterpart to ChallongeApi. Every sub-API method returns a coroutine, e.g.:
+
+        async with AsyncChallongeApi() as api:
+            matches = await asyncio.gather(*[api.matches.get(tournament_id, m) for m in match_ids])
+    """
+
+    def __init__(self, http=None, archive: TournamentArchive = None, **http_options):
+        """
+        :param http: An existing AsyncChallongeApiHttpMethods instance to share. If omitted, a new one is created.
+        :param archive: An optional TournamentArchive that tournaments.get_snapshot serves finalized tournaments from.
+        :param http_options: Keyword arguments passed to AsyncChallongeApiHttpMethods when ``http`` is omitted.
+        """
+
+        self.http = http if http is not None else AsyncChallongeApiHttpMethods(**http_options)
+
+        self.tournaments = AsyncTournamentAPI(self.http, archive=archive)
+        self.matches = AsyncMatchAPI(self.http)
+        self.participants = AsyncParticipantAPI(self.http)
+        self.attachments = AttachmentAPI(self.http)
+
+    async def get_heartbeat(self):
+        """
+        Invokes the most basic kind of API request.
+        """
+
+        session = self.http.get_session()
+
+        async with session.get(self.http.base_challonge_url, headers=self.http.user_agent_param) as response:
+            body = await response.read()
+
+            self.http._check_response("GET", self.http.base_challonge_url, response.status, body, response.headers)
+
+            return body.decode(response.get_encoding(), "replace")
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class AsyncChallongeApiHttpMethods(ChallongeApiHttpMethods):
+    """
+    Non-blocking HTTP methods backed by a pooled ``aiohttp.ClientSession``. The verbs (get, post, put and delete)
+    return coroutines, so the regular sub-API classes can be used on top of this class unchanged.
+    """
+
+    def __init__(self, pool_maxsize: int = 100, keep_alive: bool = True, timeout=(5.0, 30.0),
+                 max_concurrency: int = 100, rate_limiter: TokenBucket = None, retry_policy: RetryPolicy = None,
+                 cache: ResponseCache = None, validator_cache: ValidatorCache = None, models: bool = False,
+                 validation_policy: ValidationPolicy = None, json_loads=None, hooks: list = None,
+                 tracer=None):
+        """
+        :param pool_maxsize: The maximum number of open connections.
+        :param keep_alive: If False, connections are closed after every request.
+        :param timeout: A number of seconds, or a (connect, read) tuple of seconds, before a request is abandoned.
+        :param max_concurrency: The maximum number of requests in flight at once; any further requests wait
+               for a free slot.
+        :param rate_limiter: An optional TokenBucket that paces every request and absorbs 429 Too Many Requests
+               responses. It can be shared with synchronous clients.
+        :param retry_policy: An optional RetryPolicy that re-sends requests after transient failures.
+        :param cache: An optional ResponseCache that serves repeated GET requests from memory.
+        :param validator_cache: An optional ValidatorCache, used to send conditional GET requests.
+        :param models: If True, records are returned as typed models instead of dicts.
+        :param validation_policy: An optional ValidationPolicy for pre-flight checks.
+        :param json_loads: The function that parses response bodies (as bytes); see ChallongeApiHttpMethods.
+        :param hooks: Optional RequestHook instances, called before and after every HTTP request; see
+               ChallongeApiHttpMethods.
+        :param tracer: An optional tracer (see chyllonge.tracing). Spans follow the asyncio tasks a call starts.
+        """
+
+        if aiohttp is None:
+            raise ChallongeAPIException(
+                'ERROR: AsyncChallongeApi requires aiohttp. Install it with "pip install chyllonge[async]".'
+            )
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+        super().__init__(pool_maxsize=pool_maxsize, keep_alive=keep_alive, timeout=timeout, rate_limiter=rate_limiter,
+                         retry_policy=retry_policy, cache=cache, validator_cache=validator_cache, models=models,
+                         validation_policy=validation_policy, json_loads=json_loads, hooks=hooks,
+                         tracer=tracer)
+
+    def _create_session(self):
+        # an aiohttp session has to be created inside a running event loop, so this is deferred to get_session()
+        return None
+
+    def get_session(self):
+        """
+        Returns the shared ``aiohttp.ClientSession``, creating it (and the concurrency semaphore) on first use.
+        """
+
+        if self.session is None:
+            if isinstance(self.timeout, tuple):
+                connect_timeout, read_timeout = self.timeout
+            else:
+                connect_timeout = read_timeout = self.timeout
+
+            # sent as a plain header: aiohttp.BasicAuth is deprecated as of aiohttp 3.14
+            credentials = base64.b64encode(f"{self.user}:{self.key}".encode("latin-1")).decode("ascii")
+
+            self.session = aiohttp.ClientSession(
+                headers={"Authorization": f"Basic {credentials}"},
+                timeout=aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout),
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize, force_close=not self.keep_alive),
+                trace_configs=[aiohttp_trace_config()] if self.hooks else None
+            )
+
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self.session
+
+    def close(self):
+        raise ChallongeAPIException("ERROR: Use 'await aclose()' to close an asynchronous client.")
+
+    async def aclose(self):
+        """
+        Closes every pooled connection.
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def _encode(params):
+        """
+        Converts request parameters into (key, value) string pairs the way requests would: None values are
+        dropped, and list values are repeated once per item. Parameters that already are a list of pairs keep their
+        order.
+        """
+
+        pairs = []
+
+        for key, value in (params.items() if isinstance(params, dict) else params or ()):
+            for v in (value if isinstance(value, (list, tuple)) else [value]):
+                if v is not None:
+                    pairs.append((key, str(v)))
+
+        return pairs
+
+    async def _request(self, method: str, api_suffix: str, params=None, envelope: str = None,
+                       verify: VerifyBeforeRetry = None):
+        if self.cache is None:
+            return await self._perform(method, api_suffix, params, envelope, verify)
+
+        if method == "GET":
+            cached = self.cache.get(api_suffix, params, envelope)
+
+            if cached is not None:
+                return cached
+
+            generation = self.cache.generation(api_suffix)
+            result = await self._perform(method, api_suffix, params, envelope, verify)
+            self.cache.put(api_suffix, params, result, generation, envelope)
+
+            return result
+
+        self.cache.invalidate(api_suffix)
+
+        try:
+            return await self._perform(method, api_suffix, params, envelope, verify)
+        finally:
+            self.cache.invalidate(api_suffix)
+
+    async def _perform(self, method: str, api_suffix: str, params=None, envelope: str = None,
+                       verify: VerifyBeforeRetry = None):
+        url = self.base_challonge_url + api_suffix
+        request_headers = self.user_agent_param
+        attempt = 0
+        started = time.perf_counter()
+
+        if method == "GET" and self.validator_cache is not None:
+            key = request_key(api_suffix, params, envelope)
+            validated = self.validator_cache.get(key)
+
+            if validated is not None:
+                request_headers = dict(request_headers, **validated[0])
+        else:
+            validated = None
+
+        while True:
+            try:
+                status, headers, body = await self._send(method, url, params, request_headers, attempt)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                never_sent = isinstance(e, aiohttp.ClientConnectorError)
+                decision = self._retry_decision(method, attempt, may_have_applied=not never_sent, verify=verify)
+
+                if decision is None:
+                    raise
+
+                failure, retry_after = e, None
+            else:
+                decision = self._retry_decision(method, attempt, status_code=status, verify=verify)
+
+                if decision is None:
+                    break
+
+                failure = None
+                retry_after = TokenBucket.parse_retry_after(headers.get("Retry-After"))
+
+            if decision == RetryPolicy.VERIFY:
+                self.retry_policy.stats.record(verifications=1)
+
+                try:
+                    records = verify.fetch()
+
+                    if inspect.isawaitable(records):
+                        records = await records
+
+                    record = verify.find(records)
+                except Exception as verification_error:
+                    # see ChallongeApiHttpMethods._perform
+                    if failure is None:
+                        failure = response_error(method, url, status, body, headers, time.perf_counter() - started,
+                                                 attempt + 1)
+
+                    raise failure from verification_error
+
+                if record is not None:
+                    self.retry_policy.stats.record(verified=1)
+                    return record
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            self.retry_policy.stats.record(retries=1, retry_delay=delay)
+            await asyncio.sleep(delay)
+
+            attempt += 1
+
+        if self.rate_limiter and status in (200, 304):
+            self.rate_limiter.reward()
+
+        if status == 304 and validated is not None:
+            self.validator_cache.record_revalidation()
+            result = validated[1]
+        else:
+            if status != 200:
+                self._check_response(method, url, status, body, headers, time.perf_counter() - started, attempt + 1)
+
+            result = decode(body, envelope, self.json_loads)
+
+            if self.models:
+                result = to_models(result, envelope)
+
+            if method == "GET" and self.validator_cache is not None:
+                self.validator_cache.put(key, headers.get("ETag"), headers.get("Last-Modified"), result)
+
+        if self.validation_policy is not None:
+            self.validation_policy.observe(method, api_suffix, result, envelope)
+
+        return result
+
+    async def _send(self, method: str, url: str, params=None, headers=None, attempt: int = 0):
+        """
+        Sends a single request, pacing it with the rate limiter (if any) and re-sending it while it is throttled.
+        Returns the status code, headers and (raw) body of the response.
+        """
+
+        payload_key = "params" if method in ("GET", "DELETE") else "data"
+        session = self.get_session()
+        throttle_retries = 0
+
+        while True:
+            if self.rate_limiter:
+                delay = self.rate_limiter.reserve()
+
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            request = {"headers": headers or self.user_agent_param, payload_key: self._encode(params)}
+
+            async with self._semaphore:
+                if self.hooks:
+                    info = RequestInfo(method, url, self._endpoint(url), attempt, throttle_retries)
+                    status, response_headers, body = await self._observe_async(
+                        info, session.request(method, url, trace_request_ctx=info, **request)
+                    )
+                else:
+                    async with session.request(method, url, **request) as response:
+                        body = await response.read()
+
+                    status, response_headers = response.status, response.headers
+
+            if not self._should_back_off(status, response_headers, throttle_retries):
+                return status, response_headers, body
+
+            throttle_retries += 1
+
+    async def _observe_async(self, info: RequestInfo, request):
+        """
+        The asynchronous counterpart of ChallongeApiHttpMethods._observe. DNS, connection and time-to-first-byte
+        timings are recorded by the session's trace config (see instrumentation.aiohttp_trace_config).
+
+        :param info: The request, as the hooks see it.
+        :param request: The (not yet awaited) ``session.request(...)`` call, with ``info`` as its trace context.
+        """
+
+        for hook in self.hooks:
+            hook.before_request(info)
+
+        info.started = time.perf_counter()
+
+        try:
+            async with request as response:
+                body = await response.read()
+
+            info.status = response.status
+            info.response_bytes = len(body)
+
+            return response.status, response.headers, body
+        except Exception as e:
+            info.error = e
+            raise
+        finally:
+            info.total = time.perf_counter() - info.started
+
+            for hook in self.hooks:
+                hook.after_request(info)
+
+
+@traced
+class AsyncTournamentAPI(TournamentAPI):
+    """
+    TournamentAPI, with the methods that chain several requests rewritten as coroutines.
+    """
+
+    async def iter_all(self, state: str = None, tournament_type: str = None, created_after: str = None,
+                       created_before: str = None, window_days: int = 30, max_workers: int = 4):
+        """
+        Retrieve the tournaments created with your account as a stream; see TournamentAPI.iter_all. This is an async
+        generator.
+        """
+
+        windows = self._date_windows(created_after, created_before, window_days)
+
+        def fetch(window):
+            return self.get_all(state, tournament_type, created_after=window[0], created_before=window[1])
+
+        previous = set()
+
+        async for tournaments in prefetch_async(windows, fetch, max_concurrency=max_workers):
+            current = set()
+
+            for tournament in tournaments:
+                current.add(tournament["id"])
+
+                if tournament["id"] not in previous:
+                    yield tournament
+
+            previous = current
+
+    async def start(self, tournament_id: str, include_participants: int = None, include_matches: int = None):
+        """
+        Start a tournament, opening up first round matches for score reporting. The tournament must have at least
+        2 participants; see TournamentAPI.start.
+
+        :param tournament_id: Tournament ID (e.g. 10230) or URL (e.g. 'single_elim' for challonge.com/single_elim).
+        If assigned to a subdomain, URL format must be :subdomain-:tournament_url (e.g. 'test-mytourney'
+        for test.challonge.com/mytourney)
+        :param include_participants: 0 or 1; includes an array of associated participant records
+        :param include_matches: 0 or 1; includes an array of associated match records
+        """
+
+        params = {
+            "include_participants": include_participants,
+            "include_matches": include_matches
+        }
+
+        participant_count = self._known_participant_count(tournament_id)
+
+        if participant_count is self._FETCH:
+            participant_count = len(await self.participant_api.get_all(tournament_id))
+
+        self._check_participant_count(tournament_id, participant_count)
+
+        try:
+            tournament = await self.http.post(f"tournaments/{tournament_id}/start.json", params, envelope="tournament")
+        except ChallongeValidationException as e:
+            raise self._server_validation_error(tournament_id, e)
+
+        return tournament
+
+    async def _send_update(self, tournament_id: str, params: dict):
+        # TournamentAPI.update builds the parameters; the archived snapshot is only dropped once the update succeeded
+        tournament = await self.http.put(f"tournaments/{tournament_id}.json", params=params, envelope="tournament")
+
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
+
+        return tournament
+
+    async def delete(self, tournament_id: str):
+        """
+        Deletes a tournament along with all its associated records. There is no undo, so use with care!
+        """
+
+        tournament = await self.http.delete(f"tournaments/{tournament_id}.json", envelope="tournament")
+
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
+
+        return tournament
+
+    async def delete_all(self, state: str = None, tournament_type: str = None, name: str = None,
+                         created_after: str = None, created_before: str = None, max_workers: int = 8,
+                         window_days: int = None, progress=None, dry_run: bool = False) -> List[BulkResult]:
+        """
+        Deletes every tournament that matches the given filters; see TournamentAPI.delete_all.
+        """
+
+        if window_days is None:
+            tournaments = await self.get_all(state, tournament_type, created_after, created_before)
+        else:
+            tournaments = self.iter_all(state, tournament_type, created_after, created_before, window_days)
+
+        matches_name = self._name_matcher(name)
+
+        async def candidates():
+            async for tournament in _aiter(tournaments):
+                if matches_name(tournament.get("name")):
+                    yield tournament
+
+        async def delete(tournament):
+            if dry_run:
+                return BulkResult(tournament, result=tournament, skipped=True)
+
+            try:
+                return BulkResult(tournament, result=await self.delete(tournament["id"]))
+            except Exception as e:
+                return BulkResult(tournament, error=e)
+
+        results = []
+        failed = 0
+
+        async for result in prefetch_async(candidates(), delete, max_concurrency=max_workers):
+            results.append(result)
+            failed += not result.ok
+
+            if progress is not None:
+                progress(len(results), failed)
+
+        return results
+
+    async def reset(self, tournament_id: str, include_participants: int = None, include_matches: int = None):
+        """
+        Reset a tournament, clearing all of its scores and attachments.
+        """
+
+        params = {
+            "include_participants": include_participants,
+            "include_matches": include_matches
+        }
+
+        tournament = await self.http.post(f"tournaments/{tournament_id}/reset.json", params, envelope="tournament")
+
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
+
+        return tournament
+
+    async def get_snapshot(self, tournament_id: str):
+        """
+        Retrieve a tournament record with all of its participants and matches; see TournamentAPI.get_snapshot.
+        """
+
+        if self.archive is not None:
+            snapshot = self.archive.get(tournament_id)
+
+            if snapshot is not None:
+                return to_models(snapshot, "tournament") if self.http.models else snapshot
+
+        tournament = await self.get(tournament_id, include_participants=1, include_matches=1)
+
+        if self.archive is not None:
+            self.archive.put(tournament)
+
+        return tournament
+
+
+@traced
+class AsyncMatchAPI(MatchAPI):
+    """
+    MatchAPI, with its bulk operations rewritten as coroutines.
+    """
+
+    async def update_many(self, tournament_id: str, updates, max_workers: int = 8, matches: List[dict] = None):
+        """
+        Submit many match results at once; see MatchAPI.update_many. ``max_workers`` bounds the number of updates in
+        flight at once.
+        """
+
+        updates = list(updates)
+
+        if not updates:
+            return []
+
+        if matches is None:
+            matches = await self.get_all(tournament_id)
+
+        chains, dependencies = self._chain_updates(updates, matches)
+
+        return await run_chains_async(
+            updates,
+            chains,
+            dependencies,
+            lambda u: self.update(tournament_id, u[0], match_scores_csv=u[1], match_winner_id=u[2]),
+            max_concurrency=max_workers
+        )
+
+
+@traced
+class AsyncParticipantAPI(ParticipantAPI):
+    """
+    ParticipantAPI, with its bulk operations rewritten as coroutines.
+    """
+
+    async def _set_checked_in_many(self, tournament_id: str, participant_ids, checked_in: bool, max_workers: int,
+                                   participants: List[dict]):
+        participant_ids = self._distinct(participant_ids)
+
+        if not participant_ids:
+            return []
+
+        if participants is None:
+            participants = await self.get_all(tournament_id)
+
+        results, pending = self._plan_check_ins(participant_ids, participants, checked_in)
+        method = self.check_in if checked_in else self.check_out
+
+        done = await run_concurrently_async(
+            [participant_ids[i] for i in pending], lambda p: method(tournament_id, p), max_concurrency=max_workers
+        )
+
+        for index, result in zip(pending, done):
+            results[index] = result
+
+        return results
+
+    async def import_participants(self, tournament_id: str, rows, chunk_size: int = 100, max_workers: int = 4,
+                                  skip_existing: bool = False):
+        """
+        Streams a roster into a tournament; see ParticipantAPI.import_participants. This is an async generator.
+        """
+
+        existing = {p["name"]: p for p in await self.get_all(tournament_id)} if skip_existing else {}
+
+        async def add_chunk(chunk):
+            pending = [row for row in chunk if self._row_name(row) not in existing]
+
+            if pending:
+                added = await self.http.post(
+                    f"tournaments/{tournament_id}/participants/bulk_add.json", self._bulk_add_params(pending),
+                    envelope="participant"
+                )
+            else:
+                added = []
+
+            return self._merge_existing(chunk, existing, added)
+
+        async for result in run_batches_async(rows, add_chunk, chunk_size, max_workers, is_barrier=self._is_seeded):
+            yield result
@@ -1,31 +1,51 @@
 import os
-import ast
-import json
-import zoneinfo
-from datetime import datetime
+import time
+import fnmatch
+import threading
+from datetime import datetime, timedelta
+from functools import cached_property
 
 from typing import List
 
-import tzlocal
-import requests
+from .archive import TournamentArchive
+from .bulk import BulkResult, prefetch, run_batches, run_chains, run_concurrently
+from .cache import ResponseCache, ValidatorCache, request_key
+from .codec import decode
+from .exceptions import (ChallongeAPIException, ChallongeAPINotImplementedException, ChallongeValidationException,
+                         response_error)
+from .instrumentation import RequestInfo, _current, endpoint_template, timed_adapter_class
+from .models import to_models
+from .retry import RetryPolicy, VerifyBeforeRetry
+from .throttle import TokenBucket
+from .tracing import TracingHook, traced
+from .validation import CACHED, MIN_PARTICIPANTS, SERVER, ValidationPolicy
 
 
-class ChallongeAPIException(Exception):
-    # raise ChallongeAPIException('foo bar baz buzz')
-    pass
+def _requests():
+    """
+    Imports requests on first use. It is by far the most expensive import of the client, and processes that never
+    send a request (or only construct a client) should not pay for it.
+    """
 
+    import requests
 
-class ChallongeAPINotImplementedException(Exception):
-    # raise ChallongeAPIException('foo bar baz buzz')
-    pass
+    return requests
 
 
 class ChallongeApi:
 
-    def __init__(self):
-        self.http = ChallongeApiHttpMethods()
+    def __init__(self, http=None, archive: TournamentArchive = None, **http_options):
+        """
+        :param http: An existing ChallongeApiHttpMethods instance to share (e.g. between several clients). If
+               omitted, a new one is created.
+        :param archive: An optional TournamentArchive that tournaments.get_snapshot serves finalized tournaments from.
+        :param http_options: Keyword arguments passed to ChallongeApiHttpMethods when ``http`` is omitted (e.g.
+               ``pool_maxsize=32``).
+        """
+
+        self.http = http if http is not None else ChallongeApiHttpMethods(**http_options)
 
-        self.tournaments = TournamentAPI(self.http)
+        self.tournaments = TournamentAPI(self.http, archive=archive)
         self.matches = MatchAPI(self.http)
         self.participants = ParticipantAPI(self.http)
         self.attachments = AttachmentAPI(self.http)
@@ -35,21 +55,59 @@ class ChallongeApi:
         Invokes the most basic kind of API request.
         """
 
-        response = requests.get(
+        response = self.http.session.get(
             self.http.base_challonge_url,
             headers=self.http.user_agent_param,
-            auth=self.http.basic_auth_param
+            auth=self.http.basic_auth_param,
+            timeout=self.http.timeout
         )
 
-        if response.status_code != 200:
-            raise ChallongeAPIException(f"ERROR: {', '.join([e for e in json.loads(response.text)['errors']])}")
+        ChallongeApiHttpMethods._check_response("GET", self.http.base_challonge_url, response.status_code,
+                                                response.content, response.headers)
 
         return response.text
 
 
 class ChallongeApiHttpMethods:
 
-    def __init__(self):
+    def __init__(self, pool_connections: int = 1, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, timeout=(5.0, 30.0), rate_limiter: TokenBucket = None,
+                 retry_policy: RetryPolicy = None, cache: ResponseCache = None,
+                 validator_cache: ValidatorCache = None, models: bool = False,
+                 validation_policy: ValidationPolicy = None, json_loads=None, hooks: list = None,
+                 tracer=None):
+        """
+        All requests are sent through a single ``requests.Session``, so TCP and TLS connections to
+        api.challonge.com are pooled and re-used between calls instead of being re-established every time.
+
+        :param pool_connections: The number of distinct hosts to keep connection pools for.
+        :param pool_maxsize: The maximum number of connections kept alive per host. This should be at least the
+               number of threads that share this instance.
+        :param pool_block: If True, a thread waits for a free pooled connection instead of opening a throwaway one
+               once ``pool_maxsize`` connections are in use.
+        :param keep_alive: If False, every request asks the server to close its connection afterward.
+        :param timeout: A number of seconds, or a (connect, read) tuple of seconds, before a request is abandoned.
+        :param rate_limiter: An optional TokenBucket that paces every request and absorbs 429 Too Many Requests
+               responses. Share one instance between threads and clients to give them a common budget.
+        :param retry_policy: An optional RetryPolicy that re-sends requests after transient failures (connection
+               errors, timeouts and 5xx responses). Its ``stats`` counters show how many retries were needed.
+        :param cache: An optional ResponseCache that serves repeated GET requests from memory. Writes made through
+               this instance invalidate the affected tournament's cached responses.
+        :param validator_cache: An optional ValidatorCache. GET requests then send If-None-Match/If-Modified-Since
+               headers, and a 304 Not Modified response returns the previously decoded object without re-parsing.
+        :param models: If True, records are returned as typed, memory-efficient models (Tournament, Participant,
+               Match and MatchAttachment from chyllonge.models) instead of dicts.
+        :param validation_policy: An optional ValidationPolicy that decides how pre-flight checks (such as the
+               participant count check in TournamentAPI.start) are done, and learns from every response. Without
+               one, every check fetches what it needs.
+        :param json_loads: The function that parses response bodies (as bytes), e.g. ``orjson.loads``. Defaults to
+               orjson if it is installed, and to the standard library's json otherwise.
+        :param hooks: Optional RequestHook instances (see chyllonge.instrumentation), called before and after every
+               HTTP request with its endpoint, status, size, timings and retry count, e.g. a LatencyHistogram.
+        :param tracer: An optional tracer (see chyllonge.tracing), e.g. an OpenTelemetryTracer. Every public
+               sub-API method then opens a span, with a child span for each HTTP request it sends.
+        """
+
         self.user = os.environ["CHALLONGE_USER"]
         self.key = os.environ["CHALLONGE_KEY"]
 
@@ -65,99 +123,461 @@ class ChallongeApiHttpMethods:
 
         self.basic_auth_param = (self.user, self.key)
 
+        # note that the user agent string is required to get around Cloudflare issues
+        self.user_agent_param = {"User-Agent": "chyllonge"}
+
+        self.base_challonge_url = "https://api.challonge.com/v1/"
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.cache = cache
+        self.validator_cache = validator_cache
+        self.models = models
+        self.validation_policy = validation_policy
+        self.json_loads = json_loads
+        self.hooks = list(hooks or ())
+        self.tracer = tracer
+
+        if tracer is not None:
+            self.hooks.append(TracingHook(tracer))
+
+        # the session (and the timezone below) are only set up on first use, so constructing a client is cheap
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        The pooled session shared by every HTTP verb, created on first use.
+        """
+
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    @cached_property
+    def timezone(self):
+        """
+        The timezone named by the CHALLONGE_IANA_TZ_NAME environment variable, or else the local timezone. It is
+        resolved on first use.
+        """
+
         if "CHALLONGE_IANA_TZ_NAME" in os.environ:
-            self.timezone = zoneinfo.ZoneInfo(os.environ["CHALLONGE_IANA_TZ_NAME"])
+            import zoneinfo
+
+            timezone = zoneinfo.ZoneInfo(os.environ["CHALLONGE_IANA_TZ_NAME"])
         else:
-            self.timezone = tzlocal.get_localzone()
+            import tzlocal
 
-        if not self.timezone:
+            timezone = tzlocal.get_localzone()
+
+        if not timezone:
             raise ChallongeAPIException(
                 'ERROR: The local timezone could not be ascertained. This may create issues.'
             )
 
-        self.now = datetime.now(tz=self.timezone)
-        self.tz_utc_offset = self.now.strftime('%z')
-        self.tz_utc_offset_string = self.tz_utc_offset[0:-2] + ":" + self.tz_utc_offset[-2:]
+        return timezone
 
-        # note that the user agent string is required to get around Cloudflare issues
-        self.user_agent_param = {"User-Agent": "chyllonge"}
+    @cached_property
+    def now(self):
+        return datetime.now(tz=self.timezone)
 
-        self.base_challonge_url = "https://api.challonge.com/v1/"
+    @cached_property
+    def tz_utc_offset(self):
+        return self.now.strftime('%z')
 
-    def get(self, api_suffix='', params=None):
-        response = requests.get(
-            self.base_challonge_url + api_suffix,
-            headers=self.user_agent_param,
-            auth=self.basic_auth_param,
-            params=params
-        )
+    @cached_property
+    def tz_utc_offset_string(self):
+        """
+        The UTC offset of the timezone, e.g. "-05:00", as Challonge expects it in timestamps.
+        """
+
+        return self.tz_utc_offset[0:-2] + ":" + self.tz_utc_offset[-2:]
+
+    def _create_session(self):
+        """
+        Builds the pooled, keep-alive session shared by every HTTP verb.
+        """
 
-        if response.status_code != 200:
-            raise ChallongeAPIException(f"ERROR: {', '.join([e for e in json.loads(response.text)['errors']])}")
+        from requests.adapters import HTTPAdapter
 
-        return json.loads(response.text)
+        session = _requests().Session()
 
-    def post(self, api_suffix, params=None):
-        response = requests.post(
-            self.base_challonge_url + api_suffix,
-            headers=self.user_agent_param,
-            auth=self.basic_auth_param,
-            data=params
+        # with hooks, connections are created by an adapter that reports how long setting them up took
+        adapter = (timed_adapter_class() if self.hooks else HTTPAdapter)(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
         )
 
-        if response.status_code != 200:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
 
-            if response.status_code == 401:
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
 
-                errors = response.text if "HTTP Basic" in response.text else ', '.join(
-                    [e for e in json.loads(response.text)['errors']]
-                )
+        return session
 
-                raise ChallongeAPIException(
-                    f"ERROR: Access was denied. Ensure that the local CHALLONGE_USER and CHALLONGE_KEY "
-                    f"environment variables are set. See https://challonge.com/settings/developer for more information."
-                    f" {errors}"
-                )
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+
+        if self._session is not None:
+            self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, api_suffix='', params=None, envelope: str = None):
+        return self._request("GET", api_suffix, params=params, envelope=envelope)
+
+    def post(self, api_suffix, params=None, envelope: str = None, verify: VerifyBeforeRetry = None):
+        return self._request("POST", api_suffix, params=params, envelope=envelope, verify=verify)
+
+    def put(self, api_suffix, params=None, envelope: str = None):
+        return self._request("PUT", api_suffix, params=params, envelope=envelope)
+
+    def delete(self, api_suffix, params=None, envelope: str = None):
+        return self._request("DELETE", api_suffix, params=params, envelope=envelope)
 
+    def _request(self, method: str, api_suffix: str, params=None, envelope: str = None,
+                 verify: VerifyBeforeRetry = None):
+        """
+        Sends a request through the response cache (if any) and returns its decoded (and optionally unwrapped) JSON
+        body. GET requests are served from the cache while fresh; any other request invalidates the cached
+        responses of the tournament it refers to. See ``_perform`` for the parameters.
+        """
+
+        if self.cache is None:
+            return self._perform(method, api_suffix, params, envelope, verify)
+
+        if method == "GET":
+            cached = self.cache.get(api_suffix, params, envelope)
+
+            if cached is not None:
+                return cached
+
+            generation = self.cache.generation(api_suffix)
+            result = self._perform(method, api_suffix, params, envelope, verify)
+            self.cache.put(api_suffix, params, result, generation, envelope)
+
+            return result
+
+        # invalidating both before and after the write ensures no read that overlaps it is cached
+        self.cache.invalidate(api_suffix)
+
+        try:
+            return self._perform(method, api_suffix, params, envelope, verify)
+        finally:
+            self.cache.invalidate(api_suffix)
+
+    def _perform(self, method: str, api_suffix: str, params=None, envelope: str = None,
+                 verify: VerifyBeforeRetry = None):
+        """
+        Sends a request (retrying it according to the retry policy) and returns its decoded (and optionally
+        unwrapped) JSON body.
+
+        :param method: GET, POST, PUT or DELETE. GET and DELETE send ``params`` in the query string; POST and PUT
+               send them as form data.
+        :param api_suffix: The path of the endpoint, relative to the base Challonge URL.
+        :param params: A dictionary of request parameters.
+        :param envelope: If provided, the key that wraps each returned record (e.g. "tournament").
+        :param verify: For non-idempotent requests, a lookup that tells whether a failed attempt was applied anyway.
+               Without it, such requests are only retried when they provably never reached the server.
+        """
+
+        requests = _requests()
+
+        url = self.base_challonge_url + api_suffix
+        headers = self.user_agent_param
+        attempt = 0
+        started = time.perf_counter()
+
+        # ask the server to skip the body if it hasn't changed since we last decoded it
+        if method == "GET" and self.validator_cache is not None:
+            key = request_key(api_suffix, params, envelope)
+            validated = self.validator_cache.get(key)
+
+            if validated is not None:
+                headers = dict(headers, **validated[0])
+        else:
+            validated = None
+
+        while True:
+            try:
+                response = self._send(method, url, params, headers, attempt)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                decision = self._retry_decision(method, attempt, may_have_applied=not self._never_sent(e),
+                                                verify=verify)
+
+                if decision is None:
+                    raise
+
+                failure, retry_after = e, None
             else:
-                raise ChallongeAPIException(
-                    f"ERROR: {self.base_challonge_url + api_suffix} | "
-                    f"{ast.literal_eval(response.content.decode('utf-8'))}"
-                )
+                decision = self._retry_decision(method, attempt, status_code=response.status_code, verify=verify)
 
-        return json.loads(response.text)
+                if decision is None:
+                    break
 
-    def put(self, api_suffix, params=None):
-        response = requests.put(
-            self.base_challonge_url + api_suffix,
-            headers=self.user_agent_param,
-            auth=self.basic_auth_param,
-            data=params
-        )
+                failure = None
+                retry_after = TokenBucket.parse_retry_after(response.headers.get("Retry-After"))
 
-        if response.status_code != 200:
-            raise ChallongeAPIException(f"ERROR: {', '.join([e for e in json.loads(response.text)['errors']])}")
+            if decision == RetryPolicy.VERIFY:
+                self.retry_policy.stats.record(verifications=1)
 
-        return json.loads(response.text)
+                try:
+                    record = verify.find(verify.fetch())
+                except Exception as verification_error:
+                    # whether the request was applied is unknown, so it is not re-sent; the failure that prompted the
+                    # check is reported, with the failed lookup as its cause
+                    if failure is None:
+                        failure = response_error(method, url, response.status_code, response.content,
+                                                 response.headers, time.perf_counter() - started, attempt + 1)
 
-    def delete(self, api_suffix, params=None):
-        response = requests.delete(
-            self.base_challonge_url + api_suffix,
-            headers=self.user_agent_param,
-            auth=self.basic_auth_param,
-            params=params
-        )
+                    raise failure from verification_error
+
+                if record is not None:
+                    self.retry_policy.stats.record(verified=1)
+                    return record
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            self.retry_policy.stats.record(retries=1, retry_delay=delay)
+            time.sleep(delay)
+
+            attempt += 1
+
+        if self.rate_limiter and response.status_code in (200, 304):
+            self.rate_limiter.reward()
+
+        if response.status_code == 304 and validated is not None:
+            self.validator_cache.record_revalidation()
+            result = validated[1]
+        else:
+            # successful responses are parsed straight from bytes; error responses at most once, and only if small
+            if response.status_code != 200:
+                self._check_response(method, url, response.status_code, response.content, response.headers,
+                                     time.perf_counter() - started, attempt + 1)
+
+            result = decode(response.content, envelope, self.json_loads)
+
+            if self.models:
+                result = to_models(result, envelope)
+
+            if method == "GET" and self.validator_cache is not None:
+                self.validator_cache.put(key, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                         result)
+
+        if self.validation_policy is not None:
+            self.validation_policy.observe(method, api_suffix, result, envelope)
+
+        return result
+
+    def _send(self, method: str, url: str, params=None, headers=None, attempt: int = 0):
+        """
+        Sends a single request, pacing it with the rate limiter (if any) and re-sending it while it is throttled.
+
+        :param method: The HTTP method.
+        :param url: The full URL.
+        :param params: A dictionary of request parameters, or a list of (key, value) pairs when their order matters.
+        :param headers: The request headers. Defaults to the User-Agent header.
+        :param attempt: How many times the retry policy has already re-sent the request (reported to hooks).
+        """
+
+        payload_key = "params" if method in ("GET", "DELETE") else "data"
+        throttle_retries = 0
+
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            request = {
+                "headers": headers or self.user_agent_param,
+                "auth": self.basic_auth_param,
+                "timeout": self.timeout,
+                payload_key: params,
+            }
+
+            if self.hooks:
+                info = RequestInfo(method, url, self._endpoint(url), attempt, throttle_retries)
+                response = self._observe(info, lambda: self.session.request(method, url, **request))
+            else:
+                response = self.session.request(method, url, **request)
 
-        if response.status_code != 200:
-            raise ChallongeAPIException(f"ERROR: {', '.join([e for e in json.loads(response.text)['errors']])}")
+            if not self._should_back_off(response.status_code, response.headers, throttle_retries):
+                return response
 
-        return json.loads(response.text)
+            throttle_retries += 1
 
+    def _endpoint(self, url: str) -> str:
+        """
+        Returns the endpoint template of a URL (see instrumentation.endpoint_template).
+        """
+
+        return endpoint_template(url[len(self.base_challonge_url):] if url.startswith(self.base_challonge_url) else url)
+
+    def _observe(self, info: RequestInfo, send):
+        """
+        Sends a request through the hooks: calls their before_request, sends it, fills in what the response
+        revealed, and calls their after_request (even if the request failed).
+
+        :param info: The request, as the hooks see it.
+        :param send: A callable that sends the request and returns a requests.Response.
+        """
+
+        for hook in self.hooks:
+            hook.before_request(info)
+
+        _current.info = info
+        info.started = time.perf_counter()
+
+        try:
+            response = send()
+
+            body = response.request.body if response.request is not None else None
+
+            info.status = response.status_code
+            info.request_bytes = len(body) if body else 0
+            info.response_bytes = len(response.content)
+            info.ttfb = response.elapsed.total_seconds()
+
+            return response
+        except Exception as e:
+            info.error = e
+            raise
+        finally:
+            info.total = time.perf_counter() - info.started
+            _current.info = None
+
+            for hook in self.hooks:
+                hook.after_request(info)
+
+    @staticmethod
+    def _never_sent(error) -> bool:
+        """
+        Returns True if a requests exception shows that the request never reached the server (so re-sending it
+        cannot apply it twice).
+
+        :param error: A requests.ConnectionError or requests.Timeout.
+        """
+
+        from urllib3.exceptions import NewConnectionError
+
+        if isinstance(error, _requests().ConnectTimeout):
+            return True
+
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+
+        return isinstance(reason, NewConnectionError)
+
+    def _retry_decision(self, method: str, attempt: int, status_code: int = None, may_have_applied: bool = True,
+                        verify: VerifyBeforeRetry = None):
+        """
+        Asks the retry policy (if any) what to do about a finished attempt; see RetryPolicy.decide. A request that
+        would need verification but has no lookup is not retried.
+
+        :param method: The HTTP method.
+        :param attempt: How many times the request has already been re-sent.
+        :param status_code: The HTTP status code, or None if no response was received.
+        :param may_have_applied: False if the attempt provably never reached the server.
+        :param verify: The request's verification lookup, if any.
+        """
+
+        if not self.retry_policy:
+            return None
+
+        if attempt == 0:
+            self.retry_policy.stats.record(requests=1)
+
+        if status_code == 200:
+            return None
+
+        decision = self.retry_policy.decide(method, attempt, status_code, may_have_applied)
+
+        if decision == RetryPolicy.VERIFY and verify is None:
+            decision = None
+
+        if decision is None and (status_code is None or status_code in self.retry_policy.retry_statuses):
+            self.retry_policy.stats.record(gave_up=1)
+
+        return decision
+
+    def _should_back_off(self, status_code: int, headers, throttle_retries: int) -> bool:
+        """
+        Decides whether a throttled request should be re-sent, penalizing the rate limiter if so. A request is
+        throttled if it was answered with 429 Too Many Requests, or with 503 Service Unavailable and a Retry-After
+        header (as Cloudflare does). The server rejected such requests outright, so re-sending them is always safe.
+
+        :param status_code: The HTTP status code of the response.
+        :param headers: The headers of the response.
+        :param throttle_retries: How many times this request has already been re-sent.
+        """
+
+        if not self.rate_limiter or throttle_retries >= self.rate_limiter.max_throttle_retries:
+            return False
+
+        if status_code != 429 and not (status_code == 503 and "Retry-After" in headers):
+            return False
+
+        self.rate_limiter.penalize(TokenBucket.parse_retry_after(headers.get("Retry-After")))
+
+        return True
+
+    @staticmethod
+    def _check_response(method: str, url: str, status_code: int, body, headers=None, elapsed: float = None,
+                        attempts: int = None):
+        """
+        Raises the ChallongeAPIException subclass that matches a response's status if it was not successful (see
+        exceptions.response_error). The body is parsed at most once, and only if it is small enough to be one of
+        Challonge's own JSON errors.
+
+        :param method: The HTTP method of the request.
+        :param url: The full URL of the request.
+        :param status_code: The HTTP status code of the response.
+        :param body: The raw body of the response.
+        :param headers: The headers of the response.
+        :param elapsed: The number of seconds the request took, retries included.
+        :param attempts: How many times the request was sent.
+        """
 
+        if status_code == 200:
+            return
+
+        raise response_error(method, url, status_code, body, headers, elapsed, attempts)
+
+
+@traced
 class TournamentAPI:
 
-    def __init__(self, http_methods):
+    # the default start of iter_all's date range (Challonge launched in 2009)
+    FIRST_CREATED_AFTER = "2009-01-01"
+
+    _FETCH = object()  # returned by _known_participant_count when the participant count has to be fetched
+
+    def __init__(self, http_methods, archive: TournamentArchive = None):
+        """
+        :param http_methods: A ChallongeApiHttpMethods instance.
+        :param archive: An optional TournamentArchive that get_snapshot reads finalized tournaments from.
+        """
+
         self.http = http_methods
+        self.archive = archive
         self.participant_api = ParticipantAPI(self.http)  # special case for a built-in sanity check
 
     def get_all(self, state: str = None, tournament_type: str = None, created_after: str = None,
@@ -183,12 +603,71 @@ class TournamentAPI:
             "created_before": created_before
         }
 
-        response = self.http.get("tournaments.json", params=params)
-
-        tournaments = [t["tournament"] for t in response]
+        tournaments = self.http.get("tournaments.json", params=params, envelope="tournament")
 
         return tournaments
 
+    def iter_all(self, state: str = None, tournament_type: str = None, created_after: str = None,
+                 created_before: str = None, window_days: int = 30, max_workers: int = 4):
+        """
+        Retrieve the tournaments created with your account as a stream. The query is split into windows of
+        ``window_days`` days by creation date, several of which are fetched at once; tournaments are yielded window
+        by window (oldest first) as soon as each window arrives. At most ``max_workers`` windows are held in memory,
+        and stopping the iteration early cancels the windows that were not requested yet.
+
+        :param state: all, pending, in_progress, ended
+        :param tournament_type: single_elimination, double_elimination, round_robin, swiss
+        :param created_after: A YYYY-MM-DD string; defaults to FIRST_CREATED_AFTER.
+        :param created_before: A YYYY-MM-DD string; defaults to tomorrow.
+        :param window_days: The number of days covered by each request.
+        :param max_workers: The maximum number of windows fetched at once.
+        """
+
+        windows = self._date_windows(created_after, created_before, window_days)
+
+        def fetch(window):
+            return self.get_all(state, tournament_type, created_after=window[0], created_before=window[1])
+
+        previous = set()
+
+        for tournaments in prefetch(windows, fetch, max_workers=max_workers):
+            current = set()
+
+            for tournament in tournaments:
+                tournament_id = tournament["id"]
+                current.add(tournament_id)
+
+                # a tournament created on the day two windows share may be reported by both of them
+                if tournament_id not in previous:
+                    yield tournament
+
+            previous = current
+
+    @classmethod
+    def _date_windows(cls, created_after: str = None, created_before: str = None, window_days: int = 30) -> list:
+        """
+        Splits a creation date range into consecutive (created_after, created_before) windows of ``window_days`` days.
+        """
+
+        if window_days < 1:
+            raise ChallongeAPIException("ERROR: window_days must be at least 1.")
+
+        start = datetime.strptime(created_after or cls.FIRST_CREATED_AFTER, "%Y-%m-%d").date()
+
+        if created_before:
+            end = datetime.strptime(created_before, "%Y-%m-%d").date()
+        else:
+            end = datetime.now().date() + timedelta(days=1)
+
+        windows = []
+
+        while start < end:
+            stop = min(start + timedelta(days=window_days), end)
+            windows.append((start.isoformat(), stop.isoformat()))
+            start = stop
+
+        return windows
+
     def create(self, name: str = None, tournament_type: str = None, url: str = None, subdomain: str = None,
                description: str = None, open_signup: bool = None, hold_third_place_match: bool = None,
                pts_for_match_win: float = None, pts_for_match_tie: float = None,
@@ -289,9 +768,18 @@ class TournamentAPI:
             "tournament[prediction_method]": prediction_method,
         }
 
-        response = self.http.post("tournaments.json", params)
+        # a tournament can only be told apart from its namesakes by its URL, so only then is it safe to retry
+        if url:
+            created_after = (datetime.now(tz=self.http.timezone) - timedelta(days=1)).strftime("%Y-%m-%d")
 
-        tournament = response["tournament"]
+            verify = VerifyBeforeRetry(
+                lambda: self.get_all(created_after=created_after),
+                lambda t: t["url"] == url
+            )
+        else:
+            verify = None
+
+        tournament = self.http.post("tournaments.json", params, envelope="tournament", verify=verify)
 
         return tournament
 
@@ -314,9 +802,7 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.get(f"tournaments/{tournament_id}.json", params=params)
-
-        tournament = response["tournament"]
+        tournament = self.http.get(f"tournaments/{tournament_id}.json", params=params, envelope="tournament")
 
         return tournament
 
@@ -422,9 +908,14 @@ class TournamentAPI:
             "tournament[prediction_method]": prediction_method,
         }
 
-        response = self.http.put(f"tournaments/{tournament_id}.json", params=params)
+        return self._send_update(tournament_id, params)
+
+    def _send_update(self, tournament_id: str, params: dict):
+        # sends the request built by update(); AsyncTournamentAPI awaits it before touching the archive
+        tournament = self.http.put(f"tournaments/{tournament_id}.json", params=params, envelope="tournament")
 
-        tournament = response["tournament"]
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
 
         return tournament
 
@@ -435,9 +926,100 @@ class TournamentAPI:
         :param tournament_id: A tournament ID.
         """
 
-        response = self.http.delete(f"tournaments/{tournament_id}.json")
+        tournament = self.http.delete(f"tournaments/{tournament_id}.json", envelope="tournament")
+
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
+
+        return tournament
+
+    def delete_all(self, state: str = None, tournament_type: str = None, name: str = None, created_after: str = None,
+                   created_before: str = None, max_workers: int = 8, window_days: int = None, progress=None,
+                   dry_run: bool = False) -> List[BulkResult]:
+        """
+        Deletes every tournament in your account that matches the given filters (all of them, if none are given),
+        e.g. to clean up stale test brackets. There is no undo, so use with care!
+
+        Tournaments are deleted while the list is still being read, on up to ``max_workers`` threads (still paced by
+        the rate limiter, if one is configured). A failed deletion does not abort the others.
 
-        tournament = response["tournament"]
+        :param state: all, pending, in_progress, ended
+        :param tournament_type: single_elimination, double_elimination, round_robin, swiss
+        :param name: Only delete tournaments whose name matches this shell-style pattern (e.g. "chyllonge-temp*"), or
+               this compiled regular expression.
+        :param created_after: A YYYY-MM-DD string.
+        :param created_before: A YYYY-MM-DD string.
+        :param max_workers: The maximum number of deletions in flight at once.
+        :param window_days: If given, the tournament list is streamed in date windows of this many days (see
+               iter_all) instead of being fetched in a single request.
+        :param progress: An optional callable, invoked with the number of tournaments processed and the number of
+               failures so far after each deletion.
+        :param dry_run: If True, nothing is deleted; the matching tournaments are returned as skipped results.
+        :return: A list of BulkResult, one per matching tournament, whose ``item`` is the tournament record.
+        """
+
+        if window_days is None:
+            tournaments = self.get_all(state, tournament_type, created_after, created_before)
+        else:
+            tournaments = self.iter_all(state, tournament_type, created_after, created_before, window_days)
+
+        matches_name = self._name_matcher(name)
+        candidates = (t for t in tournaments if matches_name(t.get("name")))
+
+        def delete(tournament):
+            if dry_run:
+                return BulkResult(tournament, result=tournament, skipped=True)
+
+            try:
+                return BulkResult(tournament, result=self.delete(tournament["id"]))
+            except Exception as e:
+                return BulkResult(tournament, error=e)
+
+        results = []
+        failed = 0
+
+        for result in prefetch(candidates, delete, max_workers=max_workers):
+            results.append(result)
+            failed += not result.ok
+
+            if progress is not None:
+                progress(len(results), failed)
+
+        return results
+
+    @staticmethod
+    def _name_matcher(name):
+        """
+        Returns a predicate for tournament names matching a shell-style pattern or a compiled regular expression.
+        """
+
+        if name is None:
+            return lambda value: True
+
+        if isinstance(name, str):
+            return lambda value: value is not None and fnmatch.fnmatchcase(value, name)
+
+        return lambda value: value is not None and name.search(value) is not None
+
+    def get_snapshot(self, tournament_id: str):
+        """
+        Retrieve a tournament record with all of its participants and matches, exactly as get() does with
+        include_participants=1 and include_matches=1. If an archive is configured, finalized tournaments are
+        stored in it and subsequently served from disk, without any network I/O.
+
+        :param tournament_id: Tournament ID (e.g. 10230) or URL (e.g. 'single_elim' for challonge.com/single_elim).
+        """
+
+        if self.archive is not None:
+            snapshot = self.archive.get(tournament_id)
+
+            if snapshot is not None:
+                return to_models(snapshot, "tournament") if self.http.models else snapshot
+
+        tournament = self.get(tournament_id, include_participants=1, include_matches=1)
+
+        if self.archive is not None:
+            self.archive.put(tournament)
 
         return tournament
 
@@ -464,9 +1046,9 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/process_check_ins.json", params)
-
-        tournament = response["tournament"]
+        tournament = self.http.post(
+            f"tournaments/{tournament_id}/process_check_ins.json", params, envelope="tournament"
+        )
 
         return tournament
 
@@ -491,16 +1073,15 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/abort_check_in.json", params)
-
-        tournament = response["tournament"]
+        tournament = self.http.post(f"tournaments/{tournament_id}/abort_check_in.json", params, envelope="tournament")
 
         return tournament
 
     def start(self, tournament_id: str, include_participants: int = None, include_matches: int = None):
         """
         Start a tournament, opening up first round matches for score reporting. The tournament must have at least
-        2 participants.
+        2 participants; how that is checked beforehand depends on the validation policy of the HTTP methods (see
+        chyllonge.validation), but a tournament with too few raises a ChallongeValidationException either way.
 
         :param tournament_id: Tournament ID (e.g. 10230) or URL (e.g. 'single_elim' for challonge.com/single_elim).
         If assigned to a subdomain, URL format must be :subdomain-:tournament_url (e.g. 'test-mytourney'
@@ -514,16 +1095,61 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        participants = self.participant_api.get_all(tournament_id)
+        participant_count = self._known_participant_count(tournament_id)
 
-        if len(participants) <= 1:
-            raise ChallongeAPIException("ERROR: A tournament needs at least two participants in order to start.")
-        else:
-            response = self.http.post(f"tournaments/{tournament_id}/start.json", params)
+        if participant_count is self._FETCH:
+            participant_count = len(self.participant_api.get_all(tournament_id))
+
+        self._check_participant_count(tournament_id, participant_count)
 
-            tournament = response["tournament"]
+        try:
+            tournament = self.http.post(f"tournaments/{tournament_id}/start.json", params, envelope="tournament")
+        except ChallongeValidationException as e:
+            raise self._server_validation_error(tournament_id, e)
 
-            return tournament
+        return tournament
+
+    def _known_participant_count(self, tournament_id: str):
+        """
+        Returns the participant count the start check should use according to the validation policy: _FETCH if it
+        must be fetched, or None if the check is left to the server.
+        """
+
+        policy = getattr(self.http, "validation_policy", None)
+        mode = policy.mode_for(MIN_PARTICIPANTS) if policy is not None else None
+
+        if mode == SERVER:
+            return None
+
+        if mode == CACHED:
+            count = policy.participant_count(tournament_id)
+
+            if count is not None:
+                return count
+
+        return self._FETCH
+
+    @staticmethod
+    def _check_participant_count(tournament_id: str, participant_count: int = None):
+        if participant_count is not None and participant_count <= 1:
+            raise ChallongeValidationException(
+                "ERROR: A tournament needs at least two participants in order to start.", check=MIN_PARTICIPANTS,
+                tournament_id=tournament_id
+            )
+
+    @staticmethod
+    def _server_validation_error(tournament_id: str,
+                                 error: ChallongeValidationException) -> ChallongeValidationException:
+        """
+        Marks Challonge's own rejection of a start request (422) for too few participants with the check the local
+        pre-flight check reports, so callers handle both alike whatever the validation policy. Any other error is
+        returned unchanged.
+        """
+
+        if error.check is None and error.server_side and "participant" in str(error).lower():
+            error.check, error.tournament_id = MIN_PARTICIPANTS, tournament_id
+
+        return error
 
     def finalize(self, tournament_id: str, include_participants: int = None, include_matches: int = None):
         """
@@ -541,9 +1167,7 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/finalize.json", params)
-
-        tournament = response["tournament"]
+        tournament = self.http.post(f"tournaments/{tournament_id}/finalize.json", params, envelope="tournament")
 
         return tournament
 
@@ -564,9 +1188,10 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/reset.json", params)
+        tournament = self.http.post(f"tournaments/{tournament_id}/reset.json", params, envelope="tournament")
 
-        tournament = response["tournament"]
+        if self.archive is not None:
+            self.archive.remove(tournament_id)
 
         return tournament
 
@@ -591,13 +1216,14 @@ class TournamentAPI:
             "include_matches": include_matches
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/open_for_predictions.json", params)
-
-        tournament = response["tournament"]
+        tournament = self.http.post(
+            f"tournaments/{tournament_id}/open_for_predictions.json", params, envelope="tournament"
+        )
 
         return tournament
 
 
+@traced
 class ParticipantAPI:
 
     def __init__(self, http_methods):
@@ -608,9 +1234,7 @@ class ParticipantAPI:
         Retrieve a tournament's participant list.
         """
 
-        response = self.http.get(f"tournaments/{tournament_id}/participants.json")
-
-        participants = [p["participant"] for p in response]
+        participants = self.http.get(f"tournaments/{tournament_id}/participants.json", envelope="participant")
 
         return participants
 
@@ -628,9 +1252,18 @@ class ParticipantAPI:
             "participant[misc]": misc,
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/participants.json", params)
+        # participant names are unique within a tournament, so a lookup can tell whether a failed add went through
+        if name or challonge_username:
+            verify = VerifyBeforeRetry(
+                lambda: self.get_all(tournament_id),
+                lambda p: p["name"] == name if name else p["challonge_username"] == challonge_username
+            )
+        else:
+            verify = None
 
-        participant = response["participant"]
+        participant = self.http.post(
+            f"tournaments/{tournament_id}/participants.json", params, envelope="participant", verify=verify
+        )
 
         return participant
 
@@ -653,12 +1286,103 @@ class ParticipantAPI:
             "participants[][misc]": miscs,
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/participants/bulk_add.json", params)
-
-        participants = [p["participant"] for p in response]
+        participants = self.http.post(
+            f"tournaments/{tournament_id}/participants/bulk_add.json", params, envelope="participant"
+        )
 
         return participants
 
+    def import_participants(self, tournament_id: str, rows, chunk_size: int = 100, max_workers: int = 4,
+                            skip_existing: bool = False):
+        """
+        Streams a (possibly very large) roster into a tournament, in chunks of ``chunk_size`` participants per
+        bulk_add request, with up to ``max_workers`` chunks in flight at once. ``rows`` is consumed lazily, so it may be
+        a generator or a csv.DictReader of any length.
+
+        Challonge rolls back a whole chunk if any of its rows is invalid; such chunks are split in halves until the
+        invalid rows are isolated, so only those rows fail. Chunks containing a seed are sent on their own, after every
+        earlier chunk, since seeding shifts the participants around them; the order in which unseeded chunks are
+        appended is not guaranteed.
+
+        :param tournament_id: A tournament ID.
+        :param rows: An iterable of participant names, or of dicts with (some of) the keys "name",
+               "invite_name_or_email", "seed" and "misc"; other keys are ignored.
+        :param chunk_size: The number of participants sent per request.
+        :param max_workers: The maximum number of requests in flight at once.
+        :param skip_existing: If True, the participant list is fetched once up-front, and rows whose name is already
+               registered are skipped. This makes it safe to re-run an interrupted import.
+        :return: A generator of BulkResult, one per row, in the same order as ``rows``; each result holds the created
+                 participant.
+        """
+
+        existing = {p["name"]: p for p in self.get_all(tournament_id)} if skip_existing else {}
+
+        def add_chunk(chunk):
+            pending = [row for row in chunk if self._row_name(row) not in existing]
+
+            if pending:
+                added = self.http.post(
+                    f"tournaments/{tournament_id}/participants/bulk_add.json", self._bulk_add_params(pending),
+                    envelope="participant"
+                )
+            else:
+                added = []
+
+            return self._merge_existing(chunk, existing, added)
+
+        return run_batches(rows, add_chunk, chunk_size, max_workers, is_barrier=self._is_seeded)
+
+    @staticmethod
+    def _row_name(row):
+        return row if isinstance(row, str) else row.get("name")
+
+    @staticmethod
+    def _is_seeded(row) -> bool:
+        return not isinstance(row, str) and row.get("seed") not in (None, "")
+
+    @staticmethod
+    def _bulk_add_params(rows: list) -> list:
+        """
+        Encodes rows as bulk_add parameters. These have to be sent row by row, as ordered pairs: the server starts a
+        new participant whenever a key repeats, which is also why every row leads with its (possibly empty) name.
+        """
+
+        params = []
+
+        for row in rows:
+            if isinstance(row, str):
+                row = {"name": row}
+
+            params.append(("participants[][name]", row.get("name") or ""))
+
+            for field in ("invite_name_or_email", "seed", "misc"):
+                if row.get(field) not in (None, ""):
+                    params.append((f"participants[][{field}]", row[field]))
+
+        return params
+
+    def _merge_existing(self, chunk: list, existing: dict, added: list) -> list:
+        """
+        Interleaves the participants a bulk_add request created with the ones that were already registered. If
+        Challonge returned fewer participants than rows were sent, the rows left without one fail.
+        """
+
+        pending = sum(self._row_name(row) not in existing for row in chunk)
+        missing = ChallongeAPIException(
+            f"ERROR: bulk_add returned {len(added)} participants for {pending} rows; this row was not matched to one."
+        ) if len(added) < pending else None
+        added = iter(added)
+        results = []
+
+        for row in chunk:
+            if self._row_name(row) in existing:
+                results.append(BulkResult(row, result=existing[self._row_name(row)], skipped=True))
+            else:
+                participant = next(added, None)
+                results.append(participant if participant is not None else BulkResult(row, error=missing))
+
+        return results
+
     def get(self, tournament_id: str, participant_id: int = None, include_matches: bool = False):
         """
         Retrieve a single participant record for a tournament.
@@ -666,9 +1390,9 @@ class ParticipantAPI:
 
         params = {"include_matches": include_matches}
 
-        response = self.http.get(f"tournaments/{tournament_id}/participants/{participant_id}.json", params)
-
-        participant = response["participant"]
+        participant = self.http.get(
+            f"tournaments/{tournament_id}/participants/{participant_id}.json", params, envelope="participant"
+        )
 
         return participant
 
@@ -687,9 +1411,9 @@ class ParticipantAPI:
             "participant[misc]": misc,
         }
 
-        response = self.http.put(f"tournaments/{tournament_id}/participants/{participant_id}.json", params)
-
-        participant = response["participant"]
+        participant = self.http.put(
+            f"tournaments/{tournament_id}/participants/{participant_id}.json", params, envelope="participant"
+        )
 
         return participant
 
@@ -698,9 +1422,9 @@ class ParticipantAPI:
         Checks a participant in, setting checked_in_at to the current time.
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/participants/{participant_id}/check_in.json")
-
-        participant = response["participant"]
+        participant = self.http.post(
+            f"tournaments/{tournament_id}/participants/{participant_id}/check_in.json", envelope="participant"
+        )
 
         return participant
 
@@ -709,12 +1433,100 @@ class ParticipantAPI:
         Marks a participant as having not checked in, setting checked_in_at to nil - also called 'undo_check_in'.
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/participants/{participant_id}/undo_check_in.json")
-
-        participant = response["participant"]
+        participant = self.http.post(
+            f"tournaments/{tournament_id}/participants/{participant_id}/undo_check_in.json", envelope="participant"
+        )
 
         return participant
 
+    def check_in_many(self, tournament_id: str, participant_ids, max_workers: int = 8, participants: List[dict] = None):
+        """
+        Checks many participants in at once, on up to ``max_workers`` threads. Duplicate IDs are only checked in
+        once, and participants who are already checked in are skipped without a request.
+
+        :param tournament_id: A tournament ID.
+        :param participant_ids: An iterable of participant IDs.
+        :param max_workers: The maximum number of check-ins in flight at once.
+        :param participants: The tournament's current participant list, used to find out who is already checked in.
+               If omitted, it is fetched once.
+        :return: A list of BulkResult, one per distinct participant ID, in the order they were given.
+        """
+
+        return self._set_checked_in_many(tournament_id, participant_ids, True, max_workers, participants)
+
+    def check_out_many(self, tournament_id: str, participant_ids, max_workers: int = 8,
+                       participants: List[dict] = None):
+        """
+        Checks many participants out at once; see check_in_many. Participants who are not checked in are skipped.
+        """
+
+        return self._set_checked_in_many(tournament_id, participant_ids, False, max_workers, participants)
+
+    def _set_checked_in_many(self, tournament_id: str, participant_ids, checked_in: bool, max_workers: int,
+                             participants: List[dict]):
+        participant_ids = self._distinct(participant_ids)
+
+        if not participant_ids:
+            return []
+
+        if participants is None:
+            participants = self.get_all(tournament_id)
+
+        results, pending = self._plan_check_ins(participant_ids, participants, checked_in)
+        method = self.check_in if checked_in else self.check_out
+
+        done = run_concurrently(
+            [participant_ids[i] for i in pending], lambda p: method(tournament_id, p), max_workers=max_workers
+        )
+
+        for index, result in zip(pending, done):
+            results[index] = result
+
+        return results
+
+    @staticmethod
+    def _distinct(participant_ids) -> list:
+        """
+        Returns the participant IDs with duplicates (e.g. 5 and "5") removed, keeping the first occurrence of each.
+        """
+
+        seen = set()
+        distinct = []
+
+        for participant_id in participant_ids:
+            if str(participant_id) not in seen:
+                seen.add(str(participant_id))
+                distinct.append(participant_id)
+
+        return distinct
+
+    @staticmethod
+    def _plan_check_ins(participant_ids: list, participants: List[dict], checked_in: bool):
+        """
+        Works out which participants actually need to be checked in (or out).
+
+        :return: A (results, pending) tuple: a list holding a BulkResult for every participant that needs no request
+                 (and None for the others), and the indices of the participants that do.
+        """
+
+        records = {str(p["id"]): p for p in participants}
+        results = [None] * len(participant_ids)
+        pending = []
+
+        for index, participant_id in enumerate(participant_ids):
+            record = records.get(str(participant_id))
+
+            if record is None:
+                results[index] = BulkResult(participant_id, error=ChallongeAPIException(
+                    f"ERROR: Participant {participant_id} is not registered in this tournament."
+                ))
+            elif bool(record.get("checked_in")) == checked_in:
+                results[index] = BulkResult(participant_id, result=record, skipped=True)
+            else:
+                pending.append(index)
+
+        return results, pending
+
     def remove(self, tournament_id: str, participant_id: str):
         """
         If the tournament has not started, delete a participant, automatically filling in the abandoned seed
@@ -722,9 +1534,9 @@ class ParticipantAPI:
         remaining matches.
         """
 
-        response = self.http.delete(f"tournaments/{tournament_id}/participants/{participant_id}.json")
-
-        participant = response["participant"]
+        participant = self.http.delete(
+            f"tournaments/{tournament_id}/participants/{participant_id}.json", envelope="participant"
+        )
 
         return participant
 
@@ -733,22 +1545,23 @@ class ParticipantAPI:
         Deletes all participants in a tournament. (Only allowed if tournament hasn't started yet)
         """
 
-        response = self.http.delete(f"tournaments/{tournament_id}/participants/clear.json")
+        message = self.http.delete(f"tournaments/{tournament_id}/participants/clear.json", envelope="message")
 
-        return response["message"]  # "Cleared all participants"
+        return message  # "Cleared all participants"
 
     def randomize(self, tournament_id: str):
         """
         Randomize seeds among participants. Only applicable before a tournament has started.
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/participants/randomize.json")
-
-        participants = [p["participant"] for p in response]
+        participants = self.http.post(
+            f"tournaments/{tournament_id}/participants/randomize.json", envelope="participant"
+        )
 
         return participants
 
 
+@traced
 class MatchAPI:
 
     def __init__(self, http_methods):
@@ -760,9 +1573,7 @@ class MatchAPI:
         """
 
         params = {"state": state, "participant_id": participant_id}
-        response = self.http.get(f"tournaments/{tournament_id}/matches.json", params)
-
-        matches = [m["match"] for m in response]
+        matches = self.http.get(f"tournaments/{tournament_id}/matches.json", params, envelope="match")
 
         return matches
 
@@ -772,9 +1583,7 @@ class MatchAPI:
         """
 
         params = {"include_attachments": include_attachments}
-        response = self.http.get(f"tournaments/{tournament_id}/matches/{match_id}.json", params)
-
-        match = response["match"]
+        match = self.http.get(f"tournaments/{tournament_id}/matches/{match_id}.json", params, envelope="match")
 
         return match
 
@@ -801,9 +1610,7 @@ class MatchAPI:
             "match[player2_votes]": match_player2_votes
         }
 
-        response = self.http.put(f"tournaments/{tournament_id}/matches/{match_id}.json", params)
-
-        match = response["match"]
+        match = self.http.put(f"tournaments/{tournament_id}/matches/{match_id}.json", params, envelope="match")
 
         return match
 
@@ -812,9 +1619,7 @@ class MatchAPI:
         Reopens a match that was marked completed, automatically resetting matches that follow it.
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/matches/{match_id}/reopen.json")
-
-        match = response["match"]
+        match = self.http.post(f"tournaments/{tournament_id}/matches/{match_id}/reopen.json", envelope="match")
 
         return match
 
@@ -823,9 +1628,9 @@ class MatchAPI:
         Sets "underway_at" to the current time and highlights the match in the bracket
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/matches/{match_id}/mark_as_underway.json")
-
-        match = response["match"]
+        match = self.http.post(
+            f"tournaments/{tournament_id}/matches/{match_id}/mark_as_underway.json", envelope="match"
+        )
 
         return match
 
@@ -834,13 +1639,88 @@ class MatchAPI:
         Clears "underway_at" and unhighlights the match in the bracket
         """
 
-        response = self.http.post(f"tournaments/{tournament_id}/matches/{match_id}/unmark_as_underway.json")
-
-        match = response["match"]
+        match = self.http.post(
+            f"tournaments/{tournament_id}/matches/{match_id}/unmark_as_underway.json", envelope="match"
+        )
 
         return match
 
+    def update_many(self, tournament_id: str, updates, max_workers: int = 8, matches: List[dict] = None):
+        """
+        Submit many match results at once, e.g. at the end of a round. Updates run concurrently on up to
+        ``max_workers`` threads (still paced by the rate limiter, if one is configured), but an update only starts
+        once every update to a match it depends on (a match that feeds into it, directly or further up the bracket)
+        has gone through. Several updates of the same match are applied in the given order.
+
+        A failed update does not abort the others; instead, every update's outcome is returned. Updates that depend on
+        a failed update are skipped.
+
+        :param tournament_id: A tournament ID.
+        :param updates: An iterable of (match_id, scores_csv, winner_id) tuples; see update().
+        :param max_workers: The maximum number of updates in flight at once.
+        :param matches: The tournament's current match list, used to find dependent matches. If omitted, it is
+               fetched once.
+        :return: A list of BulkResult, in the same order as ``updates``; each result holds the updated match.
+        """
+
+        updates = list(updates)
+
+        if not updates:
+            return []
+
+        if matches is None:
+            matches = self.get_all(tournament_id)
+
+        chains, dependencies = self._chain_updates(updates, matches)
+
+        return run_chains(
+            updates,
+            chains,
+            dependencies,
+            lambda u: self.update(tournament_id, u[0], match_scores_csv=u[1], match_winner_id=u[2]),
+            max_workers=max_workers
+        )
+
+    @staticmethod
+    def _chain_updates(updates: list, matches: List[dict]):
+        """
+        Groups match updates into per-match chains, and works out which chains depend on which: a match depends on
+        every match that (transitively) feeds a player into it.
+
+        :param updates: A list of (match_id, scores_csv, winner_id) tuples.
+        :param matches: The tournament's match list.
+        :return: A (chains, dependencies) tuple, as expected by run_chains.
+        """
+
+        chains = {}
+
+        for index, update in enumerate(updates):
+            chains.setdefault(str(update[0]), []).append(index)
+
+        prerequisites = {
+            str(m["id"]): [str(p) for p in (m.get("player1_prereq_match_id"), m.get("player2_prereq_match_id")) if p]
+            for m in matches
+        }
+
+        dependencies = {}
+
+        for match_id in chains:
+            seen = set()
+            stack = list(prerequisites.get(match_id, ()))
+
+            while stack:
+                prerequisite = stack.pop()
+
+                if prerequisite not in seen:
+                    seen.add(prerequisite)
+                    stack.extend(prerequisites.get(prerequisite, ()))
+
+            dependencies[match_id] = {p for p in seen if p in chains and p != match_id}
+
+        return chains, dependencies
 
+
+@traced
 class AttachmentAPI:
 
     def __init__(self, http_methods):
@@ -851,9 +1731,9 @@ class AttachmentAPI:
         Retrieve a set of attachments created for a specific match.
         """
 
-        response = self.http.get(f"tournaments/{tournament_id}/matches/{match_id}/attachments.json")
-
-        match_attachments = [ma["match_attachment"] for ma in response]
+        match_attachments = self.http.get(
+            f"tournaments/{tournament_id}/matches/{match_id}/attachments.json", envelope="match_attachment"
+        )
 
         return match_attachments
 
@@ -877,9 +1757,21 @@ class AttachmentAPI:
             "match_attachment[description]": match_attachment_description
         }
 
-        response = self.http.post(f"tournaments/{tournament_id}/matches/{match_id}/attachments.json", params)
+        # uploaded files can't be recognized afterward, but URL and text attachments can
+        if match_attachment_asset is None and (match_attachment_url or match_attachment_description):
+            verify = VerifyBeforeRetry(
+                lambda: self.get_all(tournament_id, match_id),
+                lambda a: a["url"] == match_attachment_url and a["description"] == match_attachment_description
+            )
+        else:
+            verify = None
 
-        match_attachment = response["match_attachment"]
+        match_attachment = self.http.post(
+            f"tournaments/{tournament_id}/matches/{match_id}/attachments.json",
+            params,
+            envelope="match_attachment",
+            verify=verify
+        )
 
         return match_attachment
 
@@ -888,9 +1780,10 @@ class AttachmentAPI:
         Retrieve a single match attachment record.
         """
 
-        response = self.http.get(f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json")
-
-        match_attachment = response["match_attachment"]
+        match_attachment = self.http.get(
+            f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json",
+            envelope="match_attachment"
+        )
 
         return match_attachment
 
@@ -917,12 +1810,12 @@ class AttachmentAPI:
             "match_attachment[description]": match_attachment_description
         }
 
-        response = self.http.put(
-            f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json", params
+        match_attachment = self.http.put(
+            f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json",
+            params,
+            envelope="match_attachment"
         )
 
-        match_attachment = response["match_attachment"]
-
         return match_attachment
 
     def delete(self, tournament_id: str, match_id: str = None, attachment_id: str = None):
@@ -930,9 +1823,10 @@ class AttachmentAPI:
         Delete a match attachment.
         """
 
-        response = self.http.delete(f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json")
-
-        match_attachment = response["match_attachment"]
+        match_attachment = self.http.delete(
+            f"tournaments/{tournament_id}/matches/{match_id}/attachments/{attachment_id}.json",
+            envelope="match_attachment"
+        )
 
         return match_attachment
 
@@ -0,0 +1,157 @@
+import json
+import time
+import zlib
+import threading
+
+# only finalized tournaments are archived; anything else may still change
+FINAL_STATES = ("complete",)
+
+
+class TournamentArchive:
+    """
+    A persistent, SQLite-backed store of full tournament snapshots (the tournament record, with its participants and
+    matches), keyed by tournament ID and URL. Finalized tournaments never change, so once archived they can be read
+    back any number of times without network I/O.
+
+    Snapshots are stored as compressed JSON. One archive may be shared between threads; SQLite's write-ahead log
+    lets several processes read the same file concurrently.
+    """
+
+    def __init__(self, path: str = "chyllonge-archive.sqlite3"):
+        """
+        :param path: The path of the SQLite database file; it is created if it does not exist. Use ":memory:" for a
+               throwaway archive.
+        """
+
+        import sqlite3
+
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS tournaments ("
+                "id INTEGER PRIMARY KEY, url TEXT, state TEXT, archived_at REAL, snapshot BLOB)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS tournaments_url ON tournaments (url)")
+
+    @staticmethod
+    def is_final(tournament: dict) -> bool:
+        """
+        Returns True if a tournament record is in a state that can no longer change.
+
+        :param tournament: A tournament record.
+        """
+
+        return tournament.get("state") in FINAL_STATES
+
+    def get(self, tournament_id):
+        """
+        Returns an archived snapshot, or None if the tournament has not been archived.
+
+        :param tournament_id: A tournament ID or URL.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT snapshot FROM tournaments WHERE {self._where(tournament_id)}", (self._key(tournament_id),)
+            ).fetchone()
+
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    @staticmethod
+    def _where(tournament_id):
+        return "id = ?" if str(tournament_id).isdigit() else "url = ?"
+
+    @staticmethod
+    def _key(tournament_id):
+        return int(tournament_id) if str(tournament_id).isdigit() else str(tournament_id)
+
+    def put(self, tournament: dict) -> bool:
+        """
+        Archives a snapshot if the tournament is finalized. Returns True if it was archived.
+
+        :param tournament: A tournament record (or Tournament model), as returned by TournamentAPI.get with
+               include_participants=1 and include_matches=1.
+        """
+
+        if not self.is_final(tournament):
+            return False
+
+        # typed models (see chyllonge.models) are stored as the raw records they came from
+        if hasattr(tournament, "to_dict"):
+            tournament = tournament.to_dict()
+
+        snapshot = zlib.compress(json.dumps(tournament, separators=(",", ":")).encode("utf-8"))
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO tournaments (id, url, state, archived_at, snapshot) VALUES (?, ?, ?, ?, ?)",
+                (int(tournament["id"]), tournament.get("url"), tournament.get("state"), time.time(), snapshot)
+            )
+
+        return True
+
+    def remove(self, tournament_id):
+        """
+        Removes a tournament from the archive (e.g. because it was reset or deleted).
+
+        :param tournament_id: A tournament ID or URL.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"DELETE FROM tournaments WHERE {self._where(tournament_id)}", (self._key(tournament_id),)
+            )
+
+    def ids(self):
+        """
+        Returns the IDs of every archived tournament.
+        """
+
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT id FROM tournaments ORDER BY id")]
+
+    def snapshots(self, batch_size: int = 100):
+        """
+        Yields every archived snapshot, reading them from disk in batches so memory use stays flat.
+
+        :param batch_size: The number of snapshots read per query.
+        """
+
+        last_id = -1
+
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, snapshot FROM tournaments WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+
+            if not rows:
+                return
+
+            for last_id, snapshot in rows:
+                yield json.loads(zlib.decompress(snapshot))
+
+    def __contains__(self, tournament_id):
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT 1 FROM tournaments WHERE {self._where(tournament_id)}", (self._key(tournament_id),)
+            ).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
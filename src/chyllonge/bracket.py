@@ -0,0 +1,224 @@
+import time
+import threading
+
+from .exceptions import ChallongeAPIException
+
+# the fields a local prediction can get wrong, and that reconcile() compares against the server's records
+_PREDICTED_FIELDS = ("state", "player1_id", "player2_id", "winner_id", "loser_id")
+
+
+def normalize_tournament_type(tournament_type: str = None) -> str:
+    """
+    Returns a tournament type as Challonge reports it (e.g. "double elimination" -> "double_elimination").
+
+    :param tournament_type: A tournament type, as accepted by TournamentAPI.create; defaults to single elimination.
+    """
+
+    return (tournament_type or "single elimination").strip().lower().replace(" ", "_")
+
+
+def _same(a, b) -> bool:
+    # the API reports IDs as integers, but callers may pass them as strings
+    return str(a) == str(b) if a is not None and b is not None else a is b
+
+
+class Bracket:
+    """
+    An in-memory model of a tournament's match graph, which predicts how results propagate through it. Reporting a
+    result advances the winner (and, in double elimination, the loser) into the matches it feeds, and opens those
+    matches once both of their players are known - in constant time, without a round trip to the server.
+
+    Some outcomes are decided by Challonge alone: the pairings of the next Swiss round, a double elimination grand
+    finals reset, and corrections to results that were already built upon. When the bracket runs into one of these,
+    it sets ``needs_reconcile``. Reconciling (with the server's match list) replaces the local state; ``due`` tells
+    when that should happen, so that list calls only happen every ``reconcile_interval`` seconds (or when needed).
+    """
+
+    def __init__(self, matches: list, tournament_type: str = None, reconcile_interval: float = 60.0,
+                 clock=time.monotonic):
+        """
+        :param matches: The tournament's match list, as returned by MatchAPI.get_all.
+        :param tournament_type: The tournament's type: single elimination (default), double elimination, round robin
+               or swiss.
+        :param reconcile_interval: The number of seconds after which the local state is considered stale.
+        :param clock: A monotonic clock, in seconds.
+        """
+
+        self.tournament_type = normalize_tournament_type(tournament_type)
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+
+        self.needs_reconcile = False
+        self.reconciled_at = None
+
+        self._lock = threading.Lock()
+        self._load(matches)
+
+    def _load(self, matches: list):
+        self._matches = {}  # match ID -> match record (a private copy, which is updated in place)
+        self._feeds = {}  # match ID -> [(ID of the match it feeds, "player1" or "player2", feeds its loser?)]
+        self._remaining = {}  # round -> number of matches in that round that are not complete
+
+        for match in matches:
+            match = dict(match)
+            match_id = str(match["id"])
+
+            self._matches[match_id] = match
+
+            if match.get("state") != "complete":
+                self._remaining[match.get("round")] = self._remaining.get(match.get("round"), 0) + 1
+
+            for slot in ("player1", "player2"):
+                prerequisite = match.get(f"{slot}_prereq_match_id")
+
+                if prerequisite:
+                    self._feeds.setdefault(str(prerequisite), []).append(
+                        (match_id, slot, bool(match.get(f"{slot}_is_prereq_match_loser")))
+                    )
+
+        self.needs_reconcile = False
+        self.reconciled_at = self.clock()
+
+    @property
+    def due(self) -> bool:
+        """
+        True if the local state should be reconciled with the server: either the bracket ran into an outcome it
+        cannot predict, or ``reconcile_interval`` seconds have passed since the last reconciliation.
+        """
+
+        return self.needs_reconcile or self.clock() - self.reconciled_at >= self.reconcile_interval
+
+    def match(self, match_id) -> dict:
+        """
+        Returns (a copy of) the local record of a match.
+
+        :param match_id: A match ID.
+        """
+
+        with self._lock:
+            return dict(self._get(match_id))
+
+    def matches(self, state: str = None) -> list:
+        """
+        Returns (copies of) the local match records.
+
+        :param state: Only return matches in this state: "pending", "open" or "complete".
+        """
+
+        with self._lock:
+            return [dict(m) for m in self._matches.values() if state is None or m.get("state") == state]
+
+    def _get(self, match_id) -> dict:
+        match = self._matches.get(str(match_id))
+
+        if match is None:
+            raise ChallongeAPIException(f"ERROR: Match {match_id} is not part of this bracket.")
+
+        return match
+
+    def apply(self, match: dict) -> list:
+        """
+        Applies a match record returned by the server (e.g. by MatchAPI.update); see report().
+
+        :param match: A match record.
+        :return: The IDs of every match whose local record changed.
+        """
+
+        if match.get("state") != "complete":
+            with self._lock:
+                self._get(match["id"]).update(match)
+
+            return [str(match["id"])]
+
+        return self.report(match["id"], match.get("winner_id"), match.get("loser_id"), match.get("scores_csv"))
+
+    def report(self, match_id, winner_id, loser_id=None, scores_csv: str = None) -> list:
+        """
+        Records the result of a match, and advances its players into the matches it feeds.
+
+        :param match_id: A match ID.
+        :param winner_id: The winner's participant ID, or None for a tie.
+        :param loser_id: The loser's participant ID. Defaults to the match's other player.
+        :param scores_csv: The match's scores, e.g. "3-1,2-3,3-0".
+        :return: The IDs of every match whose local record changed.
+        """
+
+        with self._lock:
+            match = self._get(match_id)
+            match_id = str(match["id"])
+
+            if winner_id is not None and loser_id is None:
+                loser_id = match.get("player2_id") if _same(winner_id, match.get("player1_id")) \
+                    else match.get("player1_id")
+
+            if match.get("state") != "complete":
+                self._complete_round(match.get("round"))
+
+            match.update(state="complete", winner_id=winner_id, loser_id=loser_id)
+
+            if scores_csv is not None:
+                match["scores_csv"] = scores_csv
+
+            changed = [match_id]
+
+            for target_id, slot, is_loser in self._feeds.get(match_id, ()):
+                target = self._matches[target_id]
+                player = loser_id if is_loser else winner_id
+
+                # a grand finals reset (fed twice by the same match) is only played if the losers bracket finalist
+                # wins; results that were already built upon can only be corrected by the server
+                if player is None or target.get("player1_prereq_match_id") == target.get("player2_prereq_match_id") \
+                        or target.get("state") == "complete":
+                    self.needs_reconcile = self.needs_reconcile or not _same(target.get(f"{slot}_id"), player)
+                    continue
+
+                target[f"{slot}_id"] = player
+
+                if target.get("player1_id") and target.get("player2_id") and target.get("state") == "pending":
+                    target["state"] = "open"
+
+                changed.append(target_id)
+
+            return changed
+
+    def _complete_round(self, round_number):
+        self._remaining[round_number] = self._remaining.get(round_number, 1) - 1
+
+        # Challonge pairs the next Swiss round once the current one is complete
+        if self.tournament_type == "swiss" and self._remaining[round_number] <= 0:
+            self.needs_reconcile = True
+
+    def reconcile(self, matches: list) -> list:
+        """
+        Replaces the local state with the server's match list.
+
+        :param matches: The tournament's match list, as returned by MatchAPI.get_all.
+        :return: The IDs of the matches whose local record disagreed with the server (including matches that were
+                 added or removed).
+        """
+
+        with self._lock:
+            previous = self._matches
+            self._load(matches)
+
+            return [
+                match_id for match_id in set(previous) | set(self._matches)
+                if match_id not in previous or match_id not in self._matches
+                or any(not _same(previous[match_id].get(f), self._matches[match_id].get(f)) for f in _PREDICTED_FIELDS)
+            ]
+
+    def refresh(self, match_api, tournament_id: str, force: bool = False):
+        """
+        Reconciles with the server if the local state is due for it (or if forced).
+
+        :param match_api: A (blocking) MatchAPI; asynchronous clients should call reconcile() with the awaited
+               match list instead.
+        :param tournament_id: The tournament's ID.
+        :param force: If True, reconcile even if the local state is not due.
+        :return: The IDs of the matches that disagreed (see reconcile()), or None if nothing was fetched.
+        """
+
+        if not (force or self.due):
+            return None
+
+        return self.reconcile(match_api.get_all(tournament_id))
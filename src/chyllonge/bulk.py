@@ -0,0 +1,437 @@
+import contextvars
+from collections import deque
+
+from .exceptions import ChallongeAPIException
+
+# concurrent.futures and asyncio are imported by the functions that use them, so that importing the client (which
+# does not run any bulk operation) stays cheap
+
+
+class BulkResult:
+    """
+    The outcome of one item of a bulk operation. Exactly one of ``result`` and ``error`` is set, so a failed item
+    never aborts the rest of the operation.
+    """
+
+    def __init__(self, item, result=None, error: Exception = None, skipped: bool = False):
+        """
+        :param item: The input item, as it was passed to the bulk operation.
+        :param result: The API's response for the item, if it succeeded.
+        :param error: The exception raised for the item, if it failed.
+        :param skipped: True if the item needed no request at all (e.g. it was already in the requested state); its
+               ``result`` then holds the record as it was found.
+        """
+
+        self.item = item
+        self.result = result
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        return f"BulkResult(item={self.item!r}, ok={self.ok}, skipped={self.skipped}, error={self.error!r})"
+
+
+def _submit(executor, function, *args):
+    """
+    Submits a call to a thread pool in a copy of the caller's context, so that context variables (such as the
+    tracing span in progress; see chyllonge.tracing) carry over to the worker thread.
+    """
+
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
+
+def _check_acyclic(chains: dict, dependencies: dict):
+    """
+    Raises a ChallongeAPIException if the chain dependencies contain a cycle (which would never finish).
+    """
+
+    state = {}  # chain -> 1 while being visited, 2 once done
+
+    for root in chains:
+        stack = [(root, iter(dependencies.get(root, ())))]
+        state[root] = state.get(root) or 1
+
+        if state[root] == 2:
+            continue
+
+        while stack:
+            chain, deps = stack[-1]
+            dep = next(deps, None)
+
+            if dep is None:
+                state[chain] = 2
+                stack.pop()
+            elif state.get(dep) == 1:
+                raise ChallongeAPIException("ERROR: The bulk operation contains circular dependencies.")
+            elif dep not in state:
+                state[dep] = 1
+                stack.append((dep, iter(dependencies.get(dep, ()))))
+
+
+def _skipped(reason: str):
+    return ChallongeAPIException(f"ERROR: Skipped because {reason}.")
+
+
+def run_chains(items: list, chains: dict, dependencies: dict, worker, max_workers: int = 8):
+    """
+    Runs a bulk operation on a bounded thread pool. Items are grouped into chains: the items of one chain run one
+    after another, in order, while independent chains run in parallel. A chain only starts once every chain it
+    depends on has succeeded; a failure skips the rest of its own chain and every chain that depends on it.
+
+    :param items: The items to process.
+    :param chains: A dict mapping each chain key to the indices (into ``items``) of its items, in order.
+    :param dependencies: A dict mapping a chain key to the keys of the chains it depends on.
+    :param worker: A callable that processes a single item and returns the API's response.
+    :param max_workers: The maximum number of items processed at once.
+    :return: A list of BulkResult, in the same order as ``items``.
+    """
+
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    _check_acyclic(chains, dependencies)
+
+    results = [None] * len(items)
+
+    def run_chain(indices):
+        for position, index in enumerate(indices):
+            try:
+                results[index] = BulkResult(items[index], result=worker(items[index]))
+            except Exception as e:
+                results[index] = BulkResult(items[index], error=e)
+
+                for skipped in indices[position + 1:]:
+                    results[skipped] = BulkResult(items[skipped], error=_skipped("an earlier item in its chain failed"))
+
+                return False
+
+        return True
+
+    def skip_dependents(failed):
+        for chain in [c for c, deps in pending.items() if failed in deps]:
+            if chain in pending:
+                del pending[chain]
+
+                for index in chains[chain]:
+                    results[index] = BulkResult(items[index], error=_skipped("an item it depends on failed"))
+
+                skip_dependents(chain)
+
+    pending = {chain: set(dependencies.get(chain, ())) & set(chains) for chain in chains}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for chain in [c for c, deps in pending.items() if not deps]:
+                del pending[chain]
+                running[_submit(executor, run_chain, chains[chain])] = chain
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                chain = running.pop(future)
+
+                if future.result():
+                    for deps in pending.values():
+                        deps.discard(chain)
+                else:
+                    skip_dependents(chain)
+
+    return results
+
+
+def run_concurrently(items: list, worker, max_workers: int = 8):
+    """
+    Runs a bulk operation on a bounded thread pool, where every item is independent of the others.
+
+    :param items: The items to process.
+    :param worker: A callable that processes a single item and returns the API's response.
+    :param max_workers: The maximum number of items processed at once.
+    :return: A list of BulkResult, in the same order as ``items``.
+    """
+
+    return run_chains(items, {i: [i] for i in range(len(items))}, {}, worker, max_workers)
+
+
+def _as_result(item, result):
+    # workers may answer some items themselves (e.g. to mark them as skipped)
+    return result if isinstance(result, BulkResult) else BulkResult(item, result=result)
+
+
+def _as_results(batch: list, results) -> list:
+    """
+    Pairs the items of a batch with the worker's responses. Items the worker returned no response for fail, rather
+    than being dropped or reported as successes.
+    """
+
+    results = list(results or ())
+    paired = [_as_result(item, result) for item, result in zip(batch, results)]
+
+    if len(results) < len(batch):
+        error = ChallongeAPIException(
+            f"ERROR: Only {len(results)} responses were returned for a batch of {len(batch)} items."
+        )
+        paired.extend(BulkResult(item, error=error) for item in batch[len(results):])
+
+    return paired
+
+
+def _batches(items, batch_size: int):
+    """
+    Yields successive lists of up to ``batch_size`` items, consuming ``items`` lazily.
+    """
+
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _rejects_items(error: ChallongeAPIException) -> bool:
+    """
+    Returns True if an error means that Challonge rejected (some of) a batch's items, so that bisecting the batch
+    isolates them. Errors that would fail every half alike (denied access, a missing tournament, throttling, server
+    failures) are not worth the extra requests.
+    """
+
+    return error.status is None or error.status in (400, 422)
+
+
+def _bisect(batch: list, worker):
+    """
+    Runs a batch, splitting it in halves (recursively) whenever Challonge rejects it, until every rejected item has
+    been isolated. Returns a list of BulkResult, in the same order as ``batch``.
+    """
+
+    try:
+        results = worker(batch)
+    except ChallongeAPIException as e:
+        if len(batch) == 1 or not _rejects_items(e):
+            return [BulkResult(item, error=e) for item in batch]
+
+        middle = len(batch) // 2
+
+        return _bisect(batch[:middle], worker) + _bisect(batch[middle:], worker)
+    except Exception as e:
+        return [BulkResult(item, error=e) for item in batch]
+
+    return _as_results(batch, results)
+
+
+def run_batches(items, worker, batch_size: int = 100, max_workers: int = 4, is_barrier=None):
+    """
+    Runs a bulk operation in batches, on a bounded thread pool, yielding one BulkResult per item as batches
+    complete. ``items`` may be any iterable (e.g. a generator or a csv.DictReader); it is consumed lazily, so at most
+    ``max_workers`` batches are held in memory at once.
+
+    A batch that Challonge rejects as a whole (it rolls back every item of a batch when one of them is invalid) is
+    bisected until the offending items are isolated, so only those fail. A batch that fails for any other reason
+    (e.g. a ChallongeServerException) is not bisected; each of its items fails with that error.
+
+    :param items: The items to process.
+    :param worker: A callable that processes a list of items and returns a list of responses (or BulkResults), one
+           per item; items it returns no response for fail.
+    :param batch_size: The number of items sent per request.
+    :param max_workers: The maximum number of batches in flight at once.
+    :param is_barrier: An optional predicate for items whose batch must not overlap any other batch (e.g. because
+           it depends on the items before it having been applied).
+    :return: A generator of BulkResult, in the same order as ``items``.
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    in_flight = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in _batches(items, batch_size):
+            barrier = is_barrier is not None and any(is_barrier(item) for item in batch)
+
+            while in_flight and (barrier or len(in_flight) >= max_workers):
+                yield from in_flight.popleft().result()
+
+            in_flight.append(_submit(executor, _bisect, batch, worker))
+
+            if barrier:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def prefetch(items, worker, max_workers: int = 4):
+    """
+    Runs a worker over a sequence of items on a bounded thread pool, yielding each result in order as soon as it (and
+    every result before it) is ready. At most ``max_workers`` items are in flight (and held in memory) at once, and
+    closing the generator early cancels the items that have not started yet.
+
+    Unlike the other bulk operations, a failure is raised (from the point in the sequence where it occurred), since
+    a stream with a gap in it is rarely useful.
+
+    :param items: The items to process; consumed lazily.
+    :param worker: A callable that processes a single item.
+    :param max_workers: The maximum number of items in flight at once.
+    :return: A generator of the worker's results, in the same order as ``items``.
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    in_flight = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in items:
+                if len(in_flight) >= max_workers:
+                    yield in_flight.popleft().result()
+
+                in_flight.append(_submit(executor, worker, item))
+
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+async def _bisect_async(batch: list, worker):
+    try:
+        results = await worker(batch)
+    except ChallongeAPIException as e:
+        if len(batch) == 1 or not _rejects_items(e):
+            return [BulkResult(item, error=e) for item in batch]
+
+        middle = len(batch) // 2
+
+        return await _bisect_async(batch[:middle], worker) + await _bisect_async(batch[middle:], worker)
+    except Exception as e:
+        return [BulkResult(item, error=e) for item in batch]
+
+    return _as_results(batch, results)
+
+
+async def run_batches_async(items, worker, batch_size: int = 100, max_concurrency: int = 4, is_barrier=None):
+    """
+    The asyncio counterpart of run_batches; ``worker`` is a coroutine function, and this is an async generator.
+    """
+
+    import asyncio
+
+    in_flight = deque()
+
+    try:
+        for batch in _batches(items, batch_size):
+            barrier = is_barrier is not None and any(is_barrier(item) for item in batch)
+
+            while in_flight and (barrier or len(in_flight) >= max_concurrency):
+                for result in await in_flight.popleft():
+                    yield result
+
+            in_flight.append(asyncio.ensure_future(_bisect_async(batch, worker)))
+
+            if barrier:
+                for result in await in_flight.popleft():
+                    yield result
+
+        while in_flight:
+            for result in await in_flight.popleft():
+                yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def _aiter(items):
+    # iterates a regular or an asynchronous iterable alike
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def prefetch_async(items, worker, max_concurrency: int = 4):
+    """
+    The asyncio counterpart of prefetch; ``worker`` is a coroutine function, ``items`` may also be an async
+    iterable, and this is an async generator.
+    """
+
+    import asyncio
+
+    in_flight = deque()
+
+    try:
+        async for item in _aiter(items):
+            if len(in_flight) >= max_concurrency:
+                yield await in_flight.popleft()
+
+            in_flight.append(asyncio.ensure_future(worker(item)))
+
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def run_chains_async(items: list, chains: dict, dependencies: dict, worker, max_concurrency: int = 8):
+    """
+    The asyncio counterpart of run_chains; ``worker`` is a coroutine function.
+    """
+
+    import asyncio
+
+    _check_acyclic(chains, dependencies)
+
+    results = [None] * len(items)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = {}
+
+    async def run_chain(chain):
+        deps = [tasks[d] for d in dependencies.get(chain, ()) if d in chains]
+        indices = chains[chain]
+
+        if deps and not all(await asyncio.gather(*deps)):
+            for index in indices:
+                results[index] = BulkResult(items[index], error=_skipped("an item it depends on failed"))
+
+            return False
+
+        for position, index in enumerate(indices):
+            try:
+                async with semaphore:
+                    results[index] = BulkResult(items[index], result=await worker(items[index]))
+            except Exception as e:
+                results[index] = BulkResult(items[index], error=e)
+
+                for skipped in indices[position + 1:]:
+                    results[skipped] = BulkResult(items[skipped], error=_skipped("an earlier item in its chain failed"))
+
+                return False
+
+        return True
+
+    # every task is created before any of them runs, so each one can look up the tasks it depends on
+    for chain in chains:
+        tasks[chain] = asyncio.ensure_future(run_chain(chain))
+
+    await asyncio.gather(*tasks.values())
+
+    return results
+
+
+async def run_concurrently_async(items: list, worker, max_concurrency: int = 8):
+    """
+    The asyncio counterpart of run_concurrently; ``worker`` is a coroutine function.
+    """
+
+    return await run_chains_async(items, {i: [i] for i in range(len(items))}, {}, worker, max_concurrency)
@@ -0,0 +1,300 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# matches an API path such as "tournaments/10230/matches/5.json"; group 1 is the tournament ID (or URL), and
+# group 2 is everything after it
+_TOURNAMENT_PATH = re.compile(r"^tournaments/([^/.]+)(?:/(.*?))?\.json$")
+
+_SINGULAR = {"participants": "participant", "matches": "match", "attachments": "attachment"}
+
+
+def request_key(api_suffix: str, params=None, envelope: str = None):
+    """
+    Returns a hashable key identifying a GET request: its path, envelope and (non-None) parameters.
+    """
+
+    return api_suffix, envelope, tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+
+
+class ResponseCache:
+    """
+    A thread-safe, in-memory LRU cache for GET responses, with a time-to-live per kind of resource.
+
+    Every write that goes through ChallongeApiHttpMethods (e.g. MatchAPI.update, ParticipantAPI.add or
+    TournamentAPI.start) invalidates all cached responses for the affected tournament, along with any cached
+    tournament lists. Note that cached records are shared between callers, so they should be treated as read-only.
+
+    Tournaments may be addressed by ID or by URL; the cache learns the URL of every tournament record it stores, so
+    reads by URL are invalidated by writes by ID (and vice versa) once the tournament has been fetched.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0, ttls: dict = None, clock=time.monotonic):
+        """
+        :param maxsize: The maximum number of cached responses; the least recently used one is evicted first.
+        :param ttl: The default number of seconds a response stays fresh.
+        :param ttls: Per-resource overrides of ``ttl``, keyed by resource: "tournaments" (the account-wide list),
+               "tournament", "participants", "participant", "matches", "match", "attachments" or "attachment"; e.g.
+               ``{"tournament": 30, "matches": 2}``.
+        :param clock: A monotonic clock, in seconds.
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, group, data)
+        self._generations = {}  # group -> number of invalidations so far
+        self._aliases = {}  # tournament URL -> tournament ID
+
+    @staticmethod
+    def classify(api_suffix: str):
+        """
+        Returns the tournament identifier (or None for account-wide endpoints) and the kind of resource an API path
+        refers to.
+
+        :param api_suffix: An API path, e.g. "tournaments/10230/participants.json".
+        """
+
+        match = _TOURNAMENT_PATH.match(api_suffix)
+
+        if not match:
+            return None, api_suffix.split(".")[0].split("/")[-1]
+
+        tournament_id, rest = match.groups()
+
+        if not rest:
+            return tournament_id, "tournament"
+
+        segments = rest.split("/")
+
+        # e.g. "matches/5/attachments" -> "attachments", "matches/5" -> "match", "participants/5/check_in" ->
+        # "participant"
+        for i in range(len(segments) - 1, -1, -1):
+            if segments[i] in _SINGULAR:
+                return tournament_id, segments[i] if i == len(segments) - 1 else _SINGULAR[segments[i]]
+
+        return tournament_id, segments[-1]
+
+    def _group(self, tournament_id):
+        if tournament_id is None:
+            return None
+
+        return self._aliases.get(tournament_id, tournament_id)
+
+    def get(self, api_suffix: str, params=None, envelope: str = None):
+        """
+        Returns the cached response for a GET request, or None if there is no fresh one.
+
+        :param api_suffix: The API path.
+        :param params: The request parameters.
+        :param envelope: The envelope key the response was unwrapped with, if any.
+        """
+
+        key = request_key(api_suffix, params, envelope)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[2]
+
+    def generation(self, api_suffix: str):
+        """
+        Returns a token to pass to ``put`` for a response that is about to be fetched. If the tournament is
+        invalidated while the request is in flight, ``put`` discards the (possibly stale) response.
+
+        :param api_suffix: The API path.
+        """
+
+        tournament_id, _ = self.classify(api_suffix)
+
+        with self._lock:
+            group = self._group(tournament_id)
+            return self._generations.get(group, 0), self._generations.get(None, 0)
+
+    def put(self, api_suffix: str, params, data, generation=None, envelope: str = None):
+        """
+        Caches the response of a GET request.
+
+        :param api_suffix: The API path.
+        :param params: The request parameters.
+        :param data: The decoded (and possibly unwrapped) JSON response.
+        :param generation: The token returned by ``generation`` before the request was sent.
+        :param envelope: The envelope key the response was unwrapped with, if any.
+        """
+
+        tournament_id, resource = self.classify(api_suffix)
+        ttl = self.ttls.get(resource, self.ttl)
+
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            group = self._group(tournament_id)
+
+            if generation is not None and generation != (self._generations.get(group, 0),
+                                                         self._generations.get(None, 0)):
+                return
+
+            if tournament_id is not None and resource == "tournament" and isinstance(data, dict):
+                self._learn_alias(tournament_id, data)
+                group = self._group(tournament_id)
+
+            if resource == "tournaments" and isinstance(data, list):
+                for t in data:
+                    self._learn_alias(None, t)
+
+            key = request_key(api_suffix, params, envelope)
+
+            self._entries[key] = (self.clock() + ttl, group, data)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _learn_alias(self, requested_id, tournament):
+        # records may or may not still be wrapped in their envelope
+        tournament = tournament.get("tournament", tournament)
+
+        if "id" not in tournament:
+            return
+
+        tournament_id = str(tournament["id"])
+
+        for alias in (requested_id, tournament.get("url")):
+            if alias and alias != tournament_id:
+                self._aliases[alias] = tournament_id
+
+    def invalidate(self, api_suffix: str):
+        """
+        Drops every cached response for the tournament a write request refers to, along with the account-wide
+        tournament lists.
+
+        :param api_suffix: The API path of the write request.
+        """
+
+        tournament_id, _ = self.classify(api_suffix)
+
+        with self._lock:
+            group = self._group(tournament_id)
+            groups = {None, group}
+
+            for g in groups:
+                self._generations[g] = self._generations.get(g, 0) + 1
+
+            stale = [key for key, entry in self._entries.items() if entry[1] in groups]
+
+            for key in stale:
+                del self._entries[key]
+
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+            for g in list(self._generations):
+                self._generations[g] += 1
+
+    def stats(self):
+        """
+        Returns the cache's hit, miss, eviction and invalidation counters, and its current size.
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+            }
+
+
+class ValidatorCache:
+    """
+    A thread-safe LRU store of the validators (ETag and Last-Modified headers) of GET responses, along with their
+    decoded bodies. ChallongeApiHttpMethods uses it to send conditional requests: when the server answers
+    304 Not Modified, the previously decoded object is returned as-is, without downloading or parsing anything.
+
+    As with ResponseCache, the returned objects are shared, so they should be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        :param maxsize: The maximum number of responses to remember.
+        """
+
+        self.maxsize = maxsize
+
+        self.revalidated = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (conditional headers, data)
+
+    def get(self, key):
+        """
+        Returns the conditional request headers and the decoded body remembered for a request, or None.
+
+        :param key: A key returned by request_key.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def put(self, key, etag: str = None, last_modified: str = None, data=None):
+        """
+        Remembers the validators and decoded body of a response. Responses without validators are ignored.
+
+        :param key: A key returned by request_key.
+        :param etag: The response's ETag header.
+        :param last_modified: The response's Last-Modified header.
+        :param data: The decoded (and possibly unwrapped) response.
+        """
+
+        headers = {}
+
+        if etag:
+            headers["If-None-Match"] = etag
+
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        with self._lock:
+            if not headers:
+                self._entries.pop(key, None)
+                return
+
+            self._entries[key] = (headers, data)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def record_revalidation(self):
+        with self._lock:
+            self.revalidated += 1
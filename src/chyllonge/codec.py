@@ -0,0 +1,49 @@
+import json
+from functools import lru_cache
+from operator import itemgetter
+
+
+@lru_cache(maxsize=None)
+def default_loads():
+    """
+    Returns the fastest available JSON parser: ``orjson.loads`` if orjson is installed (see the "orjson" extra in
+    pyproject.toml), or else ``json.loads``. Both parse straight from bytes. The choice is made on first use, so
+    that importing the client stays cheap.
+    """
+
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+
+    return orjson.loads
+
+
+def unwrap(data, envelope: str = None):
+    """
+    Strips the envelope key Challonge wraps around every record (e.g. ``{"match": {...}}``).
+
+    :param data: A decoded JSON response; either a single record or a list of records.
+    :param envelope: The envelope key. If None, the data is returned as-is.
+    """
+
+    if envelope is None:
+        return data
+
+    if isinstance(data, list):
+        return list(map(itemgetter(envelope), data))
+
+    return data[envelope]
+
+
+def decode(body: bytes, envelope: str = None, loads=None):
+    """
+    Parses a response body and strips its envelopes. The body is parsed as bytes, without decoding it into a str
+    first.
+
+    :param body: The raw response body.
+    :param envelope: The envelope key to strip, if any.
+    :param loads: The JSON parser to use; defaults to default_loads().
+    """
+
+    return unwrap((loads or default_loads())(body), envelope)
@@ -0,0 +1,146 @@
+from .exceptions import ChallongeAPIException
+from .scores import summarize_many
+
+# placeholders for missing values in NumPy arrays, which (unlike column lists) have no None: Challonge IDs are
+# positive, and rounds are never zero (losers bracket rounds are negative)
+MISSING_ID = -1
+MISSING_ROUND = 0
+
+MATCH_STATES = ("pending", "open", "complete")
+
+
+def _numpy():
+    """
+    Imports NumPy on first use, since it is an optional dependency.
+    """
+
+    try:
+        import numpy
+    except ImportError:
+        raise ChallongeAPIException(
+            'ERROR: NumPy export requires numpy. Install it with "pip install chyllonge[numpy]".'
+        )
+
+    return numpy
+
+
+def _records(records, envelope: str):
+    # records nested in a tournament snapshot are still wrapped in their envelope
+    for record in records:
+        yield record.get(envelope, record)
+
+
+def match_columns(matches) -> dict:
+    """
+    Converts a match list into columns (one list per field), in the layout expected by e.g. ``pyarrow.table`` or
+    ``pandas.DataFrame``. Missing values are None.
+
+    :param matches: Any iterable of match records or models, e.g. the result of MatchAPI.get_all, a tournament
+           snapshot's ``matches``, or several tournaments' matches chained together.
+    :return: A dict with the columns "tournament_id", "match_id", "round", "state", "player1_id", "player2_id",
+             "winner_id", "loser_id", "player1_score" and "player2_score"; scores are totals across every set.
+    """
+
+    columns = {
+        "tournament_id": [], "match_id": [], "round": [], "state": [], "player1_id": [], "player2_id": [],
+        "winner_id": [], "loser_id": [], "player1_score": [], "player2_score": [],
+    }
+
+    matches = list(_records(matches, "match"))
+
+    for match, summary in zip(matches, summarize_many(matches)):
+        player1_score, player2_score = (summary.player1_games, summary.player2_games) if summary else (None, None)
+
+        columns["tournament_id"].append(match.get("tournament_id"))
+        columns["match_id"].append(match.get("id"))
+        columns["round"].append(match.get("round"))
+        columns["state"].append(match.get("state"))
+        columns["player1_id"].append(match.get("player1_id"))
+        columns["player2_id"].append(match.get("player2_id"))
+        columns["winner_id"].append(match.get("winner_id"))
+        columns["loser_id"].append(match.get("loser_id"))
+        columns["player1_score"].append(player1_score)
+        columns["player2_score"].append(player2_score)
+
+    return columns
+
+
+def participant_columns(participants) -> dict:
+    """
+    Converts a participant list into columns; see match_columns.
+
+    :param participants: Any iterable of participant records or models.
+    :return: A dict with the columns "tournament_id", "participant_id", "name", "seed", "final_rank", "active" and
+             "checked_in".
+    """
+
+    columns = {
+        "tournament_id": [], "participant_id": [], "name": [], "seed": [], "final_rank": [], "active": [],
+        "checked_in": [],
+    }
+
+    for participant in _records(participants, "participant"):
+        columns["tournament_id"].append(participant.get("tournament_id"))
+        columns["participant_id"].append(participant.get("id"))
+        columns["name"].append(participant.get("name"))
+        columns["seed"].append(participant.get("seed"))
+        columns["final_rank"].append(participant.get("final_rank"))
+        columns["active"].append(participant.get("active"))
+        columns["checked_in"].append(participant.get("checked_in"))
+
+    return columns
+
+
+def _to_array(columns: dict, dtype: list, missing: dict):
+    numpy = _numpy()
+
+    size = len(next(iter(columns.values()))) if columns else 0
+    array = numpy.empty(size, dtype=dtype)
+
+    for name, _ in dtype:
+        placeholder = missing.get(name)
+        array[name] = [placeholder if value is None else value for value in columns[name]]
+
+    return array
+
+
+def match_array(matches):
+    """
+    Converts a match list into a NumPy structured array, with one row per match and the fields of match_columns.
+    Missing IDs are MISSING_ID, missing rounds are MISSING_ROUND and missing scores are NaN; ``state`` is the index
+    of the match's state in MATCH_STATES (or -1). Requires NumPy.
+
+    :param matches: Any iterable of match records or models; see match_columns.
+    """
+
+    columns = match_columns(matches)
+    columns["state"] = [MATCH_STATES.index(s) if s in MATCH_STATES else -1 for s in columns["state"]]
+
+    ids = ("tournament_id", "match_id", "player1_id", "player2_id", "winner_id", "loser_id")
+
+    dtype = [(name, "i8") for name in ids[:2]] + [("round", "i2"), ("state", "i1")] + \
+        [(name, "i8") for name in ids[2:]] + [("player1_score", "f8"), ("player2_score", "f8")]
+
+    missing = dict({name: MISSING_ID for name in ids}, round=MISSING_ROUND, player1_score=float("nan"),
+                   player2_score=float("nan"))
+
+    return _to_array(columns, dtype, missing)
+
+
+def participant_array(participants):
+    """
+    Converts a participant list into a NumPy structured array; see participant_columns. Missing IDs, seeds and ranks
+    are MISSING_ID, and names are truncated to 64 characters. Requires NumPy.
+
+    :param participants: Any iterable of participant records or models.
+    """
+
+    dtype = [
+        ("tournament_id", "i8"), ("participant_id", "i8"), ("name", "U64"), ("seed", "i4"), ("final_rank", "i4"),
+        ("active", "?"), ("checked_in", "?"),
+    ]
+
+    missing = {"tournament_id": MISSING_ID, "participant_id": MISSING_ID, "name": "", "seed": MISSING_ID,
+               "final_rank": MISSING_ID, "active": False, "checked_in": False}
+
+    return _to_array(participant_columns(participants), dtype, missing)
@@ -0,0 +1,204 @@
+import re
+import json
+
+from .throttle import TokenBucket
+
+# error bodies longer than this (e.g. a Cloudflare or load balancer error page) are never parsed; Challonge's own
+# error responses are a few hundred bytes of JSON
+MAX_ERROR_BODY = 64 * 1024
+
+# how much of an unparsed body is quoted in an error message
+EXCERPT_LENGTH = 200
+
+_TITLE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(rb"<[^>]*>")
+_WHITESPACE = re.compile(rb"\s+")
+
+
+class ChallongeAPIException(Exception):
+    """
+    Raised for any error reported by Challonge or detected by the client. Errors reported by Challonge carry the
+    metadata of the failed request; for errors detected locally, it is None.
+    """
+
+    # True if re-sending the same request later may succeed
+    retryable = False
+
+    def __init__(self, message: str = "", status: int = None, method: str = None, url: str = None, errors=(),
+                 elapsed: float = None, attempts: int = None):
+        """
+        :param message: The error message.
+        :param status: The HTTP status code of the response.
+        :param method: The HTTP method of the request.
+        :param url: The full URL of the request.
+        :param errors: The error messages Challonge returned, if the response had a JSON body.
+        :param elapsed: The number of seconds from sending the request to receiving the final response, retries
+               included.
+        :param attempts: How many times the request was sent.
+        """
+
+        super().__init__(message)
+
+        self.status = status
+        self.method = method
+        self.url = url
+        self.errors = tuple(errors)
+        self.elapsed = elapsed
+        self.attempts = attempts
+
+
+class ChallongeAPINotImplementedException(Exception):
+    # raise ChallongeAPIException('foo bar baz buzz')
+    pass
+
+
+class ChallongeAuthException(ChallongeAPIException):
+    """
+    Raised when Challonge denies access (401 Unauthorized or 403 Forbidden).
+    """
+
+
+class ChallongeNotFoundException(ChallongeAPIException):
+    """
+    Raised when a tournament, participant, match or attachment does not exist (404 Not Found).
+    """
+
+
+class ChallongeValidationException(ChallongeAPIException):
+    """
+    Raised when a request fails a pre-flight check (see chyllonge.validation), or when Challonge rejects it as invalid
+    (422 Unprocessable Entity).
+    """
+
+    def __init__(self, message: str, check: str = None, tournament_id=None, server_side: bool = False, **metadata):
+        """
+        :param message: The error message.
+        :param check: The name of the failed check, e.g. "min_participants".
+        :param tournament_id: The tournament the request referred to.
+        :param server_side: True if Challonge rejected the request, rather than a local check.
+        :param metadata: The request metadata; see ChallongeAPIException.
+        """
+
+        super().__init__(message, **metadata)
+
+        self.check = check
+        self.tournament_id = tournament_id
+        self.server_side = server_side
+
+
+class ChallongeRateLimitException(ChallongeAPIException):
+    """
+    Raised when Challonge keeps throttling a request (429 Too Many Requests) after the client stopped re-sending it.
+    """
+
+    retryable = True
+
+    def __init__(self, message: str = "", retry_after: float = None, **metadata):
+        """
+        :param message: The error message.
+        :param retry_after: The server's Retry-After value, in seconds, if it sent one.
+        :param metadata: The request metadata; see ChallongeAPIException.
+        """
+
+        super().__init__(message, **metadata)
+
+        self.retry_after = retry_after
+
+
+class ChallongeServerException(ChallongeAPIException):
+    """
+    Raised when Challonge (or a proxy in front of it) fails to handle a request (5xx).
+    """
+
+    retryable = True
+
+
+def parse_error_body(body) -> tuple:
+    """
+    Extracts what an error response says, parsing its body at most once and never if it is larger than
+    MAX_ERROR_BODY. Bodies that are not JSON (e.g. an HTML error page) are not parsed at all; only a short excerpt of
+    them is kept.
+
+    :param body: The raw response body, as bytes or str.
+    :return: A tuple of the error messages Challonge returned (empty if there were none) and an excerpt of the body
+             for when there were none.
+    """
+
+    if isinstance(body, str):
+        body = body.encode("utf-8", "replace")
+
+    body = body or b""
+    start = body[:EXCERPT_LENGTH].lstrip()
+
+    if len(body) <= MAX_ERROR_BODY and start[:1] in (b"{", b"["):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+
+        errors = data.get("errors", data.get("error")) if isinstance(data, dict) else data
+
+        if isinstance(errors, str):
+            return (errors,), ""
+
+        if isinstance(errors, dict):
+            return tuple(f"{k} {m}" for k, v in errors.items() for m in (v if isinstance(v, list) else [v])), ""
+
+        if isinstance(errors, list) and errors:
+            return tuple(str(e) for e in errors), ""
+
+    # an HTML page is best summarized by its title
+    head = body[:MAX_ERROR_BODY]
+    title = _TITLE.search(head)
+    text = title.group(1) if title else _TAGS.sub(b" ", head[:EXCERPT_LENGTH * 4])
+    excerpt = _WHITESPACE.sub(b" ", text).strip()[:EXCERPT_LENGTH]
+
+    return (), excerpt.decode("utf-8", "replace")
+
+
+def response_error(method: str, url: str, status: int, body=b"", headers=None, elapsed: float = None,
+                   attempts: int = None) -> ChallongeAPIException:
+    """
+    Returns the exception that describes an unsuccessful response: a ChallongeAuthException,
+    ChallongeNotFoundException, ChallongeValidationException, ChallongeRateLimitException or
+    ChallongeServerException, depending on its status, or else a plain ChallongeAPIException.
+
+    :param method: The HTTP method of the request.
+    :param url: The full URL of the request.
+    :param status: The HTTP status code of the response.
+    :param body: The raw response body.
+    :param headers: The response headers.
+    :param elapsed: The number of seconds the request took, retries included.
+    :param attempts: How many times the request was sent.
+    """
+
+    errors, excerpt = parse_error_body(body)
+    metadata = {"status": status, "method": method, "url": url, "errors": errors, "elapsed": elapsed,
+                "attempts": attempts}
+
+    if errors:
+        message = f"ERROR: {', '.join(errors)}"
+    else:
+        message = f"ERROR: {method} {url} failed with HTTP {status}" + (f": {excerpt}" if excerpt else ".")
+
+    if status in (401, 403):
+        return ChallongeAuthException(
+            f"ERROR: Access was denied. Ensure that the local CHALLONGE_USER and CHALLONGE_KEY environment variables "
+            f"are set. See https://challonge.com/settings/developer for more information. {message[7:]}", **metadata
+        )
+
+    if status == 404:
+        return ChallongeNotFoundException(message, **metadata)
+
+    if status == 422:
+        return ChallongeValidationException(message, server_side=True, **metadata)
+
+    if status == 429:
+        retry_after = TokenBucket.parse_retry_after((headers or {}).get("Retry-After"))
+
+        return ChallongeRateLimitException(message, retry_after=retry_after, **metadata)
+
+    if status is not None and status >= 500:
+        return ChallongeServerException(message, **metadata)
+
+    return ChallongeAPIException(message, **metadata)
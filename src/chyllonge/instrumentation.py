@@ -0,0 +1,323 @@
+import time
+import bisect
+import threading
+from functools import lru_cache
+
+# the path segment that follows each collection is a record ID (or a tournament URL), except for these actions
+_ID_PLACEHOLDERS = {
+    "tournaments": "{tournament}", "participants": "{participant_id}", "matches": "{match_id}",
+    "attachments": "{attachment_id}",
+}
+_COLLECTION_ACTIONS = {"bulk_add", "clear", "randomize"}
+
+# upper bounds (in seconds) of the latency histogram buckets; Challonge answers most requests in 0.1 to 2 seconds
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# the request currently being sent by each thread, so that connection set-up can be attributed to it
+_current = threading.local()
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(api_suffix: str) -> str:
+    """
+    Replaces the IDs in an API path with placeholders, so that requests to the same endpoint are aggregated together,
+    e.g. "tournaments/10230/matches/42/reopen.json" becomes "tournaments/{tournament}/matches/{match_id}/reopen.json".
+
+    :param api_suffix: The path of a request, relative to the base Challonge URL (query strings are ignored).
+    """
+
+    path = api_suffix.split("?", 1)[0]
+    extension = ".json" if path.endswith(".json") else ""
+    segments = path[:len(path) - len(extension)].split("/")
+
+    for i in range(1, len(segments)):
+        placeholder = _ID_PLACEHOLDERS.get(segments[i - 1])
+
+        if placeholder and segments[i] not in _COLLECTION_ACTIONS:
+            segments[i] = placeholder
+
+    return "/".join(segments) + extension
+
+
+class RequestInfo:
+    """
+    Describes one HTTP request to Challonge, as it is passed to the before_request and after_request hooks. Every
+    attempt is a request of its own: a request that is retried or re-sent after being throttled is reported once per
+    attempt.
+
+    The timings are in seconds, and None if they did not apply: ``dns`` (resolving the host name; only measured by the
+    asynchronous client), ``connect`` (opening a new connection, DNS resolution and TLS included; None when a pooled
+    connection was re-used), ``ttfb`` (from sending the request to receiving the response headers) and ``total``
+    (from sending the request to reading the whole response).
+    """
+
+    __slots__ = ("method", "url", "endpoint", "attempt", "throttle_retries", "status", "request_bytes",
+                 "response_bytes", "dns", "connect", "ttfb", "total", "error", "started", "span")
+
+    def __init__(self, method: str, url: str, endpoint: str, attempt: int = 0, throttle_retries: int = 0):
+        """
+        :param method: The HTTP method.
+        :param url: The full URL.
+        :param endpoint: The endpoint template; see endpoint_template.
+        :param attempt: How many times the retry policy has re-sent the request so far.
+        :param throttle_retries: How many times the request has been re-sent after being throttled so far.
+        """
+
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.attempt = attempt
+        self.throttle_retries = throttle_retries
+        self.status = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.dns = None
+        self.connect = None
+        self.ttfb = None
+        self.total = None
+        self.error = None
+        self.started = time.perf_counter()
+        self.span = None  # the request's tracing span, if any (see chyllonge.tracing)
+
+    @property
+    def retries(self) -> int:
+        """
+        How many times the request was re-sent before this attempt, for any reason.
+        """
+
+        return self.attempt + self.throttle_retries
+
+    def add_timing(self, name: str, seconds: float):
+        setattr(self, name, (getattr(self, name) or 0.0) + seconds)
+
+    def __repr__(self):
+        return f"RequestInfo({self.method} {self.endpoint}, status={self.status}, total={self.total})"
+
+
+class RequestHook:
+    """
+    The base class of instrumentation hooks. Pass hooks to ChallongeApiHttpMethods (``hooks=[...]``); each is called
+    before every HTTP request is sent and after its response has been read (or it failed, in which case ``error`` is
+    set). Hooks run on the thread (or event loop) that sends the request, so they must be quick and must not raise.
+    """
+
+    def before_request(self, info: RequestInfo):
+        pass
+
+    def after_request(self, info: RequestInfo):
+        pass
+
+
+class LatencyHistogram(RequestHook):
+    """
+    A thread-safe, in-process aggregator of request latencies (and response sizes and retries) per method, endpoint
+    template and status, e.g. to find the endpoints that dominate a latency budget, or to export to Prometheus.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: The upper bounds of the histogram buckets, in seconds.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+
+        self._lock = threading.Lock()
+        self._series = {}  # (method, endpoint, status) -> [bucket counts..., count, sum, bytes, retries]
+
+    def after_request(self, info: RequestInfo):
+        key = (info.method, info.endpoint, str(info.status) if info.status is not None else "error")
+        index = bisect.bisect_left(self.buckets, info.total)
+        size = len(self.buckets)
+
+        with self._lock:
+            series = self._series.get(key)
+
+            if series is None:
+                series = self._series[key] = [0] * size + [0, 0.0, 0, 0]
+
+            if index < size:
+                series[index] += 1
+
+            series[size] += 1
+            series[size + 1] += info.total
+            series[size + 2] += info.response_bytes
+            series[size + 3] += info.retries
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def summary(self) -> list:
+        """
+        Returns one row per method, endpoint template and status, slowest (by total time spent) first.
+
+        :return: A list of dicts with the keys "method", "endpoint", "status", "count", "total" (seconds), "mean"
+                 (seconds), "p50", "p95" and "p99" (upper bounds, in seconds, estimated from the buckets; None if
+                 beyond the largest bucket), "response_bytes" and "retries".
+        """
+
+        size = len(self.buckets)
+
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        rows = []
+
+        for (method, endpoint, status), values in series.items():
+            count = values[size]
+
+            rows.append({
+                "method": method, "endpoint": endpoint, "status": status, "count": count, "total": values[size + 1],
+                "mean": values[size + 1] / count, "p50": self._quantile(values, 0.5),
+                "p95": self._quantile(values, 0.95), "p99": self._quantile(values, 0.99),
+                "response_bytes": values[size + 2], "retries": values[size + 3],
+            })
+
+        return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+    def _quantile(self, values: list, q: float):
+        size = len(self.buckets)
+        rank = q * values[size]
+        seen = 0
+
+        for bound, count in zip(self.buckets, values):
+            seen += count
+
+            if seen >= rank:
+                return bound
+
+        return None
+
+    def prometheus_text(self, prefix: str = "chyllonge") -> str:
+        """
+        Renders the aggregated metrics in the Prometheus text exposition format: a ``<prefix>_request_duration_seconds``
+        histogram and ``<prefix>_response_bytes_total`` and ``<prefix>_request_retries_total`` counters, labelled by
+        method, endpoint and status. Serve it from any HTTP endpoint that Prometheus scrapes.
+
+        :param prefix: The prefix of the metric names.
+        """
+
+        size = len(self.buckets)
+
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+
+        duration, size_counter, retry_counter = (f"{prefix}_request_duration_seconds", f"{prefix}_response_bytes_total",
+                                                 f"{prefix}_request_retries_total")
+        lines = [
+            f"# HELP {duration} Duration of Challonge API requests, from sending them to reading their response.",
+            f"# TYPE {duration} histogram",
+        ]
+
+        for key, values in series:
+            labels = _labels(key)
+            cumulative = 0
+
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+
+            lines.append(f'{duration}_bucket{{{labels},le="+Inf"}} {values[size]}')
+            lines.append(f"{duration}_sum{{{labels}}} {values[size + 1]!r}")
+            lines.append(f"{duration}_count{{{labels}}} {values[size]}")
+
+        for name, help_text, offset in ((size_counter, "Bytes received in Challonge API responses.", 2),
+                                        (retry_counter, "Re-sent Challonge API requests.", 3)):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+
+            for key, values in series:
+                lines.append(f"{name}{{{_labels(key)}}} {values[size + offset]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: tuple) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(("method", "endpoint", "status"), key))
+
+
+@lru_cache(maxsize=None)
+def timed_adapter_class():
+    """
+    Returns a requests HTTPAdapter subclass that reports how long opening each new connection took to the request
+    being sent on the current thread. It is built on first use, so that importing this module does not import
+    requests.
+    """
+
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def timed(connection_class):
+        class TimedConnection(connection_class):
+            def connect(self):
+                started = time.perf_counter()
+
+                try:
+                    super().connect()
+                finally:
+                    info = getattr(_current, "info", None)
+
+                    if info is not None:
+                        info.add_timing("connect", time.perf_counter() - started)
+
+        return TimedConnection
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = timed(HTTPConnectionPool.ConnectionCls)
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = timed(HTTPSConnectionPool.ConnectionCls)
+
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                       "https": TimedHTTPSConnectionPool}
+
+    return TimedHTTPAdapter
+
+
+def aiohttp_trace_config():
+    """
+    Returns an ``aiohttp.TraceConfig`` that records DNS, connection and time-to-first-byte timings (and the number of
+    bytes sent) into the RequestInfo passed as a request's ``trace_request_ctx``.
+    """
+
+    import aiohttp
+
+    def timing(name: str, start: bool):
+        async def callback(session, context, params):
+            info = context.trace_request_ctx
+
+            if not isinstance(info, RequestInfo):
+                return
+
+            if start:
+                setattr(context, name, time.perf_counter())
+            else:
+                info.add_timing(name, time.perf_counter() - getattr(context, name))
+
+        return callback
+
+    async def on_request_chunk_sent(session, context, params):
+        if isinstance(context.trace_request_ctx, RequestInfo):
+            context.trace_request_ctx.request_bytes += len(params.chunk)
+
+    async def on_request_end(session, context, params):
+        info = context.trace_request_ctx
+
+        if isinstance(info, RequestInfo):
+            info.ttfb = time.perf_counter() - info.started
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(timing("dns", True))
+    config.on_dns_resolvehost_end.append(timing("dns", False))
+    config.on_connection_create_start.append(timing("connect", True))
+    config.on_connection_create_end.append(timing("connect", False))
+    config.on_request_chunk_sent.append(on_request_chunk_sent)
+    config.on_request_end.append(on_request_end)
+
+    return config
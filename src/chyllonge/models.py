@@ -0,0 +1,265 @@
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+
+# timestamps repeat a lot within a tournament (and every parsed one carries its own tzinfo), so equal timestamps
+# share a single immutable datetime
+@lru_cache(maxsize=4096)
+def _parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp (e.g. "2015-01-19T16:57:17.000-05:00"). Anything else is returned as-is.
+    """
+
+    if not isinstance(value, str):
+        return value
+
+    try:
+        return datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return value
+
+
+def _format_timestamp(value):
+    return value.isoformat(timespec="milliseconds") if isinstance(value, datetime) else value
+
+
+def _intern(value):
+    # short strings (states, identifiers, scores) repeat across records; store each only once
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 32 else value
+
+
+def _parse_id(value):
+    return int(value) if isinstance(value, str) and value.isdigit() else value
+
+
+class Record:
+    """
+    The base class of the typed record models. A model stores each known field of a Challonge record in a slot
+    (instead of a per-record dict), with IDs as integers and timestamps as timezone-aware datetimes; fields the model
+    does not know about are kept as well, so no data is lost.
+
+    Models also support read-only dict-style access (``match["winner_id"]``, ``match.get("scores_csv")``), so code
+    written against raw records keeps working. ``to_dict`` converts a model back into a raw record.
+    """
+
+    __slots__ = ("_extra",)
+
+    ENVELOPE = None
+
+    _NESTED = {}  # field -> (envelope, model class) for lists of nested records
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        cls._FIELDS = cls.__slots__
+        cls._FIELD_SET = frozenset(cls.__slots__)
+        cls._TIMESTAMPS = frozenset(f for f in cls.__slots__ if f.endswith("_at") or f == "scheduled_time")
+        cls._IDS = frozenset(f for f in cls.__slots__ if f == "id" or f.endswith("_id"))
+
+        cls._CONVERTERS = tuple((field, cls._converter(field)) for field in cls.__slots__)
+
+    @classmethod
+    def _converter(cls, field: str):
+        """
+        Returns the function that converts a (non-None) raw value of a field.
+        """
+
+        if field in cls._IDS:
+            return _parse_id
+
+        if field in cls._TIMESTAMPS:
+            return _parse_timestamp
+
+        if field in cls._NESTED:
+            model = cls._NESTED[field][1]
+            return lambda records: [model.from_dict(r) for r in records]
+
+        return _intern
+
+    @classmethod
+    def from_dict(cls, record: dict):
+        """
+        Converts a raw record (with or without its envelope) into a model.
+
+        :param record: A record, as returned by the API.
+        """
+
+        if len(record) == 1 and cls.ENVELOPE in record:
+            record = record[cls.ENVELOPE]
+
+        model = cls.__new__(cls)
+
+        for field, convert in cls._CONVERTERS:
+            value = record.get(field)
+
+            if value is not None:
+                value = convert(value)
+
+            setattr(model, field, value)
+
+        if cls._FIELD_SET.issuperset(record):
+            model._extra = None
+        else:
+            model._extra = {k: v for k, v in record.items() if k not in cls._FIELD_SET}
+
+        return model
+
+    def to_dict(self) -> dict:
+        """
+        Converts the model back into a raw (JSON-serializable) record, without its envelope.
+        """
+
+        record = {}
+
+        for field in self._FIELDS:
+            value = getattr(self, field)
+
+            if field in self._TIMESTAMPS:
+                value = _format_timestamp(value)
+            elif field in self._NESTED and value is not None:
+                envelope = self._NESTED[field][0]
+                value = [{envelope: r.to_dict()} for r in value]
+
+            record[field] = value
+
+        if self._extra:
+            record.update(self._extra)
+
+        return record
+
+    def keys(self):
+        return list(self._FIELDS) + list(self._extra or ())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+
+        if self._extra and key in self._extra:
+            return self._extra[key]
+
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET or bool(self._extra and key in self._extra)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r})"
+
+
+class MatchAttachment(Record):
+    """
+    A match attachment record.
+    """
+
+    ENVELOPE = "match_attachment"
+
+    __slots__ = (
+        "id", "match_id", "user_id", "description", "url", "original_file_name", "asset_file_name",
+        "asset_content_type", "asset_file_size", "asset_url", "created_at", "updated_at",
+    )
+
+
+class Match(Record):
+    """
+    A match record.
+    """
+
+    ENVELOPE = "match"
+
+    __slots__ = (
+        "id", "tournament_id", "identifier", "state", "round", "group_id", "player1_id", "player2_id",
+        "player1_prereq_match_id", "player2_prereq_match_id", "player1_is_prereq_match_loser",
+        "player2_is_prereq_match_loser", "winner_id", "loser_id", "scores_csv", "player1_votes", "player2_votes",
+        "attachment_count", "has_attachment", "location", "optional", "forfeited", "suggested_play_order",
+        "prerequisite_match_ids_csv", "rushb_id", "open_graph_image_file_name", "open_graph_image_content_type",
+        "open_graph_image_file_size", "scheduled_time", "started_at", "underway_at", "completed_at", "created_at",
+        "updated_at", "attachments",
+    )
+
+    _NESTED = {"attachments": ("match_attachment", MatchAttachment)}
+
+
+class Participant(Record):
+    """
+    A participant record.
+    """
+
+    ENVELOPE = "participant"
+
+    __slots__ = (
+        "id", "tournament_id", "name", "display_name", "username", "challonge_username",
+        "challonge_email_address_verified", "invite_email", "email_hash", "misc", "seed", "final_rank", "group_id",
+        "group_player_ids", "active", "on_waiting_list", "checked_in", "can_check_in", "check_in_open",
+        "invitation_id", "invitation_pending", "removable", "reactivatable", "confirm_remove", "has_irrelevant_seed",
+        "participatable_or_invitation_attached", "display_name_with_invitation_email_address", "icon",
+        "attached_participatable_portrait_url", "ranked_member_id", "checked_in_at", "created_at", "updated_at",
+        "matches",
+    )
+
+    _NESTED = {"matches": ("match", Match)}
+
+
+class Tournament(Record):
+    """
+    A tournament record. When it was fetched with include_participants=1 or include_matches=1, ``participants`` and
+    ``matches`` hold Participant and Match models.
+    """
+
+    ENVELOPE = "tournament"
+
+    __slots__ = (
+        "id", "url", "subdomain", "name", "description", "description_source", "full_challonge_url",
+        "live_image_url", "sign_up_url", "tournament_type", "state", "progress_meter", "participants_count",
+        "signup_cap", "game_id", "game_name", "category", "event_id", "open_signup", "private", "teams",
+        "hide_forum", "hide_seeds", "show_rounds", "quick_advance", "sequential_pairings", "hold_third_place_match",
+        "grand_finals_modifier", "swiss_rounds", "ranked_by", "tie_breaks", "pts_for_bye", "pts_for_game_tie",
+        "pts_for_game_win", "pts_for_match_tie", "pts_for_match_win", "rr_pts_for_game_tie", "rr_pts_for_game_win",
+        "rr_pts_for_match_tie", "rr_pts_for_match_win", "accept_attachments", "allow_participant_match_reporting",
+        "require_score_agreement", "review_before_finalizing", "notify_users_when_matches_open",
+        "notify_users_when_the_tournament_ends", "anonymous_voting", "accepting_predictions", "prediction_method",
+        "max_predictions_per_user", "public_predictions_before_start_time", "group_stages_enabled",
+        "group_stages_were_started", "participants_locked", "participants_swappable", "team_convertable",
+        "created_by_api", "credit_capped", "ranked", "spam", "ham", "check_in_duration", "start_at", "started_at",
+        "started_checking_in_at", "predictions_opened_at", "completed_at", "created_at", "updated_at",
+        "participants", "matches",
+    )
+
+    _NESTED = {"participants": ("participant", Participant), "matches": ("match", Match)}
+
+
+# envelope key -> model class
+MODELS = {model.ENVELOPE: model for model in (Tournament, Participant, Match, MatchAttachment)}
+
+
+def to_models(data, envelope: str):
+    """
+    Converts an unwrapped record (or a list of them) into models. Data of any other kind is returned as-is.
+
+    :param data: An unwrapped API response.
+    :param envelope: The envelope key the response was unwrapped with, e.g. "match".
+    """
+
+    model = MODELS.get(envelope)
+
+    if model is None:
+        return data
+
+    if isinstance(data, list):
+        return [model.from_dict(d) for d in data]
+
+    return model.from_dict(data) if isinstance(data, dict) else data
@@ -0,0 +1,148 @@
+import random
+import threading
+
+
+class RetryStats:
+    """
+    Thread-safe counters describing how much work (and latency) retries have added.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.retries = 0
+        self.retry_delay = 0.0
+        self.verifications = 0
+        self.verified = 0
+        self.gave_up = 0
+
+    def record(self, requests: int = 0, retries: int = 0, retry_delay: float = 0.0, verifications: int = 0,
+               verified: int = 0, gave_up: int = 0):
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.retry_delay += retry_delay
+            self.verifications += verifications
+            self.verified += verified
+            self.gave_up += gave_up
+
+    def as_dict(self):
+        """
+        Returns a snapshot of every counter. ``retry_delay`` is the total number of seconds spent backing off.
+        """
+
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "retry_delay": self.retry_delay,
+                "verifications": self.verifications,
+                "verified": self.verified,
+                "gave_up": self.gave_up,
+            }
+
+
+class VerifyBeforeRetry:
+    """
+    Describes how to find out whether a failed, non-idempotent request (e.g. a POST that creates a record) was
+    applied by the server anyway, so that it is never applied twice.
+    """
+
+    def __init__(self, fetch, predicate):
+        """
+        :param fetch: A callable returning the record(s) the request would have created - e.g. a participant list.
+               For asynchronous clients it may return an awaitable.
+        :param predicate: A callable that returns True for the record created by the request.
+        """
+
+        self.fetch = fetch
+        self.predicate = predicate
+
+    def find(self, records):
+        """
+        Returns the first record matching the predicate, or None.
+
+        :param records: The fetched record(s).
+        """
+
+        if not isinstance(records, list):
+            records = [records]
+
+        return next((r for r in records if self.predicate(r)), None)
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are re-sent, and how long to back off in between.
+
+    GET, PUT and DELETE requests are idempotent, so they are retried after any transient failure. A POST is only
+    re-sent blindly if it provably never reached Challonge (e.g. the connection could not be established, or the
+    server answered 429 Too Many Requests). Otherwise, it is re-sent only if it provides a VerifyBeforeRetry lookup
+    and that lookup shows the first attempt was not applied.
+
+    Back-off is exponential (``backoff_base * 2 ** attempt``, capped at ``backoff_max``) with a random jitter.
+    """
+
+    RETRY = "retry"
+    VERIFY = "verify"
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 jitter: float = 1.0, retry_statuses=(429, 500, 502, 503, 504)):
+        """
+        :param max_retries: The maximum number of times a request is re-sent.
+        :param backoff_base: The back-off before the first retry, in seconds (before jitter).
+        :param backoff_max: The longest back-off between two attempts, in seconds.
+        :param jitter: The fraction of each back-off that is randomized; 1.0 is "full jitter", 0.0 disables jitter.
+        :param retry_statuses: The HTTP status codes that are considered transient.
+        """
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+
+        self.stats = RetryStats()
+
+    def decide(self, method: str, attempt: int, status_code: int = None, may_have_applied: bool = True):
+        """
+        Returns RETRY if the request can be re-sent as-is, VERIFY if it can only be re-sent once a lookup shows that
+        it was not applied, or None if it must not be re-sent.
+
+        :param method: The HTTP method of the request.
+        :param attempt: How many times the request has already been re-sent.
+        :param status_code: The HTTP status code of the failed attempt, or None if no response was received.
+        :param may_have_applied: False if the failed attempt provably never reached the server.
+        """
+
+        if attempt >= self.max_retries:
+            return None
+
+        if status_code is not None:
+            if status_code not in self.retry_statuses:
+                return None
+
+            if status_code == 429:
+                may_have_applied = False
+
+        if method != "POST" or not may_have_applied:
+            return self.RETRY
+
+        return self.VERIFY
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Returns how many seconds to wait before the next attempt.
+
+        :param attempt: How many times the request has already been re-sent.
+        :param retry_after: The server's Retry-After value, in seconds; the back-off is never shorter than this.
+        """
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay -= delay * self.jitter * random.random()
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
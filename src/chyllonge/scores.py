@@ -0,0 +1,273 @@
+import re
+from operator import gt, itemgetter
+from itertools import repeat
+from functools import lru_cache
+from typing import List, NamedTuple
+
+from .exceptions import ChallongeAPIException
+
+# a whole scores_csv string: one or more comma-separated sets such as "3-1", "-1-3" or "3--1" (scores may be
+# negative)
+_SCORES_CSV = re.compile(r"-?[0-9]+--?[0-9]+(?:,-?[0-9]+--?[0-9]+)*")
+
+# many scores_csv strings joined together, each one followed by a semicolon
+_JOINED_SCORES_CSV = re.compile(r"(?:-?[0-9]+--?[0-9]+[,;])*")
+
+# the dash between the two scores of a set (as opposed to a minus sign, which never follows a digit)
+_SET_DASH = re.compile(r"(?<=[0-9])-")
+
+
+class ScoreSummary(NamedTuple):
+    """
+    The totals of a scores_csv string, from the perspective of player 1 and player 2. Margins are player 1's total
+    minus player 2's. A set that ends in a tie counts toward neither player's sets.
+    """
+
+    player1_games: int
+    player2_games: int
+    player1_sets: int
+    player2_sets: int
+    game_margin: int
+    set_margin: int
+
+
+# the ScoreSummary columns of a match without (valid) scores
+_NO_SUMMARY = (None,) * len(ScoreSummary._fields)
+
+
+def is_valid(scores_csv: str) -> bool:
+    """
+    Returns True if a scores_csv string is well-formed, e.g. "3-1" or "1-3,3-0,3-2".
+
+    :param scores_csv: A scores_csv string.
+    """
+
+    return isinstance(scores_csv, str) and _SCORES_CSV.fullmatch(scores_csv) is not None
+
+
+def parse_scores(scores_csv: str) -> List[tuple]:
+    """
+    Parses a scores_csv string into a list of (player 1 score, player 2 score) tuples, one per set.
+
+    :param scores_csv: A scores_csv string, e.g. "1-3,3-0,3-2" or "-1-3".
+    """
+
+    if not is_valid(scores_csv):
+        raise ChallongeAPIException(f"ERROR: {scores_csv!r} is not a valid scores_csv string (e.g. '3-1,2-3').")
+
+    return [tuple(int(score) for score in _SET_DASH.split(s)) for s in scores_csv.split(",")]
+
+
+def format_scores(sets) -> str:
+    """
+    Formats a list of (player 1 score, player 2 score) tuples as a scores_csv string, as MatchAPI.update expects it.
+
+    :param sets: An iterable of (player 1 score, player 2 score) tuples.
+    """
+
+    return ",".join(f"{p1}-{p2}" for p1, p2 in sets)
+
+
+def _summarize(scores_csv: str):
+    if not is_valid(scores_csv):
+        return None
+
+    player1_games = player2_games = player1_sets = player2_sets = 0
+
+    for s in scores_csv.split(","):
+        p1, p2 = _SET_DASH.split(s)
+        p1, p2 = int(p1), int(p2)
+
+        player1_games += p1
+        player2_games += p2
+        player1_sets += p1 > p2
+        player2_sets += p2 > p1
+
+    return ScoreSummary(player1_games, player2_games, player1_sets, player2_sets, player1_games - player2_games,
+                        player1_sets - player2_sets)
+
+
+@lru_cache(maxsize=4096)
+def summarize(scores_csv: str):
+    """
+    Returns the ScoreSummary of a scores_csv string, or None if it is empty or malformed.
+
+    :param scores_csv: A scores_csv string.
+    """
+
+    return _summarize(scores_csv)
+
+
+def _scores_csvs(items) -> list:
+    """
+    Returns the scores_csv string of every item, which may be a scores_csv string or a match record or model.
+    """
+
+    return [
+        item if item is None or isinstance(item, str) else item.get("match", item).get("scores_csv") for item in items
+    ]
+
+
+def _valid_distinct(scores: list) -> list:
+    """
+    Returns the distinct, valid scores_csv strings of a list. A single pass validates all of them at once; only if
+    that fails (or a string contains the separator) is each one checked on its own.
+    """
+
+    distinct = [s for s in dict.fromkeys(scores) if isinstance(s, str) and s]
+    joined = "".join(s + ";" for s in distinct)
+
+    if joined.count(";") != len(distinct) or _JOINED_SCORES_CSV.fullmatch(joined) is None:
+        distinct = [s for s in distinct if is_valid(s)]
+
+    return distinct
+
+
+def _numbers(distinct: list) -> str:
+    # every score of every set, separated by spaces
+    return _SET_DASH.sub(" ", ",".join(distinct)).replace(",", " ")
+
+
+def summarize_many(items) -> list:
+    """
+    Returns the ScoreSummary (or None) of every match in a list. Each distinct scores_csv string is only parsed
+    once, and all of them are validated and tokenized in one pass. This pays off when strings repeat (game counts
+    such as "2-0" or "3-1"); when most of them are distinct (e.g. point totals), it is slower than parsing each
+    string on its own.
+
+    :param items: Any iterable of scores_csv strings, or of match records or models.
+    """
+
+    scores = _scores_csvs(items)
+    distinct = _valid_distinct(scores)
+    numbers = list(map(int, _numbers(distinct).split()))
+    summaries = {}
+    start = 0
+
+    for scores_csv in distinct:
+        sets = scores_csv.count(",") + 1
+
+        if sets == 1:
+            player1_games, player2_games = numbers[start], numbers[start + 1]
+            player1_sets, player2_sets = int(player1_games > player2_games), int(player2_games > player1_games)
+        else:
+            player1, player2 = numbers[start:start + 2 * sets:2], numbers[start + 1:start + 2 * sets:2]
+            player1_games, player2_games = sum(player1), sum(player2)
+            player1_sets, player2_sets = sum(map(gt, player1, player2)), sum(map(gt, player2, player1))
+
+        start += 2 * sets
+
+        summaries[scores_csv] = ScoreSummary(player1_games, player2_games, player1_sets, player2_sets,
+                                             player1_games - player2_games, player1_sets - player2_sets)
+
+    return [summaries.get(scores_csv) for scores_csv in scores]
+
+
+def score_columns(items) -> dict:
+    """
+    Summarizes the scores of a whole match list at once, as columns (one list per field; see chyllonge.columns).
+    Matches without (valid) scores get None in every column but "valid". Strings are parsed as by summarize_many,
+    so this is only faster than splitting each string by hand when they repeat; score_arrays is faster either way.
+
+    :param items: Any iterable of scores_csv strings, or of match records or models.
+    :return: A dict with the columns "player1_games", "player2_games", "player1_sets", "player2_sets",
+             "game_margin", "set_margin" and "valid".
+    """
+
+    summaries = summarize_many(items)
+    rows = [s or _NO_SUMMARY for s in summaries]
+
+    columns = {field: list(map(itemgetter(i), rows)) for i, field in enumerate(ScoreSummary._fields)}
+    columns["valid"] = [s is not None for s in summaries]
+
+    return columns
+
+
+def score_arrays(items) -> dict:
+    """
+    Like score_columns, but returns NumPy arrays, and parses every distinct scores_csv string in a handful of
+    vectorized passes instead of one at a time. Matches without (valid) scores get 0 in every column but "valid".
+    Requires NumPy.
+
+    :param items: Any iterable of scores_csv strings, or of match records or models.
+    """
+
+    from .columns import _numpy  # columns imports this module
+
+    numpy = _numpy()
+
+    scores = _scores_csvs(items)
+    distinct = _valid_distinct(scores)
+
+    numbers = numpy.fromstring(_numbers(distinct), dtype=numpy.int64, sep=" ").reshape(-1, 2)
+
+    set_counts = numpy.fromiter((s.count(",") + 1 for s in distinct), dtype=numpy.int64, count=len(distinct))
+    starts = numpy.concatenate(([0], numpy.cumsum(set_counts)[:-1])).astype(numpy.int64)
+
+    player1, player2 = numpy.ascontiguousarray(numpy.transpose(numbers))
+
+    # one row per distinct string, plus a final row of zeros for matches without valid scores
+    totals = numpy.zeros((len(distinct) + 1, 4), dtype=numpy.int64)
+
+    if len(distinct):
+        totals[:-1, 0] = numpy.add.reduceat(player1, starts)
+        totals[:-1, 1] = numpy.add.reduceat(player2, starts)
+        totals[:-1, 2] = numpy.add.reduceat((player1 > player2).astype(numpy.int64), starts)
+        totals[:-1, 3] = numpy.add.reduceat((player2 > player1).astype(numpy.int64), starts)
+
+    rows = {s: i for i, s in enumerate(distinct)}
+    index = numpy.fromiter(map(rows.get, scores, repeat(len(distinct))), dtype=numpy.int64, count=len(scores))
+    totals = totals[index]
+
+    return {
+        "player1_games": totals[:, 0],
+        "player2_games": totals[:, 1],
+        "player1_sets": totals[:, 2],
+        "player2_sets": totals[:, 3],
+        "game_margin": totals[:, 0] - totals[:, 1],
+        "set_margin": totals[:, 2] - totals[:, 3],
+        "valid": index != len(distinct),
+    }
+
+
+def participant_totals(matches) -> dict:
+    """
+    Aggregates every completed match's result and scores per participant.
+
+    :param matches: Any iterable of match records or models.
+    :return: A dict mapping each participant ID to a dict of totals: "matches", "wins", "losses", "ties",
+             "sets_won", "sets_lost", "games_won" and "games_lost".
+    """
+
+    matches = [m.get("match", m) for m in matches]
+    matches = [m for m in matches if m.get("state") == "complete" and m.get("player1_id") is not None
+               and m.get("player2_id") is not None]
+
+    totals = {}
+
+    for match, summary in zip(matches, summarize_many(matches)):
+        games = (summary.player1_games, summary.player2_games) if summary else (0, 0)
+        sets = (summary.player1_sets, summary.player2_sets) if summary else (0, 0)
+        winner_id = match.get("winner_id")
+
+        for player_id, us, them in ((match["player1_id"], 0, 1), (match["player2_id"], 1, 0)):
+            if player_id not in totals:
+                totals[player_id] = {"matches": 0, "wins": 0, "losses": 0, "ties": 0, "sets_won": 0,
+                                     "sets_lost": 0, "games_won": 0, "games_lost": 0}
+
+            player = totals[player_id]
+
+            player["matches"] += 1
+            player["games_won"] += games[us]
+            player["games_lost"] += games[them]
+            player["sets_won"] += sets[us]
+            player["sets_lost"] += sets[them]
+
+            if winner_id is None:
+                player["ties"] += 1
+            elif str(winner_id) == str(player_id):
+                player["wins"] += 1
+            else:
+                player["losses"] += 1
+
+    return totals
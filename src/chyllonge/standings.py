@@ -0,0 +1,337 @@
+import threading
+from itertools import groupby
+
+from .bracket import _same, normalize_tournament_type
+from .exceptions import ChallongeAPIException
+from .scores import summarize
+
+RANKED_BY = ("match wins", "game wins", "points scored", "points difference", "custom")
+
+TIE_BREAKS = (
+    "match wins vs tied", "game wins", "game win percentage", "points scored", "points difference", "median buchholz",
+)
+
+DEFAULT_TIE_BREAKS = ("match wins vs tied", "game wins", "points scored")
+
+# Challonge's defaults for the pts_for_* (Swiss) and rr_pts_for_* (round robin, ranked by "custom") settings
+DEFAULT_POINTS = {"match_win": 1.0, "match_tie": 0.5, "game_win": 0.0, "game_tie": 0.0, "bye": 1.0}
+
+# the standings column each round robin ranking is based on; Swiss tournaments are always ranked by points
+_PRIMARY = {
+    "match wins": "points", "game wins": "game_wins", "points scored": "points_scored",
+    "points difference": "points_difference", "custom": "points",
+}
+
+_COUNTERS = (
+    "matches", "wins", "losses", "ties", "game_wins", "game_losses", "game_ties", "points_scored", "points_against",
+)
+
+
+def _point_values(tournament, tournament_type: str, ranked_by: str, points: dict) -> dict:
+    """
+    Returns the points awarded for a match win, match tie, game win, game tie and bye, as configured on the
+    tournament (and overridden by ``points``).
+    """
+
+    values = dict(DEFAULT_POINTS)
+
+    if tournament_type == "swiss":
+        prefix = "pts_for_"
+    elif ranked_by == "custom":
+        prefix = "rr_pts_for_"
+    else:
+        prefix = None
+
+    if prefix:
+        for name in values:
+            value = tournament.get(prefix + name)
+
+            if value is not None:
+                values[name] = float(value)
+
+    if tournament_type != "swiss":
+        values["bye"] = 0.0
+
+    for name, value in (points or {}).items():
+        if name not in values:
+            raise ChallongeAPIException(f"ERROR: Unknown point setting {name!r}; expected one of {list(values)}.")
+
+        values[name] = float(value)
+
+    return values
+
+
+def _result(match: dict):
+    """
+    Returns what a match contributes to the standings, or None if it does not count (yet).
+    """
+
+    player1_id, player2_id = match.get("player1_id"), match.get("player2_id")
+
+    if match.get("state") != "complete" or player1_id is None or player2_id is None:
+        return None
+
+    scores_csv = match.get("scores_csv")
+    summary = summarize(scores_csv) if isinstance(scores_csv, str) else None
+
+    if summary:
+        games = (summary.player1_games, summary.player2_games, summary.player1_sets, summary.player2_sets,
+                 scores_csv.count(",") + 1 - summary.player1_sets - summary.player2_sets)
+    else:
+        games = (0, 0, 0, 0, 0)
+
+    winner_id = match.get("winner_id")
+
+    if winner_id is None:
+        outcome = 0
+    else:
+        outcome = 1 if _same(winner_id, player1_id) else 2
+
+    return (player1_id, player2_id, outcome) + games
+
+
+def _tied(rows: list, key):
+    # splits rows into groups of equal key, best first
+    return [list(group) for _, group in groupby(sorted(rows, key=key, reverse=True), key=key)]
+
+
+class Standings:
+    """
+    Computes round robin and Swiss standings locally, from a tournament's match list and its own point configuration
+    (``ranked_by``, the ``rr_pts_for_*`` and ``pts_for_*`` settings and ``tie_breaks``), without waiting for
+    Challonge to rank the participants.
+
+    Results are applied incrementally: applying a match (or a correction to one) only updates the totals of its two
+    players, so a live leaderboard costs no API calls beyond the ones that report the scores. The ranking itself is
+    only recomputed when it is read after a change.
+    """
+
+    def __init__(self, matches: list = (), tournament: dict = None, participants: list = None,
+                 tournament_type: str = None, ranked_by: str = None, tie_breaks: list = None, points: dict = None):
+        """
+        :param matches: The tournament's match list, as returned by MatchAPI.get_all.
+        :param tournament: The tournament record, as returned by TournamentAPI.get; its tournament type, ranking and
+               point settings are used unless they are overridden below.
+        :param participants: The participants to rank (records or IDs), so that participants without a match (yet)
+               are ranked, and Swiss byes are counted; defaults to everyone who appears in a match.
+        :param tournament_type: "round robin" or "swiss".
+        :param ranked_by: One of RANKED_BY (round robin only); defaults to "match wins".
+        :param tie_breaks: Any of TIE_BREAKS, in order; defaults to DEFAULT_TIE_BREAKS.
+        :param points: Overrides of the points awarded per outcome, e.g. ``{"match_win": 3, "match_tie": 1}``; see
+               DEFAULT_POINTS.
+        """
+
+        tournament = tournament or {}
+        tournament = tournament.get("tournament", tournament)
+
+        self.tournament_type = normalize_tournament_type(tournament_type or tournament.get("tournament_type"))
+        self.ranked_by = ranked_by or tournament.get("ranked_by") or "match wins"
+        self.tie_breaks = tuple(tie_breaks or tournament.get("tie_breaks") or DEFAULT_TIE_BREAKS)
+
+        if self.ranked_by not in RANKED_BY:
+            raise ChallongeAPIException(f"ERROR: Unknown ranking {self.ranked_by!r}; expected one of {RANKED_BY}.")
+
+        for tie_break in self.tie_breaks:
+            if tie_break not in TIE_BREAKS:
+                raise ChallongeAPIException(f"ERROR: Unknown tie break {tie_break!r}; expected one of {TIE_BREAKS}.")
+
+        self.points = _point_values(tournament, self.tournament_type, self.ranked_by, points)
+        self.primary = "points" if self.tournament_type == "swiss" else _PRIMARY[self.ranked_by]
+
+        self._lock = threading.Lock()
+        self._matches = {}  # match ID -> match record (a private copy)
+        self._results = {}  # match ID -> what the match contributes (see _result)
+        self._totals = {}  # participant ID -> counters
+        self._ranking = None  # the cached ranking, cleared by every change
+
+        for participant in participants or ():
+            if hasattr(participant, "get"):
+                participant = participant.get("participant", participant).get("id")
+
+            self._totals[participant] = dict.fromkeys(_COUNTERS, 0)
+
+        for match in matches:
+            self._apply(match)
+
+    def apply(self, match: dict) -> bool:
+        """
+        Applies a (new or corrected) match record, e.g. one returned by MatchAPI.update or reported by
+        TournamentSync. Partial records are merged into the record already known for that match.
+
+        :param match: A match record.
+        :return: True if the match changed the standings.
+        """
+
+        with self._lock:
+            return self._apply(match)
+
+    def _apply(self, match: dict) -> bool:
+        match = match.get("match", match)
+        match_id = str(match["id"])
+
+        record = dict(self._matches.get(match_id, {}))
+        record.update(match.to_dict() if hasattr(match, "to_dict") else match)
+        self._matches[match_id] = record
+
+        for slot in ("player1_id", "player2_id"):
+            if record.get(slot) is not None and record[slot] not in self._totals:
+                self._totals[record[slot]] = dict.fromkeys(_COUNTERS, 0)
+
+        previous, result = self._results.pop(match_id, None), _result(record)
+
+        if previous:
+            self._add(previous, -1)
+
+        if result:
+            self._results[match_id] = result
+            self._add(result, 1)
+
+        if previous != result or self.tournament_type == "swiss":
+            self._ranking = None  # a new Swiss pairing can change who has a bye
+
+        return previous != result
+
+    def _add(self, result: tuple, sign: int):
+        player1_id, player2_id, outcome, player1_games, player2_games, player1_sets, player2_sets, game_ties = result
+
+        for player_id, won, games_for, games_against, sets_won, sets_lost in (
+            (player1_id, 1, player1_games, player2_games, player1_sets, player2_sets),
+            (player2_id, 2, player2_games, player1_games, player2_sets, player1_sets),
+        ):
+            totals = self._totals[player_id]
+
+            totals["matches"] += sign
+            totals["wins"] += sign * (outcome == won)
+            totals["losses"] += sign * (outcome not in (0, won))
+            totals["ties"] += sign * (outcome == 0)
+            totals["game_wins"] += sign * sets_won
+            totals["game_losses"] += sign * sets_lost
+            totals["game_ties"] += sign * game_ties
+            totals["points_scored"] += sign * games_for
+            totals["points_against"] += sign * games_against
+
+    def standings(self) -> list:
+        """
+        Returns the current standings, best first.
+
+        :return: A list of dicts with the keys "rank" (tied participants share a rank), "participant_id", "points",
+                 "matches", "wins", "losses", "ties", "game_wins", "game_losses", "game_ties", "points_scored",
+                 "points_against", "points_difference", "byes" and "tie_breaks" (the value of each tie break that
+                 was needed to rank the participant, by name).
+        """
+
+        with self._lock:
+            if self._ranking is None:
+                self._ranking = self._rank()
+
+            return [dict(row, tie_breaks=dict(row["tie_breaks"])) for row in self._ranking]
+
+    def standing(self, participant_id) -> dict:
+        """
+        Returns a single participant's row of the standings.
+
+        :param participant_id: A participant ID.
+        """
+
+        for row in self.standings():
+            if _same(row["participant_id"], participant_id):
+                return row
+
+        raise ChallongeAPIException(f"ERROR: Participant {participant_id} is not part of these standings.")
+
+    def _byes(self) -> dict:
+        # a Swiss participant who is not paired in a round that has been paired had a bye in that round
+        if self.tournament_type != "swiss":
+            return {}
+
+        rounds = {}
+
+        for match in self._matches.values():
+            if match.get("player1_id") is not None and match.get("player2_id") is not None:
+                rounds.setdefault(match.get("round"), set()).update((match["player1_id"], match["player2_id"]))
+
+        return {p: sum(p not in paired for paired in rounds.values()) for p in self._totals}
+
+    def _rank(self) -> list:
+        byes = self._byes()
+        points = self.points
+        rows = {}
+
+        for participant_id, totals in self._totals.items():
+            row = dict(totals, participant_id=participant_id, byes=byes.get(participant_id, 0), tie_breaks={})
+
+            row["points"] = points["match_win"] * row["wins"] + points["match_tie"] * row["ties"] + \
+                points["game_win"] * row["game_wins"] + points["game_tie"] * row["game_ties"] + \
+                points["bye"] * row["byes"]
+            row["points_difference"] = row["points_scored"] - row["points_against"]
+
+            rows[participant_id] = row
+
+        ranking = []
+
+        for group in _tied(list(rows.values()), lambda r: r[self.primary]):
+            for tied in self._break_ties(group, self.tie_breaks, rows):
+                rank = len(ranking) + 1
+
+                for row in tied:
+                    row["rank"] = rank
+                    ranking.append(row)
+
+        return ranking
+
+    def _break_ties(self, group: list, tie_breaks: tuple, rows: dict) -> list:
+        if len(group) == 1 or not tie_breaks:
+            return [group]
+
+        name = tie_breaks[0]
+        values = self._tie_break_values(name, group, rows)
+
+        for row in group:
+            row["tie_breaks"][name] = values[row["participant_id"]]
+
+        tied = []
+
+        for subgroup in _tied(group, lambda r: values[r["participant_id"]]):
+            tied.extend(self._break_ties(subgroup, tie_breaks[1:], rows))
+
+        return tied
+
+    def _tie_break_values(self, name: str, group: list, rows: dict) -> dict:
+        if name == "game wins":
+            return {r["participant_id"]: r["game_wins"] for r in group}
+
+        if name == "game win percentage":
+            return {
+                r["participant_id"]: r["game_wins"] / max(r["game_wins"] + r["game_losses"] + r["game_ties"], 1)
+                for r in group
+            }
+
+        if name in ("points scored", "points difference"):
+            return {r["participant_id"]: r[name.replace(" ", "_")] for r in group}
+
+        members = {r["participant_id"] for r in group}
+
+        if name == "match wins vs tied":
+            # the match points each tied participant earned against the others
+            values = dict.fromkeys(members, 0.0)
+
+            for player1_id, player2_id, outcome, *_ in self._results.values():
+                if player1_id in members and player2_id in members:
+                    if outcome == 0:
+                        values[player1_id] += self.points["match_tie"]
+                        values[player2_id] += self.points["match_tie"]
+                    else:
+                        values[player1_id if outcome == 1 else player2_id] += self.points["match_win"]
+
+            return values
+
+        # median buchholz: the points of every opponent, except the best and the worst one
+        opponents = {p: [] for p in members}
+
+        for player1_id, player2_id, *_ in self._results.values():
+            if player1_id in members:
+                opponents[player1_id].append(rows[player2_id]["points"])
+            if player2_id in members:
+                opponents[player2_id].append(rows[player1_id]["points"])
+
+        return {p: sum(sorted(o)[1:-1]) if len(o) > 2 else sum(o) for p, o in opponents.items()}
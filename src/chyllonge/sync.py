@@ -0,0 +1,244 @@
+import time
+
+# seconds between two polls of a tournament, by state; None stops polling (the tournament can no longer change)
+DEFAULT_INTERVALS = {
+    "pending": 60.0,
+    "checking_in": 10.0,
+    "checked_in": 10.0,
+    "underway": 5.0,
+    "group_stages_underway": 5.0,
+    "group_stages_finalized": 10.0,
+    "awaiting_review": 30.0,
+    "complete": None,
+}
+
+
+class Change:
+    """
+    A record that was created, updated or deleted since the previous poll.
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    def __init__(self, tournament_id: str, kind: str, action: str, record: dict):
+        """
+        :param tournament_id: The tournament's ID (or URL), as it was passed to TournamentSync.track.
+        :param kind: "tournament", "participant" or "match".
+        :param action: CREATED, UPDATED or DELETED.
+        :param record: The record as it is now; for deleted records, only its ID is known.
+        """
+
+        self.tournament_id = tournament_id
+        self.kind = kind
+        self.action = action
+        self.record = record
+
+    def __repr__(self):
+        return f"Change({self.kind} {self.record.get('id')} {self.action} in {self.tournament_id})"
+
+
+class _Tracked:
+
+    def __init__(self, next_poll: float):
+        self.next_poll = next_poll
+        self.state = None
+        self.snapshot = None
+        self.versions = {}  # (kind, record ID) -> updated_at
+        self.idle_polls = 0
+
+
+class TournamentSync:
+    """
+    Mirrors a set of tournaments incrementally. Every poll fetches a tournament with its participants and matches
+    (one request), but only the records whose ``updated_at`` changed since the previous poll are reported, as a
+    stream of Change objects.
+
+    Each tournament is polled at an interval that depends on its state (often while it is underway, rarely while it
+    is pending, and never again once it is complete), and that stretches further while a tournament stays quiet. If
+    the TournamentAPI's HTTP methods have a ValidatorCache, quiet polls are also answered with 304 Not Modified and
+    skip the comparison entirely.
+    """
+
+    def __init__(self, tournaments, intervals: dict = None, default_interval: float = 30.0,
+                 idle_backoff: float = 1.5, max_idle_factor: float = 4.0, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param tournaments: A (blocking) TournamentAPI, e.g. ``ChallongeApi().tournaments``.
+        :param intervals: Per-state overrides of DEFAULT_INTERVALS, e.g. ``{"underway": 2}``.
+        :param default_interval: The interval for states missing from ``intervals``.
+        :param idle_backoff: The interval is multiplied by this factor after every poll that found no changes.
+        :param max_idle_factor: The interval never stretches beyond this multiple of the state's interval.
+        :param clock: A monotonic clock, in seconds.
+        :param sleep: The function used to wait between polls.
+        """
+
+        self.tournaments = tournaments
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.default_interval = default_interval
+        self.idle_backoff = idle_backoff
+        self.max_idle_factor = max_idle_factor
+        self.clock = clock
+        self.sleep = sleep
+
+        self.polls = 0
+        self.unchanged_polls = 0
+
+        self._tracked = {}
+
+    def track(self, tournament_id: str):
+        """
+        Starts mirroring a tournament; its first poll reports every record as created.
+
+        :param tournament_id: Tournament ID (e.g. 10230) or URL (e.g. 'single_elim' for challonge.com/single_elim).
+        """
+
+        if tournament_id not in self._tracked:
+            self._tracked[tournament_id] = _Tracked(self.clock())
+
+    def untrack(self, tournament_id: str):
+        self._tracked.pop(tournament_id, None)
+
+    @property
+    def tracked(self) -> list:
+        """
+        The tournaments that are still being polled.
+        """
+
+        return [t for t, tracked in self._tracked.items() if tracked.next_poll is not None]
+
+    def poll(self, tournament_id: str) -> list:
+        """
+        Polls one tournament now, and schedules its next poll.
+
+        :param tournament_id: A tracked tournament's ID or URL.
+        :return: A list of Change.
+        """
+
+        self.track(tournament_id)
+        tracked = self._tracked[tournament_id]
+
+        snapshot = self.tournaments.get(tournament_id, include_participants=1, include_matches=1)
+        self.polls += 1
+
+        # a revalidated (304) response hands back the very same object
+        changes = [] if snapshot is tracked.snapshot else self._diff(tournament_id, tracked, snapshot)
+
+        if not changes:
+            self.unchanged_polls += 1
+
+        tracked.snapshot = snapshot
+        tracked.state = snapshot.get("state")
+        tracked.idle_polls = 0 if changes else tracked.idle_polls + 1
+        tracked.next_poll = self._schedule(tracked)
+
+        return changes
+
+    def _schedule(self, tracked: _Tracked):
+        interval = self.intervals.get(tracked.state, self.default_interval)
+
+        if interval is None:
+            return None
+
+        return self.clock() + interval * min(self.max_idle_factor, self.idle_backoff ** tracked.idle_polls)
+
+    @staticmethod
+    def _records(snapshot: dict):
+        """
+        Yields the (kind, record) pairs of a snapshot; the tournament record is yielded without its participants and
+        matches.
+        """
+
+        yield "tournament", {k: v for k, v in snapshot.items() if k not in ("participants", "matches")}
+
+        for kind, key in (("participant", "participants"), ("match", "matches")):
+            for record in snapshot.get(key) or ():
+                # nested records are still wrapped in their envelope
+                yield kind, record.get(kind, record)
+
+    def _diff(self, tournament_id: str, tracked: _Tracked, snapshot: dict) -> list:
+        changes = []
+        versions = {}
+
+        for kind, record in self._records(snapshot):
+            key = (kind, str(record["id"]))
+            versions[key] = record.get("updated_at")
+
+            if key not in tracked.versions:
+                changes.append(Change(tournament_id, kind, Change.CREATED, record))
+            elif tracked.versions[key] != versions[key]:
+                changes.append(Change(tournament_id, kind, Change.UPDATED, record))
+
+        for kind, record_id in tracked.versions.keys() - versions.keys():
+            changes.append(Change(tournament_id, kind, Change.DELETED, {"id": record_id}))
+
+        tracked.versions = versions
+
+        return changes
+
+    def poll_due(self, on_error=None) -> list:
+        """
+        Polls every tournament whose next poll is due.
+
+        :param on_error: An optional callable taking a tournament ID and an exception. If given, a tournament that
+               fails to poll is retried after its usual interval (or default_interval, if its last known state stops
+               polling); otherwise, the exception propagates.
+        :return: A list of Change.
+        """
+
+        now = self.clock()
+        changes = []
+
+        for tournament_id, tracked in list(self._tracked.items()):
+            if tracked.next_poll is None or tracked.next_poll > now:
+                continue
+
+            try:
+                changes.extend(self.poll(tournament_id))
+            except Exception as e:
+                if on_error is None:
+                    raise
+
+                on_error(tournament_id, e)
+
+                # a failed poll says nothing about whether the tournament can still change, so it is always retried
+                interval = self.intervals.get(tracked.state)
+                tracked.next_poll = self.clock() + (interval if interval is not None else self.default_interval)
+
+        return changes
+
+    def next_poll_in(self):
+        """
+        Returns the number of seconds until the next poll is due, or None if every tournament is complete.
+        """
+
+        polls = [t.next_poll for t in self._tracked.values() if t.next_poll is not None]
+
+        return max(0.0, min(polls) - self.clock()) if polls else None
+
+    def changes(self, on_error=None):
+        """
+        Polls the tracked tournaments as they fall due, sleeping in between, and yields every Change. The generator
+        ends once every tracked tournament is complete.
+
+        :param on_error: See poll_due.
+        """
+
+        while True:
+            yield from self.poll_due(on_error)
+
+            delay = self.next_poll_in()
+
+            if delay is None:
+                return
+
+            if delay > 0:
+                self.sleep(delay)
+
+    def run(self, callback, on_error=None):
+        """
+        Like changes(), but passes every Change to ``callback`` instead.
+        """
+
+        for change in self.changes(on_error):
+            callback(change)
@@ -0,0 +1,122 @@
+import time
+import threading
+from datetime import datetime, timezone
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that paces outgoing requests. One instance can be shared by every thread (and every
+    ChallongeApiHttpMethods instance) in a process, so that all of them draw from the same budget.
+
+    The bucket adapts to the server: whenever Challonge answers with 429 Too Many Requests, the rate is cut (and all
+    callers pause for the duration of any Retry-After header), and every successful response then nudges the rate
+    back up toward ``rate``. Bulk jobs therefore settle just under the highest rate the server will sustain.
+    """
+
+    def __init__(self, rate: float = 10.0, capacity: float = None, min_rate: float = 0.5,
+                 decrease_factor: float = 0.5, increase_step: float = 0.1, max_throttle_retries: int = 5,
+                 clock=time.monotonic):
+        """
+        :param rate: The maximum sustained number of requests per second.
+        :param capacity: The maximum burst size. Defaults to ``rate``.
+        :param min_rate: The rate is never cut below this number of requests per second.
+        :param decrease_factor: The rate is multiplied by this factor whenever a request is throttled.
+        :param increase_step: The rate is increased by this many requests per second after every successful request,
+               up to ``rate``.
+        :param max_throttle_retries: How many times a throttled request is re-sent before giving up.
+        :param clock: A monotonic clock, in seconds.
+        """
+
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.min_rate = min_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.max_throttle_retries = max_throttle_retries
+        self.clock = clock
+
+        self.throttled_count = 0
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """
+        Takes one token and returns how many seconds the caller must wait before using it. This never blocks, which
+        makes it usable from both threads and coroutines.
+        """
+
+        with self._lock:
+            now = self.clock()
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """
+        Takes one token, sleeping until it may be used.
+        """
+
+        delay = self.reserve()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def penalize(self, retry_after: float = None):
+        """
+        Records a throttled request: cuts the rate and pauses every caller until ``retry_after`` seconds from now (or
+        for one token interval if the server did not say).
+
+        :param retry_after: The number of seconds the server asked us to wait, if any.
+        """
+
+        with self._lock:
+            now = self.clock()
+
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+
+    def reward(self):
+        """
+        Records a successful request, letting the rate recover toward its configured maximum.
+        """
+
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    @staticmethod
+    def parse_retry_after(value: str):
+        """
+        Parses a Retry-After header, which is either a number of seconds or an HTTP date. Returns a number of
+        seconds, or None if the header is missing or malformed.
+
+        :param value: The raw header value.
+        """
+
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
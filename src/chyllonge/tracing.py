@@ -0,0 +1,331 @@
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque
+
+from .instrumentation import RequestHook, RequestInfo
+
+# the span of the sub-API call in progress; a ContextVar follows asyncio tasks, and threads started by the bulk
+# helpers (see bulk._submit), so spans opened there are parented correctly
+_current_span = contextvars.ContextVar("chyllonge_current_span", default=None)
+
+# the arguments of sub-API methods that become span attributes (as "challonge.<name>")
+ID_ARGUMENTS = ("tournament_id", "match_id", "participant_id", "attachment_id")
+
+
+def current_span():
+    """
+    Returns the span of the sub-API call in progress (as created by the tracer), or None.
+    """
+
+    return _current_span.get()
+
+
+class Span:
+    """
+    A span recorded by RecordingTracer.
+    """
+
+    __slots__ = ("name", "parent", "attributes", "start", "end", "error")
+
+    def __init__(self, name: str, parent=None, attributes: dict = None):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self):
+        """
+        The span's duration in seconds, or None while it is open.
+        """
+
+        return None if self.end is None else self.end - self.start
+
+    def __repr__(self):
+        return f"Span({self.name!r}, attributes={self.attributes}, duration={self.duration})"
+
+
+class RecordingTracer:
+    """
+    A tracer that keeps the most recent finished spans in memory, e.g. to inspect a trace in tests or while
+    debugging. Any object with the same start_span and end_span methods can be used as a tracer; see
+    OpenTelemetryTracer.
+    """
+
+    def __init__(self, maxlen: int = 10000):
+        """
+        :param maxlen: The maximum number of finished spans kept; older spans are discarded first.
+        """
+
+        self.spans = deque(maxlen=maxlen)
+
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, parent=None, attributes: dict = None) -> Span:
+        """
+        Opens a span.
+
+        :param name: The name of the span, e.g. "TournamentAPI.start" or "POST tournaments/{tournament}/start.json".
+        :param parent: The parent span, if any.
+        :param attributes: The initial attributes of the span.
+        """
+
+        return Span(name, parent, attributes)
+
+    def end_span(self, span: Span, error: BaseException = None, attributes: dict = None):
+        """
+        Closes a span.
+
+        :param span: A span returned by start_span.
+        :param error: The exception the traced operation raised, if any.
+        :param attributes: Attributes to add to the span.
+        """
+
+        span.end = time.perf_counter()
+        span.error = error
+        span.attributes.update(attributes or {})
+
+        with self._lock:
+            self.spans.append(span)
+
+    def children(self, span: Span) -> list:
+        """
+        Returns the finished children of a span, in the order they finished.
+        """
+
+        with self._lock:
+            return [s for s in self.spans if s.parent is span]
+
+
+class OpenTelemetryTracer:
+    """
+    Reports spans to OpenTelemetry (``pip install opentelemetry-api``, plus an SDK and exporter of your choice).
+    Spans without a chyllonge parent are parented to the current OpenTelemetry span, so they join the caller's
+    traces.
+    """
+
+    def __init__(self, tracer=None):
+        """
+        :param tracer: An ``opentelemetry.trace.Tracer``. Defaults to the global tracer provider's "chyllonge" tracer.
+        """
+
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            from .exceptions import ChallongeAPIException
+
+            raise ChallongeAPIException(
+                'ERROR: OpenTelemetryTracer requires opentelemetry-api. Install it with '
+                '"pip install opentelemetry-api".'
+            )
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("chyllonge")
+
+    def start_span(self, name: str, parent=None, attributes: dict = None):
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+
+        return self.tracer.start_span(name, context=context, attributes=attributes)
+
+    def end_span(self, span, error: BaseException = None, attributes: dict = None):
+        if attributes:
+            span.set_attributes(attributes)
+
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(error)))
+
+        span.end()
+
+
+class TracingHook(RequestHook):
+    """
+    Opens a span for every HTTP request (every attempt, retries included), as a child of the sub-API call that sent
+    it. ChallongeApiHttpMethods installs one when it is given a tracer.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def before_request(self, info: RequestInfo):
+        attributes = {
+            "http.request.method": info.method, "url.full": info.url, "chyllonge.endpoint": info.endpoint,
+            "chyllonge.attempt": info.attempt, "chyllonge.throttle_retries": info.throttle_retries,
+        }
+
+        info.span = self.tracer.start_span(f"{info.method} {info.endpoint}", _current_span.get(), attributes)
+
+    def after_request(self, info: RequestInfo):
+        attributes = {"http.response.status_code": info.status, "http.response.body.size": info.response_bytes,
+                      "chyllonge.connect": info.connect, "chyllonge.ttfb": info.ttfb}
+
+        self.tracer.end_span(info.span, info.error, {k: v for k, v in attributes.items() if v is not None})
+
+
+def traced(cls):
+    """
+    A class decorator that opens a span around every public method of a sub-API class (defined on that class), when
+    its ChallongeApiHttpMethods has a tracer. Methods that return an awaitable (as the regular sub-APIs do on top of
+    AsyncChallongeApiHttpMethods) or a generator, coroutines and (async) generators are traced until they finish. The
+    method's tournament, match, participant and attachment IDs become span attributes.
+    """
+
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(value):
+            setattr(cls, name, _trace(value, f"{cls.__name__}.{name}"))
+
+    return cls
+
+
+def _trace(function, name: str):
+    signature = inspect.signature(function)
+    arguments = [a for a in ID_ARGUMENTS if a in signature.parameters]
+
+    def start(self, args, kwargs):
+        tracer = getattr(self.http, "tracer", None)
+
+        if tracer is None:
+            return None, None
+
+        try:
+            bound = signature.bind_partial(self, *args, **kwargs).arguments
+        except TypeError:
+            bound = {}
+
+        attributes = {f"challonge.{a}": str(bound[a]) for a in arguments if bound.get(a) is not None}
+
+        return tracer, tracer.start_span(name, _current_span.get(), attributes)
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def coroutine_wrapper(self, *args, **kwargs):
+            tracer, span = start(self, args, kwargs)
+
+            if tracer is None:
+                return await function(self, *args, **kwargs)
+
+            return await _finish_awaitable(tracer, span, function(self, *args, **kwargs))
+
+        return coroutine_wrapper
+
+    if inspect.isasyncgenfunction(function):
+        @functools.wraps(function)
+        def async_generator_wrapper(self, *args, **kwargs):
+            tracer, span = start(self, args, kwargs)
+
+            if tracer is None:
+                return function(self, *args, **kwargs)
+
+            return _traced_async_generator(tracer, span, function(self, *args, **kwargs))
+
+        return async_generator_wrapper
+
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(self, *args, **kwargs):
+            tracer, span = start(self, args, kwargs)
+
+            if tracer is None:
+                return function(self, *args, **kwargs)
+
+            return _traced_generator(tracer, span, function(self, *args, **kwargs))
+
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        tracer, span = start(self, args, kwargs)
+
+        if tracer is None:
+            return function(self, *args, **kwargs)
+
+        token = _current_span.set(span)
+
+        try:
+            result = function(self, *args, **kwargs)
+        except BaseException as e:
+            tracer.end_span(span, e)
+            raise
+        finally:
+            _current_span.reset(token)
+
+        if inspect.isawaitable(result):
+            # the request is only sent once the caller awaits it
+            return _finish_awaitable(tracer, span, result)
+
+        if inspect.isgenerator(result):
+            # e.g. the stream of a bulk helper such as run_batches: its requests are only sent as it is consumed
+            return _traced_generator(tracer, span, result)
+
+        if inspect.isasyncgen(result):
+            return _traced_async_generator(tracer, span, result)
+
+        tracer.end_span(span)
+
+        return result
+
+    return wrapper
+
+
+async def _finish_awaitable(tracer, span, awaitable):
+    token = _current_span.set(span)
+
+    try:
+        result = await awaitable
+    except BaseException as e:
+        tracer.end_span(span, e)
+        raise
+    finally:
+        _current_span.reset(token)
+
+    tracer.end_span(span)
+
+    return result
+
+
+def _traced_generator(tracer, span, generator):
+    # the span is only current while the generator runs, not while the caller handles what it yielded
+    try:
+        while True:
+            token = _current_span.set(span)
+
+            try:
+                item = next(generator)
+            except StopIteration:
+                break
+            finally:
+                _current_span.reset(token)
+
+            yield item
+    except BaseException as e:
+        generator.close()
+        tracer.end_span(span, None if isinstance(e, GeneratorExit) else e)
+        raise
+
+    tracer.end_span(span)
+
+
+async def _traced_async_generator(tracer, span, generator):
+    try:
+        while True:
+            token = _current_span.set(span)
+
+            try:
+                item = await generator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _current_span.reset(token)
+
+            yield item
+    except BaseException as e:
+        await generator.aclose()
+        tracer.end_span(span, None if isinstance(e, GeneratorExit) else e)
+        raise
+
+    tracer.end_span(span)
@@ -0,0 +1,136 @@
+import time
+import threading
+
+from .cache import ResponseCache
+from .exceptions import ChallongeAPIException
+
+# how a pre-flight check is done: always against freshly fetched data, against data that is already known (fetching
+# it only if it is not), or not at all (leaving the check to Challonge)
+STRICT = "strict"
+CACHED = "cached"
+SERVER = "server"
+
+MODES = (STRICT, CACHED, SERVER)
+
+# the pre-flight checks, by name
+MIN_PARTICIPANTS = "min_participants"
+
+
+class ValidationPolicy:
+    """
+    Decides how the client's pre-flight checks are done, e.g. the check that a tournament has at least two
+    participants before TournamentAPI.start sends the request. Strict checks fetch whatever they need, as the client
+    always has; cached checks reuse what earlier responses already revealed (participant lists, tournament records
+    and their ``participants_count``, including the ones TournamentSync and ResponseCache work with), and only fetch
+    what is unknown; server checks skip the local check and leave it to Challonge.
+
+    Either way, a failed check raises a ChallongeValidationException. Pass the policy to ChallongeApiHttpMethods, so
+    it learns from every response, and forgets what it knew about a tournament whenever it is written to.
+    """
+
+    def __init__(self, mode: str = CACHED, checks: dict = None, max_age: float = 30.0, clock=time.monotonic):
+        """
+        :param mode: STRICT, CACHED or SERVER.
+        :param checks: Per-check overrides of ``mode``, e.g. ``{MIN_PARTICIPANTS: STRICT}``.
+        :param max_age: The number of seconds for which a learned fact is reused by cached checks.
+        :param clock: A monotonic clock, in seconds.
+        """
+
+        for m in (mode,) + tuple((checks or {}).values()):
+            if m not in MODES:
+                raise ChallongeAPIException(f"ERROR: Unknown validation mode {m!r}; expected one of {MODES}.")
+
+        self.mode = mode
+        self.checks = dict(checks or {})
+        self.max_age = max_age
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._participant_counts = {}  # tournament ID or URL -> (learned at, participant count)
+
+    def mode_for(self, check: str) -> str:
+        """
+        Returns how a pre-flight check is done.
+
+        :param check: The name of the check, e.g. MIN_PARTICIPANTS.
+        """
+
+        return self.checks.get(check, self.mode)
+
+    def participant_count(self, tournament_id):
+        """
+        Returns a tournament's participant count, if it was learned less than ``max_age`` seconds ago.
+
+        :param tournament_id: A tournament ID or URL.
+        """
+
+        with self._lock:
+            entry = self._participant_counts.get(str(tournament_id))
+
+        if entry is None or self.clock() - entry[0] > self.max_age:
+            return None
+
+        return entry[1]
+
+    def record_participant_count(self, count: int, *tournament_ids):
+        """
+        Remembers a tournament's participant count.
+
+        :param count: The number of participants.
+        :param tournament_ids: Every identifier of the tournament (its ID and/or URL).
+        """
+
+        entry = (self.clock(), count)
+
+        with self._lock:
+            for tournament_id in tournament_ids:
+                if tournament_id is not None:
+                    self._participant_counts[str(tournament_id)] = entry
+
+    def forget(self, tournament_id=None):
+        """
+        Forgets everything known about a tournament (or about every tournament).
+
+        :param tournament_id: A tournament ID or URL.
+        """
+
+        with self._lock:
+            if tournament_id is None:
+                self._participant_counts.clear()
+                return
+
+            stale = self._participant_counts.pop(str(tournament_id), None)
+
+            # the same tournament may be known under its ID and its URL
+            if stale is not None:
+                for key in [k for k, v in self._participant_counts.items() if v is stale]:
+                    del self._participant_counts[key]
+
+    def observe(self, method: str, api_suffix: str, data, envelope: str = None):
+        """
+        Learns from a response: participant lists and tournament records reveal participant counts, and writes make
+        what was known about their tournament stale.
+
+        :param method: The HTTP method of the request.
+        :param api_suffix: The API path of the request.
+        :param data: The (unwrapped) response.
+        :param envelope: The envelope key the response was unwrapped with.
+        """
+
+        tournament_id, kind = ResponseCache.classify(api_suffix)
+
+        if tournament_id is None:
+            return
+
+        if method != "GET":
+            self.forget(tournament_id)
+
+        if kind == "participants" and method == "GET" and isinstance(data, list):
+            self.record_participant_count(len(data), tournament_id)
+        elif envelope == "tournament" and hasattr(data, "get"):
+            # e.g. TournamentAPI.get, or the record returned by TournamentAPI.start
+            participants = data.get("participants")
+            count = len(participants) if isinstance(participants, list) else data.get("participants_count")
+
+            if count is not None:
+                self.record_participant_count(count, tournament_id, data.get("id"), data.get("url"))
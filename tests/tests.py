@@ -1,8 +1,39 @@
+import os
+import re
+import json
+import sys
 import random
+import time
+import asyncio
 import string
 import unittest
+import subprocess
 from datetime import datetime, timedelta
-from src.chyllonge.api import ChallongeApi, ChallongeApiHttpMethods
+from src.chyllonge.api import ChallongeApi, ChallongeApiHttpMethods, MatchAPI, ParticipantAPI, TournamentAPI
+from src.chyllonge.aio import AsyncChallongeApi, AsyncTournamentAPI
+from src.chyllonge.archive import TournamentArchive
+from src.chyllonge.bracket import Bracket
+from src.chyllonge.bulk import run_batches, run_chains, run_chains_async
+from src.chyllonge.cache import ResponseCache, ValidatorCache, request_key
+from src.chyllonge.codec import decode, default_loads
+from src.chyllonge.columns import MISSING_ID, match_array, match_columns, participant_columns
+from src.chyllonge.exceptions import (ChallongeAPIException, ChallongeAuthException, ChallongeNotFoundException,
+                                      ChallongeRateLimitException, ChallongeServerException,
+                                      ChallongeValidationException, MAX_ERROR_BODY, parse_error_body, response_error)
+from src.chyllonge.instrumentation import LatencyHistogram, RequestHook, RequestInfo, endpoint_template
+from src.chyllonge.models import Match, Participant, Tournament, to_models
+from src.chyllonge.retry import RetryPolicy, VerifyBeforeRetry
+from src.chyllonge.scores import format_scores, parse_scores, participant_totals, score_arrays, score_columns
+from src.chyllonge.standings import Standings
+from src.chyllonge.sync import Change, TournamentSync
+from src.chyllonge.throttle import TokenBucket
+from src.chyllonge.tracing import RecordingTracer, _current_span, current_span
+from src.chyllonge.validation import CACHED, MIN_PARTICIPANTS, SERVER, STRICT, ValidationPolicy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def delete_all_tournaments():
@@ -10,12 +41,7 @@ def delete_all_tournaments():
     Deletes all tournaments associated with your account.
     """
 
-    api = ChallongeApi()
-
-    all_tournament_ids = [t["id"] for t in api.tournaments.get_all()]
-
-    for tid in all_tournament_ids:
-        api.tournaments.delete(tournament_id=tid)
+    ChallongeApi().tournaments.delete_all()
 
 
 class ChallongeAPITests(unittest.TestCase):
@@ -46,6 +72,33 @@ class ChallongeAPIHttpMethodTests(unittest.TestCase):
         print(self.http.tz_utc_offset_string)
         self.assertIsNotNone(self.http.tz_utc_offset_string)
 
+    def test_pooling_keep_alive_and_timeout(self):
+        import requests
+
+        http = ChallongeApiHttpMethods(pool_connections=2, pool_maxsize=16, pool_block=True, keep_alive=False,
+                                       timeout=(1.5, 7.0))
+        adapter = http.session.get_adapter(http.base_challonge_url)
+
+        self.assertEqual((adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block), (2, 16, True))
+        self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 16)
+        self.assertIs(http.session.get_adapter("http://localhost/"), adapter)
+        self.assertEqual(http.session.headers["Connection"], "close")
+        self.assertEqual(ChallongeApiHttpMethods().session.headers["Connection"], "keep-alive")
+
+        sent = []
+
+        class Session:
+            def request(self, method, url, **kwargs):
+                sent.append(kwargs["timeout"])
+                response = requests.Response()
+                response.status_code, response._content = 200, b'{"tournament": {"id": 1}}'
+                return response
+
+        http.session = Session()
+
+        self.assertEqual(http.get("tournaments/1.json", envelope="tournament"), {"id": 1})
+        self.assertEqual(sent, [(1.5, 7.0)])
+
 
 class TournamentAPITests(unittest.TestCase):
 
@@ -473,3 +526,1356 @@ class AttachmentAPITests(unittest.TestCase):
         attachments = self.api.attachments.get_all(self.tournament["id"], self.current_match["id"])
 
         self.assertTrue(len(attachments) == 0)
+
+
+class AsyncChallongeAPITests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.api = AsyncChallongeApi()
+
+        an_hour_from_now = ((datetime.now() + timedelta(hours=1)).isoformat() + self.api.http.tz_utc_offset_string)
+
+        self.tournament = await self.api.tournaments.create(
+            name="chyllonge-temp",
+            start_at=an_hour_from_now,
+            check_in_duration=60
+        )
+
+    async def asyncTearDown(self):
+        await self.api.aclose()
+        delete_all_tournaments()
+
+    async def test_heartbeat(self):
+        response = await self.api.get_heartbeat()
+        self.assertIsNotNone(response)
+
+    async def test_start_tournament(self):
+        await asyncio.gather(
+            self.api.participants.add(self.tournament["id"], name="Alice"),
+            self.api.participants.add(self.tournament["id"], name="Bob")
+        )
+
+        await self.api.tournaments.process_checkins(self.tournament["id"])
+        await self.api.tournaments.start(self.tournament["id"])
+
+        t = await self.api.tournaments.get(self.tournament["id"])
+
+        self.assertTrue(t["state"] == "underway")
+
+    async def test_get_matches_concurrently(self):
+        await self.api.participants.add_multiple(self.tournament["id"], names=["Alice", "Bob", "Charlie", "David"])
+        await self.api.tournaments.process_checkins(self.tournament["id"])
+        await self.api.tournaments.start(self.tournament["id"])
+
+        match_ids = [m["id"] for m in await self.api.matches.get_all(self.tournament["id"])]
+        matches = await asyncio.gather(*[self.api.matches.get(self.tournament["id"], m) for m in match_ids])
+
+        self.assertTrue([m["id"] for m in matches] == match_ids)
+
+
+class TokenBucketTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: self.now)
+
+    def test_burst_is_free(self):
+        self.assertEqual(self.bucket.reserve(), 0.0)
+        self.assertEqual(self.bucket.reserve(), 0.0)
+
+    def test_exhausted_bucket_paces_requests(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+
+        self.assertAlmostEqual(self.bucket.reserve(), 0.5)
+        self.assertAlmostEqual(self.bucket.reserve(), 1.0)
+
+    def test_bucket_refills_over_time(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        self.now += 1.0
+
+        self.assertEqual(self.bucket.reserve(), 0.0)
+
+    def test_penalize_cuts_rate_and_honors_retry_after(self):
+        self.bucket.penalize(retry_after=3.0)
+
+        self.assertEqual(self.bucket.rate, 1.0)
+        self.assertEqual(self.bucket.throttled_count, 1)
+        self.assertAlmostEqual(self.bucket.reserve(), 3.0)
+
+    def test_reward_recovers_rate(self):
+        self.bucket.penalize()
+
+        for _ in range(100):
+            self.bucket.reward()
+
+        self.assertEqual(self.bucket.rate, 2.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(TokenBucket.parse_retry_after("7"), 7.0)
+        self.assertIsNone(TokenBucket.parse_retry_after("soon"))
+        self.assertIsNone(TokenBucket.parse_retry_after(None))
+        self.assertEqual(TokenBucket.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_base=1.0, backoff_max=5.0, jitter=0.0)
+
+    def test_idempotent_requests_are_retried(self):
+        for method in ("GET", "PUT", "DELETE"):
+            self.assertEqual(self.policy.decide(method, 0, status_code=502), RetryPolicy.RETRY)
+            self.assertEqual(self.policy.decide(method, 0), RetryPolicy.RETRY)
+
+    def test_post_requires_verification(self):
+        self.assertEqual(self.policy.decide("POST", 0, status_code=502), RetryPolicy.VERIFY)
+        self.assertEqual(self.policy.decide("POST", 0), RetryPolicy.VERIFY)
+
+    def test_post_that_never_arrived_is_retried(self):
+        self.assertEqual(self.policy.decide("POST", 0, may_have_applied=False), RetryPolicy.RETRY)
+        self.assertEqual(self.policy.decide("POST", 0, status_code=429), RetryPolicy.RETRY)
+
+    def test_permanent_failures_are_not_retried(self):
+        self.assertIsNone(self.policy.decide("GET", 0, status_code=404))
+        self.assertIsNone(self.policy.decide("GET", 3, status_code=502))
+
+    def test_backoff_is_exponential_and_capped(self):
+        self.assertEqual([self.policy.backoff(a) for a in range(4)], [1.0, 2.0, 4.0, 5.0])
+        self.assertEqual(self.policy.backoff(0, retry_after=3.0), 3.0)
+
+    def test_backoff_jitter_stays_within_bounds(self):
+        policy = RetryPolicy(backoff_base=1.0, jitter=1.0)
+
+        for _ in range(100):
+            self.assertTrue(0.0 <= policy.backoff(2) <= 4.0)
+
+    def test_verify_before_retry_finds_record(self):
+        verify = VerifyBeforeRetry(lambda: [{"name": "Alice"}, {"name": "Bob"}], lambda p: p["name"] == "Bob")
+
+        self.assertEqual(verify.find(verify.fetch()), {"name": "Bob"})
+        self.assertIsNone(verify.find([]))
+
+    def test_failed_verification_reports_the_original_failure(self):
+        import requests
+
+        sent = []
+
+        class Session:
+            def __init__(self, failure):
+                self.failure = failure
+
+            def request(self, method, url, **kwargs):
+                sent.append(method)
+
+                if isinstance(self.failure, Exception):
+                    raise self.failure
+
+                response = requests.Response()
+                response.status_code, response._content = self.failure, b'{"errors": ["Bad gateway"]}'
+                return response
+
+        def fetch():
+            raise ChallongeNotFoundException("ERROR: Tournament not found")
+
+        for failure, expected in ((502, ChallongeServerException), (requests.ConnectionError("reset"),
+                                                                    requests.ConnectionError)):
+            sent.clear()
+            http = ChallongeApiHttpMethods(retry_policy=RetryPolicy(backoff_base=0.0, jitter=0.0))
+            http.session = Session(failure)
+
+            with self.assertRaises(expected) as raised:
+                http.post("tournaments.json", {"tournament[name]": "x"}, verify=VerifyBeforeRetry(fetch, bool))
+
+            self.assertIsInstance(raised.exception.__cause__, ChallongeNotFoundException)
+            self.assertEqual(sent, ["POST"])
+            self.assertEqual(http.retry_policy.stats.verifications, 1)
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = ResponseCache(maxsize=3, ttl=5.0, ttls={"matches": 1.0}, clock=lambda: self.now)
+
+    def test_classify(self):
+        self.assertEqual(ResponseCache.classify("tournaments.json"), (None, "tournaments"))
+        self.assertEqual(ResponseCache.classify("tournaments/1.json"), ("1", "tournament"))
+        self.assertEqual(ResponseCache.classify("tournaments/1/matches.json"), ("1", "matches"))
+        self.assertEqual(ResponseCache.classify("tournaments/1/matches/2/reopen.json"), ("1", "match"))
+        self.assertEqual(ResponseCache.classify("tournaments/1/matches/2/attachments.json"), ("1", "attachments"))
+
+    def test_hit_and_ttl(self):
+        self.cache.put("tournaments/1/matches.json", {"state": "open"}, [{"id": 1}])
+
+        self.assertEqual(self.cache.get("tournaments/1/matches.json", {"state": "open"}), [{"id": 1}])
+        self.assertIsNone(self.cache.get("tournaments/1/matches.json", {"state": "complete"}))
+
+        self.now += 1.0
+
+        self.assertIsNone(self.cache.get("tournaments/1/matches.json", {"state": "open"}))
+
+    def test_lru_eviction(self):
+        for i in range(3):
+            self.cache.put(f"tournaments/{i}.json", None, {"id": i})
+
+        self.cache.get("tournaments/0.json")
+        self.cache.put("tournaments/3.json", None, {"id": 3})
+
+        self.assertIsNotNone(self.cache.get("tournaments/0.json"))
+        self.assertIsNone(self.cache.get("tournaments/1.json"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_writes_invalidate_the_tournament(self):
+        self.cache.put("tournaments/1/participants.json", None, [])
+        self.cache.put("tournaments/2/participants.json", None, [])
+        self.cache.put("tournaments.json", None, [])
+
+        self.cache.invalidate("tournaments/1/matches/5.json")
+
+        self.assertIsNone(self.cache.get("tournaments/1/participants.json"))
+        self.assertIsNone(self.cache.get("tournaments.json"))
+        self.assertIsNotNone(self.cache.get("tournaments/2/participants.json"))
+
+    def test_writes_by_id_invalidate_reads_by_url(self):
+        self.cache.put("tournaments/my_bracket.json", None, {"id": 7, "url": "my_bracket"})
+        self.cache.put("tournaments/my_bracket/matches.json", None, [])
+
+        self.cache.invalidate("tournaments/7/start.json")
+
+        self.assertIsNone(self.cache.get("tournaments/my_bracket/matches.json"))
+
+    def test_responses_fetched_during_a_write_are_discarded(self):
+        generation = self.cache.generation("tournaments/1/matches.json")
+        self.cache.invalidate("tournaments/1/matches/5.json")
+        self.cache.put("tournaments/1/matches.json", None, [], generation)
+
+        self.assertIsNone(self.cache.get("tournaments/1/matches.json"))
+
+
+class TournamentArchiveTests(unittest.TestCase):
+
+    def setUp(self):
+        self.archive = TournamentArchive(":memory:")
+        self.tournament = {
+            "id": 10230,
+            "url": "single_elim",
+            "state": "complete",
+            "participants": [{"participant": {"id": 1, "name": "Alice"}}],
+            "matches": [{"match": {"id": 5, "winner_id": 1}}]
+        }
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_only_finalized_tournaments_are_archived(self):
+        self.assertFalse(self.archive.put(dict(self.tournament, state="underway")))
+        self.assertTrue(self.archive.put(self.tournament))
+        self.assertEqual(len(self.archive), 1)
+
+    def test_get_by_id_and_url(self):
+        self.archive.put(self.tournament)
+
+        self.assertEqual(self.archive.get(10230), self.tournament)
+        self.assertEqual(self.archive.get("single_elim"), self.tournament)
+        self.assertIsNone(self.archive.get(1))
+
+    def test_remove(self):
+        self.archive.put(self.tournament)
+        self.archive.remove("10230")
+
+        self.assertNotIn(10230, self.archive)
+
+    def test_snapshots_are_streamed_in_order(self):
+        for i in range(5):
+            self.archive.put(dict(self.tournament, id=i, url=f"t{i}"))
+
+        self.assertEqual([t["id"] for t in self.archive.snapshots(batch_size=2)], [0, 1, 2, 3, 4])
+
+
+class ValidatorCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.validators = ValidatorCache(maxsize=2)
+        self.key = request_key("tournaments/1/matches.json", {"state": None}, "match")
+
+    def test_request_key_ignores_none_parameters(self):
+        self.assertEqual(self.key, request_key("tournaments/1/matches.json", None, "match"))
+
+    def test_conditional_headers(self):
+        self.validators.put(self.key, etag='W/"abc"', last_modified="Wed, 21 Oct 2015 07:28:00 GMT", data=[])
+
+        headers, data = self.validators.get(self.key)
+
+        self.assertEqual(headers["If-None-Match"], 'W/"abc"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 21 Oct 2015 07:28:00 GMT")
+        self.assertEqual(data, [])
+
+    def test_responses_without_validators_are_forgotten(self):
+        self.validators.put(self.key, etag='W/"abc"', data=[])
+        self.validators.put(self.key, data=[])
+
+        self.assertIsNone(self.validators.get(self.key))
+
+    def test_lru_eviction(self):
+        for i in range(3):
+            self.validators.put(request_key(f"tournaments/{i}.json"), etag=str(i), data={})
+
+        self.assertIsNone(self.validators.get(request_key("tournaments/0.json")))
+        self.assertIsNotNone(self.validators.get(request_key("tournaments/2.json")))
+
+
+class BulkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.matches = [
+            {"id": 1, "player1_prereq_match_id": None, "player2_prereq_match_id": None},
+            {"id": 2, "player1_prereq_match_id": None, "player2_prereq_match_id": None},
+            {"id": 3, "player1_prereq_match_id": 1, "player2_prereq_match_id": 2},
+            {"id": 4, "player1_prereq_match_id": None, "player2_prereq_match_id": None},
+            {"id": 5, "player1_prereq_match_id": 3, "player2_prereq_match_id": 4},
+        ]
+
+    def test_chain_updates(self):
+        updates = [(5, "1-0", 1), (1, "1-0", 1), (1, "2-0", 1), (4, "1-0", 1)]
+        chains, dependencies = MatchAPI._chain_updates(updates, self.matches)
+
+        self.assertEqual(chains, {"5": [0], "1": [1, 2], "4": [3]})
+        self.assertEqual(dependencies["5"], {"1", "4"})
+        self.assertEqual(dependencies["1"], set())
+
+    def test_dependent_chains_run_after_their_prerequisites(self):
+        order = []
+        items = ["a", "b", "c"]
+
+        results = run_chains(items, {"a": [0], "b": [1], "c": [2]}, {"c": {"a", "b"}}, order.append, max_workers=4)
+
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(order[-1], "c")
+
+    def test_failures_skip_dependents_but_not_others(self):
+        def worker(item):
+            if item == "a":
+                raise ValueError(item)
+
+            return item
+
+        items = ["a", "a2", "b", "c"]
+        results = run_chains(items, {"a": [0, 1], "b": [2], "c": [3]}, {"c": {"a"}}, worker)
+
+        self.assertEqual([r.ok for r in results], [False, False, True, False])
+        self.assertIsInstance(results[0].error, ValueError)
+        self.assertEqual(results[2].result, "b")
+
+    def test_async_chains(self):
+        order = []
+
+        async def worker(item):
+            order.append(item)
+            return item
+
+        results = asyncio.run(run_chains_async(["a", "b", "c"], {"a": [0], "b": [1], "c": [2]}, {"a": {"c"}}, worker))
+
+        self.assertEqual([r.result for r in results], ["a", "b", "c"])
+        self.assertTrue(order.index("c") < order.index("a"))
+
+    def test_check_in_many(self):
+        posted = []
+
+        class Http:
+            def post(self, api_suffix, params=None, envelope=None, verify=None):
+                posted.append(api_suffix)
+                return {"id": int(api_suffix.split("/")[3]), "checked_in": True}
+
+        participants = [{"id": 1, "checked_in": False}, {"id": 2, "checked_in": True}, {"id": 3, "checked_in": False}]
+        results = ParticipantAPI(Http()).check_in_many("t", [1, 2, "1", 3, 4], participants=participants)
+
+        self.assertEqual([r.item for r in results], [1, 2, 3, 4])
+        self.assertEqual(
+            [(r.ok, r.skipped) for r in results], [(True, False), (True, True), (True, False), (False, False)]
+        )
+        self.assertEqual(sorted(posted), ["tournaments/t/participants/1/check_in.json",
+                                          "tournaments/t/participants/3/check_in.json"])
+
+    def test_import_participants_bisects_rejected_chunks(self):
+        posted = []
+
+        class Http:
+            def post(self, api_suffix, params=None, envelope=None, verify=None):
+                names = [v for k, v in params if k == "participants[][name]"]
+                posted.append(names)
+
+                if "bad" in names:
+                    raise ChallongeAPIException("ERROR: Name is invalid")
+
+                return [{"name": n} for n in names]
+
+        rows = (name for name in ["a", "b", "bad", "c", "d", "e", "f"])
+        results = list(ParticipantAPI(Http()).import_participants("t", rows, chunk_size=4, max_workers=2))
+
+        self.assertEqual([r.item for r in results], ["a", "b", "bad", "c", "d", "e", "f"])
+        self.assertEqual([r.ok for r in results], [True, True, False, True, True, True, True])
+        self.assertEqual(results[3].result, {"name": "c"})
+        self.assertEqual(len(posted), 6)  # 2 chunks, then 2 halves, then 2 single rows
+
+    def test_short_responses_fail_the_unmatched_items(self):
+        class Http:
+            def get(self, api_suffix, params=None, envelope=None):
+                return [{"name": "a"}]
+
+            def post(self, api_suffix, params=None, envelope=None, verify=None):
+                return [{"name": v} for k, v in params if k == "participants[][name]"][:1]
+
+        results = list(ParticipantAPI(Http()).import_participants("t", ["a", "b", "c"], skip_existing=True))
+
+        self.assertEqual([(r.ok, r.skipped) for r in results], [(True, True), (True, False), (False, False)])
+        self.assertIn("1 participants for 2 rows", str(results[2].error))
+
+        results = list(run_batches(range(5), lambda batch: batch[:3], batch_size=5))
+
+        self.assertEqual([r.ok for r in results], [True, True, True, False, False])
+        self.assertIsInstance(results[4].error, ChallongeAPIException)
+
+    def test_bulk_add_params_are_ordered_per_row(self):
+        params = ParticipantAPI._bulk_add_params(["a", {"invite_name_or_email": "b@example.com", "seed": 1, "x": 2}])
+
+        self.assertEqual(params, [
+            ("participants[][name]", "a"),
+            ("participants[][name]", ""),
+            ("participants[][invite_name_or_email]", "b@example.com"),
+            ("participants[][seed]", 1),
+        ])
+
+    def test_barrier_batches_run_alone(self):
+        running = []
+        overlaps = []
+
+        def worker(batch):
+            running.append(batch)
+            overlaps.append(len(running))
+            time.sleep(0.01)
+            running.remove(batch)
+            return batch
+
+        results = list(run_batches(range(12), worker, batch_size=2, max_workers=3, is_barrier=lambda i: i == 6))
+
+        self.assertEqual([r.result for r in results], list(range(12)))
+        self.assertEqual(overlaps[3], 1)
+
+
+class BracketTests(unittest.TestCase):
+
+    @staticmethod
+    def _match(match_id, round_number, player1_id=None, player2_id=None, prereqs=(None, None), losers=(False, False)):
+        return {
+            "id": match_id, "round": round_number, "state": "open" if player1_id and player2_id else "pending",
+            "player1_id": player1_id, "player2_id": player2_id, "winner_id": None, "loser_id": None,
+            "player1_prereq_match_id": prereqs[0], "player2_prereq_match_id": prereqs[1],
+            "player1_is_prereq_match_loser": losers[0], "player2_is_prereq_match_loser": losers[1],
+        }
+
+    def setUp(self):
+        # a four-player double elimination bracket, up to the losers bracket final
+        self.matches = [
+            self._match(1, 1, 11, 12),
+            self._match(2, 1, 13, 14),
+            self._match(3, 2, prereqs=(1, 2)),
+            self._match(4, -1, prereqs=(1, 2), losers=(True, True)),
+        ]
+
+    def test_winners_and_losers_advance(self):
+        bracket = Bracket(self.matches, "double elimination")
+
+        self.assertEqual(bracket.report(1, 11), ["1", "3", "4"])
+        self.assertEqual(bracket.match(3)["state"], "pending")
+
+        bracket.apply({"id": 2, "state": "complete", "winner_id": 14, "loser_id": 13, "scores_csv": "0-2"})
+
+        self.assertEqual((bracket.match(3)["player1_id"], bracket.match(3)["player2_id"]), (11, 14))
+        self.assertEqual((bracket.match(4)["player1_id"], bracket.match(4)["player2_id"]), (12, 13))
+        self.assertEqual({m["id"] for m in bracket.matches("open")}, {3, 4})
+        self.assertFalse(bracket.needs_reconcile)
+
+    def test_corrections_after_the_fact_need_reconciling(self):
+        bracket = Bracket(self.matches, "double elimination")
+        bracket.report(1, 11)
+        bracket.report(2, 13)
+        bracket.report(3, 11)
+
+        bracket.report(1, 12)
+
+        self.assertTrue(bracket.needs_reconcile)
+        self.assertEqual(bracket.match(4)["player1_id"], 11)
+
+    def test_reconcile(self):
+        clock = [0.0]
+        bracket = Bracket(self.matches, reconcile_interval=10, clock=lambda: clock[0])
+        bracket.report(1, 11)
+
+        self.assertFalse(bracket.due)
+        clock[0] = 10
+
+        self.assertTrue(bracket.due)
+        self.assertEqual(sorted(bracket.reconcile(self.matches)), ["1", "3", "4"])
+        self.assertFalse(bracket.due)
+
+    def test_swiss_rounds_need_reconciling(self):
+        bracket = Bracket([self._match(1, 1, 11, 12), self._match(2, 1, 13, 14)], "swiss")
+        bracket.report(1, 11)
+
+        self.assertFalse(bracket.needs_reconcile)
+        bracket.report(2, None)
+
+        self.assertTrue(bracket.needs_reconcile)
+
+
+class TournamentSyncTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = [0.0]
+        self.snapshot = {
+            "id": 1, "state": "underway", "updated_at": "t0",
+            "participants": [{"participant": {"id": 11, "updated_at": "t0"}}],
+            "matches": [{"match": {"id": 21, "updated_at": "t0"}}, {"match": {"id": 22, "updated_at": "t0"}}],
+        }
+
+        test = self
+
+        class Tournaments:
+            def get(self, tournament_id, include_participants=0, include_matches=0):
+                return test.snapshot
+
+        self.sync = TournamentSync(Tournaments(), clock=lambda: self.clock[0], sleep=self._sleep)
+
+    def _sleep(self, seconds):
+        self.clock[0] += seconds
+
+    def test_only_changed_records_are_reported(self):
+        self.sync.track(1)
+
+        self.assertEqual(len(self.sync.poll_due()), 4)
+        self.assertEqual(self.sync.poll(1), [])
+
+        self.snapshot = dict(self.snapshot, matches=[{"match": {"id": 21, "updated_at": "t1"}}])
+        changes = self.sync.poll(1)
+
+        self.assertEqual([(c.kind, c.record["id"], c.action) for c in changes],
+                         [("match", 21, Change.UPDATED), ("match", "22", Change.DELETED)])
+
+    def test_intervals_follow_state_and_stretch_while_idle(self):
+        self.sync.track(1)
+        self.sync.poll(1)
+
+        self.assertEqual(self.sync.next_poll_in(), 5.0)
+
+        self.sync.poll(1)
+        self.assertEqual(self.sync.next_poll_in(), 7.5)
+
+        self.snapshot = dict(self.snapshot, state="complete", updated_at="t2")
+        changes = list(self.sync.changes())
+
+        self.assertEqual([(c.kind, c.action) for c in changes], [("tournament", Change.UPDATED)])
+        self.assertEqual(self.sync.tracked, [])
+
+    def test_failed_polls_are_retried_in_states_that_stop_polling(self):
+        self.sync.track(1)
+        self.sync.poll(1)
+        self.sync.intervals["underway"] = None
+        self.sync.default_interval = 12.0
+        self.clock[0] += 60
+
+        def fail(tournament_id, include_participants=0, include_matches=0):
+            raise ChallongeServerException("ERROR: Bad gateway", status=502)
+
+        self.sync.tournaments.get = fail
+        errors = []
+
+        self.assertEqual(self.sync.poll_due(lambda t, e: errors.append((t, e.status))), [])
+        self.assertEqual(errors, [(1, 502)])
+        self.assertEqual(self.sync.next_poll_in(), 12.0)
+
+
+class ModelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tournament = {
+            "id": 10230, "state": "complete", "url": "single_elim", "created_at": "2015-01-19T16:57:17.000-05:00",
+            "participants": [{"participant": {"id": 11, "name": "Alice", "seed": 1}}],
+            "matches": [{"match": {"id": "21", "state": "complete", "winner_id": 11, "scores_csv": "3-1"}}],
+            "some_new_field": True,
+        }
+
+    def test_fields_are_typed(self):
+        tournament = Tournament.from_dict({"tournament": self.tournament})
+
+        self.assertEqual(tournament.created_at, datetime.fromisoformat("2015-01-19T16:57:17-05:00"))
+        self.assertIsInstance(tournament.participants[0], Participant)
+        self.assertEqual(tournament.matches[0].id, 21)
+        self.assertFalse(hasattr(tournament.matches[0], "__dict__"))
+
+    def test_dict_style_access_and_round_trip(self):
+        tournament = Tournament.from_dict(self.tournament)
+
+        self.assertEqual(tournament["url"], "single_elim")
+        self.assertEqual(tournament.get("some_new_field"), True)
+        self.assertIsNone(tournament.get("missing"))
+        self.assertEqual(Tournament.from_dict(tournament.to_dict()), tournament)
+
+    def test_to_models(self):
+        matches = to_models([{"id": 1}, {"id": 2}], "match")
+
+        self.assertEqual([type(m) for m in matches], [Match, Match])
+        self.assertEqual(to_models("Cleared all participants", "message"), "Cleared all participants")
+
+    def test_models_can_be_archived(self):
+        with TournamentArchive(":memory:") as archive:
+            archive.put(Tournament.from_dict(self.tournament))
+
+            self.assertEqual(archive.get(10230)["matches"][0]["match"]["id"], 21)
+
+
+class ColumnTests(unittest.TestCase):
+
+    def setUp(self):
+        self.matches = [
+            {"match": {"id": 21, "tournament_id": 1, "round": 1, "state": "complete", "player1_id": 11,
+                       "player2_id": 12, "winner_id": 11, "loser_id": 12, "scores_csv": "1-3,3-0,3-2"}},
+            Match.from_dict({"id": 22, "tournament_id": 1, "round": -1, "state": "open", "player1_id": 12,
+                             "player2_id": 13, "scores_csv": ""}),
+        ]
+
+    def test_match_columns(self):
+        columns = match_columns(self.matches)
+
+        self.assertEqual(columns["match_id"], [21, 22])
+        self.assertEqual(columns["winner_id"], [11, None])
+        self.assertEqual((columns["player1_score"], columns["player2_score"]), ([7, None], [5, None]))
+
+    def test_participant_columns(self):
+        columns = participant_columns([{"participant": {"id": 11, "name": "Alice", "seed": 1}}])
+
+        self.assertEqual((columns["participant_id"], columns["name"], columns["final_rank"]), ([11], ["Alice"], [None]))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_match_array(self):
+        array = match_array(self.matches)
+
+        self.assertEqual(array["winner_id"].tolist(), [11, MISSING_ID])
+        self.assertEqual(array["round"].tolist(), [1, -1])
+        self.assertEqual(array["state"].tolist(), [2, 1])
+        self.assertTrue(numpy.isnan(array["player1_score"][1]))
+
+
+class ScoreTests(unittest.TestCase):
+
+    def test_parse_and_format(self):
+        self.assertEqual(parse_scores("1-3,3-0,3-2"), [(1, 3), (3, 0), (3, 2)])
+        self.assertEqual(parse_scores("-1--3,3--2"), [(-1, -3), (3, -2)])
+        self.assertEqual(format_scores(parse_scores("-1--3,3--2")), "-1--3,3--2")
+
+        for invalid in ("", "3", "3-", "3-1,", "3-1-2", "a-b", "3-1;2-0"):
+            with self.assertRaises(ChallongeAPIException):
+                parse_scores(invalid)
+
+    def test_score_columns(self):
+        columns = score_columns(["1-3,3-0,3-2", {"match": {"scores_csv": "-1-3"}}, None, "3-1-2", "2-2"])
+
+        self.assertEqual(columns["player1_games"], [7, -1, None, None, 2])
+        self.assertEqual(columns["player2_sets"], [1, 1, None, None, 0])
+        self.assertEqual(columns["game_margin"], [2, -4, None, None, 0])
+        self.assertEqual(columns["valid"], [True, True, False, False, True])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_score_arrays_match_score_columns(self):
+        scores = ["1-3,3-0,3-2", "-1-3", None, "3-1;2-0", "2-2", "1-3,3-0,3-2", "10--4"]
+        columns, arrays = score_columns(scores), score_arrays(scores)
+
+        self.assertEqual(arrays["valid"].tolist(), columns["valid"])
+
+        for name in ("player1_games", "player2_games", "player1_sets", "player2_sets", "set_margin"):
+            self.assertEqual(arrays[name].tolist(), [0 if v is None else v for v in columns[name]])
+
+    def test_participant_totals(self):
+        matches = [
+            {"state": "complete", "player1_id": 11, "player2_id": 12, "winner_id": 11, "scores_csv": "2-1"},
+            {"state": "complete", "player1_id": 12, "player2_id": 13, "winner_id": None, "scores_csv": "1-1"},
+            {"state": "open", "player1_id": 11, "player2_id": 13, "winner_id": None, "scores_csv": ""},
+        ]
+
+        totals = participant_totals(matches)
+
+        self.assertEqual(totals[12], {"matches": 2, "wins": 0, "losses": 1, "ties": 1, "sets_won": 0, "sets_lost": 1,
+                                      "games_won": 2, "games_lost": 3})
+        self.assertEqual((totals[11]["matches"], totals[11]["wins"]), (1, 1))
+        self.assertEqual((totals[13]["matches"], totals[13]["ties"]), (1, 1))
+
+
+class StandingsTests(unittest.TestCase):
+
+    @staticmethod
+    def _match(match_id, round_number, player1_id, player2_id, scores_csv=None, winner_id=None):
+        return {
+            "id": match_id, "round": round_number, "state": "complete" if scores_csv else "open",
+            "player1_id": player1_id, "player2_id": player2_id, "scores_csv": scores_csv or "", "winner_id": winner_id,
+        }
+
+    def test_round_robin_with_custom_points(self):
+        tournament = {"tournament_type": "round robin", "ranked_by": "custom", "rr_pts_for_match_win": "3.0",
+                      "rr_pts_for_match_tie": "1.0", "rr_pts_for_game_win": "0.0", "rr_pts_for_game_tie": "0.0"}
+        matches = [
+            self._match(1, 1, 11, 12, "2-1", 11),
+            self._match(2, 2, 11, 13, "1-1"),
+            self._match(3, 3, 12, 13, "2-0", 12),
+        ]
+
+        standings = Standings(matches, {"tournament": tournament}, participants=[{"participant": {"id": 14}}])
+        rows = standings.standings()
+
+        self.assertEqual([(r["rank"], r["participant_id"], r["points"]) for r in rows],
+                         [(1, 11, 4.0), (2, 12, 3.0), (3, 13, 1.0), (4, 14, 0.0)])
+        self.assertEqual(standings.standing(11)["game_ties"], 1)
+        self.assertEqual(standings.standing(13)["points_difference"], -2)
+
+    def test_tie_breaks(self):
+        # 11, 12 and 13 beat each other in a circle, one game each; only the points scored separate them
+        matches = [
+            self._match(1, 1, 11, 12, "3-0", 11),
+            self._match(2, 2, 12, 13, "2-1", 12),
+            self._match(3, 3, 13, 11, "2-1", 13),
+        ]
+
+        rows = Standings(matches, tournament_type="round robin").standings()
+
+        self.assertEqual([r["participant_id"] for r in rows], [11, 13, 12])
+        self.assertEqual(rows[0]["tie_breaks"], {"match wins vs tied": 1.0, "game wins": 1, "points scored": 4})
+
+        rows = Standings(matches[:1] + [self._match(4, 1, 13, 14, "3-0", 13)], tournament_type="round robin",
+                         tie_breaks=["points difference"]).standings()
+
+        self.assertEqual([r["rank"] for r in rows], [1, 1, 3, 3])
+
+    def test_swiss_byes_and_incremental_corrections(self):
+        matches = [self._match(1, 1, 11, 12, "3-1", 11), self._match(2, 2, 11, 13)]
+
+        standings = Standings(matches, {"tournament_type": "swiss", "pts_for_bye": "1.0"}, participants=[11, 12, 13])
+
+        self.assertEqual({r["participant_id"]: r["byes"] for r in standings.standings()}, {11: 0, 12: 1, 13: 1})
+
+        self.assertTrue(standings.apply({"id": 2, "state": "complete", "winner_id": 13, "scores_csv": "0-3"}))
+        self.assertFalse(standings.apply({"id": 2, "state": "complete", "winner_id": 13, "scores_csv": "0-3"}))
+        self.assertEqual(standings.standing(13)["points"], 2.0)
+
+        standings.apply({"id": 1, "winner_id": 12, "scores_csv": "1-3"})
+
+        self.assertEqual([(r["rank"], r["participant_id"], r["points"]) for r in standings.standings()],
+                         [(1, 12, 2.0), (1, 13, 2.0), (3, 11, 0.0)])
+
+    def test_unknown_settings(self):
+        with self.assertRaises(ChallongeAPIException):
+            Standings(tournament_type="round robin", ranked_by="elo")
+
+        with self.assertRaises(ChallongeAPIException):
+            Standings(tournament_type="swiss", points={"match_loss": 1})
+
+
+class TournamentStreamTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.requests = []
+
+        test = self
+
+        class Http:
+            # one tournament per day; both ends of a window are inclusive, as they are on Challonge
+            def get(self, api_suffix, params=None, envelope=None):
+                test.requests.append((params["created_after"], params["created_before"]))
+                after = datetime.strptime(params["created_after"], "%Y-%m-%d")
+                before = datetime.strptime(params["created_before"], "%Y-%m-%d")
+
+                days = range((before - after).days + 1)
+
+                return [{"id": (after + timedelta(days=d)).strftime("%Y%m%d")} for d in days]
+
+        class AsyncHttp:
+            async def get(self, api_suffix, params=None, envelope=None):
+                return Http().get(api_suffix, params, envelope)
+
+        self.http, self.async_http = Http(), AsyncHttp()
+
+    def test_date_windows(self):
+        self.assertEqual(TournamentAPI._date_windows("2024-01-01", "2024-01-08", 3),
+                         [("2024-01-01", "2024-01-04"), ("2024-01-04", "2024-01-07"), ("2024-01-07", "2024-01-08")])
+
+        with self.assertRaises(ChallongeAPIException):
+            TournamentAPI._date_windows("2024-01-01", "2024-01-08", 0)
+
+    def test_iter_all_streams_every_tournament_once(self):
+        tournaments = list(TournamentAPI(self.http).iter_all(created_after="2024-01-01", created_before="2024-03-01",
+                                                             window_days=7, max_workers=3))
+
+        self.assertEqual(len(tournaments), 61)
+        self.assertEqual(len({t["id"] for t in tournaments}), 61)
+        self.assertEqual(tournaments, sorted(tournaments, key=lambda t: t["id"]))
+
+    def test_iter_all_stops_early(self):
+        stream = TournamentAPI(self.http).iter_all(created_after="2020-01-01", created_before="2024-01-01",
+                                                   window_days=7, max_workers=2)
+
+        self.assertEqual(next(stream)["id"], "20200101")
+        stream.close()
+
+        self.assertLessEqual(len(self.requests), 3)
+
+    async def test_async_iter_all(self):
+        stream = AsyncTournamentAPI(self.async_http).iter_all(created_after="2024-01-01", created_before="2024-02-01",
+                                                              window_days=10)
+
+        self.assertEqual(len([t async for t in stream]), 32)
+
+
+class DeleteAllTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tournaments = [
+            {"id": 1, "name": "chyllonge-temp"}, {"id": 2, "name": "Weekly #12"}, {"id": 3, "name": "chyllonge-temp-2"},
+            {"id": 4, "name": None},
+        ]
+        self.deleted = []
+
+        test = self
+
+        class Http:
+            def get(self, api_suffix, params=None, envelope=None):
+                return test.tournaments
+
+            def delete(self, api_suffix, params=None, envelope=None):
+                if api_suffix == "tournaments/3.json":
+                    raise ChallongeAPIException("ERROR: Tournament not found.")
+
+                test.deleted.append(api_suffix)
+
+                return {"id": int(api_suffix.split("/")[1].split(".")[0])}
+
+        class AsyncHttp:
+            async def get(self, api_suffix, params=None, envelope=None):
+                return Http().get(api_suffix, params, envelope)
+
+            async def delete(self, api_suffix, params=None, envelope=None):
+                return Http().delete(api_suffix, params, envelope)
+
+        self.http, self.async_http = Http(), AsyncHttp()
+
+    def test_delete_all_filters_and_reports_failures(self):
+        progress = []
+
+        results = TournamentAPI(self.http).delete_all(name="chyllonge-temp*", max_workers=2,
+                                                      progress=lambda *p: progress.append(p))
+
+        self.assertEqual([(r.item["id"], r.ok) for r in results], [(1, True), (3, False)])
+        self.assertEqual(self.deleted, ["tournaments/1.json"])
+        self.assertEqual(progress, [(1, 0), (2, 1)])
+
+    def test_dry_run_deletes_nothing(self):
+        results = TournamentAPI(self.http).delete_all(name=re.compile(r"#\d+"), dry_run=True)
+
+        self.assertEqual([(r.item["id"], r.skipped) for r in results], [(2, True)])
+        self.assertEqual(self.deleted, [])
+
+    async def test_async_delete_all(self):
+        results = await AsyncTournamentAPI(self.async_http).delete_all()
+
+        self.assertEqual([r.ok for r in results], [True, True, False, True])
+        self.assertEqual(len(self.deleted), 3)
+
+
+class ValidationPolicyTests(unittest.TestCase):
+
+    def _api(self, policy, participants=2, server_error=None, server_status=422):
+        self.requests = []
+
+        test = self
+
+        class Http:
+            validation_policy = policy
+
+            def get(self, api_suffix, params=None, envelope=None):
+                test.requests.append(("GET", api_suffix))
+                result = [{"id": p} for p in range(participants)]
+                policy and policy.observe("GET", api_suffix, result, envelope)
+
+                return result
+
+            def post(self, api_suffix, params=None, envelope=None, verify=None):
+                test.requests.append(("POST", api_suffix))
+
+                if server_error:
+                    raise response_error("POST", api_suffix, server_status, f'{{"errors": ["{server_error}"]}}')
+
+                result = {"id": 1, "url": "weekly", "participants_count": participants, "state": "underway"}
+                policy and policy.observe("POST", api_suffix, result, envelope)
+
+                return result
+
+        return TournamentAPI(Http())
+
+    def test_strict_checks_always_fetch(self):
+        api = self._api(ValidationPolicy(STRICT))
+        api.participant_api.get_all(1)
+        api.start(1)
+
+        self.assertEqual(self.requests, [("GET", "tournaments/1/participants.json")] * 2 +
+                         [("POST", "tournaments/1/start.json")])
+
+        with self.assertRaises(ChallongeValidationException) as raised:
+            self._api(None, participants=1).start(1)
+
+        self.assertEqual((raised.exception.check, raised.exception.server_side), (MIN_PARTICIPANTS, False))
+
+    def test_cached_checks_reuse_known_counts(self):
+        clock = [0.0]
+        policy = ValidationPolicy(CACHED, max_age=30, clock=lambda: clock[0])
+        api = self._api(policy)
+
+        api.participant_api.get_all(1)
+        api.start(1)
+
+        self.assertEqual([r[0] for r in self.requests], ["GET", "POST"])
+
+        # the start response revealed the count under the tournament's URL as well; it expires after max_age
+        self.assertEqual(policy.participant_count("weekly"), 2)
+
+        clock[0] = 31.0
+
+        self.assertIsNone(policy.participant_count("weekly"))
+
+    def test_writes_forget_known_counts(self):
+        policy = ValidationPolicy(CACHED)
+        policy.record_participant_count(5, 1, "weekly")
+        policy.observe("POST", "tournaments/weekly/participants.json", {"id": 11}, "participant")
+
+        self.assertIsNone(policy.participant_count(1))
+
+    def test_server_checks_map_the_server_error(self):
+        api = self._api(ValidationPolicy(SERVER), participants=0,
+                        server_error="Tournament must have at least 2 participants.")
+
+        with self.assertRaises(ChallongeValidationException) as raised:
+            api.start(1)
+
+        self.assertTrue(raised.exception.server_side)
+        self.assertEqual((raised.exception.check, raised.exception.tournament_id), (MIN_PARTICIPANTS, 1))
+        self.assertEqual(self.requests, [("POST", "tournaments/1/start.json")])
+
+        # other failures that mention participants are not mistaken for the participant count check
+        for status, exception in ((404, ChallongeNotFoundException), (502, ChallongeServerException)):
+            api = self._api(ValidationPolicy(SERVER), server_error="Participant not found", server_status=status)
+
+            with self.assertRaises(exception) as raised:
+                api.start(1)
+
+            self.assertNotIsInstance(raised.exception, ChallongeValidationException)
+
+        with self.assertRaises(ChallongeAPIException):
+            ValidationPolicy("lenient")
+
+
+class StartupTests(unittest.TestCase):
+
+    def test_construction_defers_heavy_imports(self):
+        code = "import sys, src.chyllonge.api as api; api.ChallongeApi(); " \
+               "print(','.join(m for m in ('requests', 'tzlocal', 'zoneinfo', 'asyncio') if m in sys.modules))"
+        env = dict(os.environ, CHALLONGE_USER="x", CHALLONGE_KEY="y")
+
+        loaded = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+
+        self.assertEqual(loaded.stdout.strip(), "")
+
+    def test_timezone_is_resolved_on_first_use(self):
+        http = ChallongeApiHttpMethods()
+
+        self.assertNotIn("timezone", vars(http))
+
+        os.environ["CHALLONGE_IANA_TZ_NAME"] = "America/New_York"
+
+        try:
+            self.assertIn(http.tz_utc_offset_string, ("-05:00", "-04:00"))
+        finally:
+            del os.environ["CHALLONGE_IANA_TZ_NAME"]
+
+        self.assertEqual(str(http.timezone), "America/New_York")
+
+
+class CodecTests(unittest.TestCase):
+
+    def test_decode_parses_bytes_and_unwraps(self):
+        body = '[{"match": {"id": 1, "scores_csv": "3-1"}}, {"match": {"id": 2, "scores_csv": "\u00e9"}}]'.encode()
+
+        self.assertEqual(decode(body, "match"), [{"id": 1, "scores_csv": "3-1"}, {"id": 2, "scores_csv": "\u00e9"}])
+        self.assertEqual(decode(b'{"tournament": {"id": 1}}', "tournament"), {"id": 1})
+        self.assertEqual(decode(b'{"id": 1}'), {"id": 1})
+
+    def test_pluggable_parser(self):
+        parsed = []
+
+        def loads(body):
+            parsed.append(body)
+            return [{"participant": {"id": 1}}]
+
+        self.assertEqual(decode(b"...", "participant", loads), [{"id": 1}])
+        self.assertEqual(parsed, [b"..."])
+        self.assertIn(default_loads().__module__, ("json", "orjson"))
+
+
+class ErrorTests(unittest.TestCase):
+
+    def test_errors_are_typed_by_status(self):
+        body = b'{"errors": ["Tournament not found"]}'
+
+        for status, error_type in ((401, ChallongeAuthException), (403, ChallongeAuthException),
+                                   (404, ChallongeNotFoundException), (422, ChallongeValidationException),
+                                   (429, ChallongeRateLimitException), (502, ChallongeServerException)):
+            error = response_error("GET", "https://api.challonge.com/v1/x.json", status, body, elapsed=0.5, attempts=2)
+
+            self.assertIs(type(error), error_type)
+            self.assertEqual((error.status, error.method, error.elapsed, error.attempts), (status, "GET", 0.5, 2))
+            self.assertEqual(error.errors, ("Tournament not found",))
+            self.assertTrue(str(error).startswith("ERROR: "))
+            self.assertEqual(error.retryable, status in (429, 502))
+
+        self.assertIs(type(response_error("GET", "x", 400, body)), ChallongeAPIException)
+        self.assertTrue(response_error("POST", "x", 422, body).server_side)
+        self.assertEqual(response_error("GET", "x", 429, b"", {"Retry-After": "3"}).retry_after, 3.0)
+
+    def test_error_body_shapes(self):
+        self.assertEqual(parse_error_body(b'{"errors": {"name": ["is taken", "is short"]}}')[0],
+                         ("name is taken", "name is short"))
+        self.assertEqual(parse_error_body('{"error": "Bad"}')[0], ("Bad",))
+        self.assertEqual(parse_error_body(b"HTTP Basic: Access denied.\n"), ((), "HTTP Basic: Access denied."))
+        self.assertEqual(parse_error_body(b"{not json"), ((), "{not json"))
+        self.assertEqual(parse_error_body(b""), ((), ""))
+
+    def test_html_error_pages_are_not_parsed(self):
+        page = b"<!DOCTYPE html><html><head><title>api.challonge.com | 502: Bad gateway</title></head><body>" + \
+            b"<p>" + b"x" * (MAX_ERROR_BODY * 4) + b"</p></body></html>"
+
+        error = response_error("POST", "https://api.challonge.com/v1/tournaments.json", 502, page)
+
+        self.assertIsInstance(error, ChallongeServerException)
+        self.assertEqual(error.errors, ())
+        self.assertIn("502: Bad gateway", str(error))
+        self.assertLess(len(str(error)), 400)
+
+        # oversized JSON is not parsed either
+        self.assertEqual(parse_error_body(b'{"errors": ["' + b"x" * MAX_ERROR_BODY + b'"]}')[0], ())
+
+    def test_failed_requests_carry_metadata(self):
+        import requests
+
+        http = ChallongeApiHttpMethods(retry_policy=RetryPolicy(max_retries=2, backoff_base=0.0, jitter=0.0))
+        response = requests.Response()
+        response.status_code, response._content = 503, b"<html><title>Service unavailable</title></html>"
+        http._send = lambda *args: response
+
+        with self.assertRaises(ChallongeServerException) as raised:
+            http.get("tournaments/1.json")
+
+        self.assertEqual((raised.exception.status, raised.exception.attempts), (503, 3))
+        self.assertTrue(raised.exception.url.endswith("tournaments/1.json"))
+        self.assertGreaterEqual(raised.exception.elapsed, 0.0)
+
+    def test_bulk_batches_are_only_bisected_when_items_are_rejected(self):
+        calls = []
+
+        def worker(batch):
+            calls.append(batch)
+            raise response_error("POST", "x", 500 if len(batch) == 4 else 422, b"")
+
+        results = list(run_batches(range(8), worker, batch_size=4, max_workers=1))
+
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(isinstance(r.error, ChallongeServerException) for r in results))
+
+        calls.clear()
+        list(run_batches(range(2), worker, batch_size=2, max_workers=1))
+
+        self.assertEqual(len(calls), 3)
+
+
+class InstrumentationTests(unittest.TestCase):
+
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template("tournaments.json"), "tournaments.json")
+        self.assertEqual(endpoint_template("tournaments/single_elim/start.json"), "tournaments/{tournament}/start.json")
+        self.assertEqual(endpoint_template("tournaments/1/participants/bulk_add.json"),
+                         "tournaments/{tournament}/participants/bulk_add.json")
+        self.assertEqual(endpoint_template("tournaments/1/matches/2/attachments/3.json"),
+                         "tournaments/{tournament}/matches/{match_id}/attachments/{attachment_id}.json")
+
+    def test_hooks_see_every_attempt(self):
+        import requests
+
+        class Session:
+            def __init__(self, statuses):
+                self.statuses = list(statuses)
+
+            def request(self, method, url, **kwargs):
+                response = requests.Response()
+                response.status_code, response._content = self.statuses.pop(0), b'{"match": {"id": 2}}'
+                response.elapsed = timedelta(milliseconds=5)
+                return response
+
+        seen = []
+
+        class Recorder(RequestHook):
+            def before_request(self, info):
+                seen.append(("before", info.endpoint, info.attempt))
+
+            def after_request(self, info):
+                seen.append(("after", info.status, info.response_bytes, info.ttfb, info.total is not None))
+
+        histogram = LatencyHistogram(buckets=(1.0, 10.0))
+        http = ChallongeApiHttpMethods(retry_policy=RetryPolicy(backoff_base=0.0, jitter=0.0),
+                                       hooks=[Recorder(), histogram])
+        http.session = Session([502, 200])
+
+        self.assertEqual(http.get("tournaments/1/matches/2.json", envelope="match"), {"id": 2})
+        self.assertEqual(seen, [
+            ("before", "tournaments/{tournament}/matches/{match_id}.json", 0), ("after", 502, 20, 0.005, True),
+            ("before", "tournaments/{tournament}/matches/{match_id}.json", 1), ("after", 200, 20, 0.005, True),
+        ])
+
+        rows = {row["status"]: row for row in histogram.summary()}
+
+        self.assertEqual((rows["200"]["count"], rows["200"]["retries"], rows["200"]["p99"]), (1, 1, 1.0))
+        self.assertEqual(rows["502"]["response_bytes"], 20)
+
+    def test_prometheus_text(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+
+        for total in (0.05, 0.5, 5.0):
+            info = RequestInfo("GET", "https://api.challonge.com/v1/x.json", 'weird "endpoint"')
+            info.status, info.total, info.response_bytes = 200, total, 10
+            histogram.after_request(info)
+
+        text = histogram.prometheus_text()
+        labels = 'method="GET",endpoint="weird \\"endpoint\\"",status="200"'
+
+        self.assertIn("# TYPE chyllonge_request_duration_seconds histogram\n", text)
+        self.assertIn(f'chyllonge_request_duration_seconds_bucket{{{labels},le="0.1"}} 1\n', text)
+        self.assertIn(f'chyllonge_request_duration_seconds_bucket{{{labels},le="1"}} 2\n', text)
+        self.assertIn(f'chyllonge_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3\n', text)
+        self.assertIn(f"chyllonge_request_duration_seconds_count{{{labels}}} 3\n", text)
+        self.assertIn(f"chyllonge_response_bytes_total{{{labels}}} 30\n", text)
+        self.assertIsNone(histogram.summary()[0]["p99"])
+
+
+class TracingTests(unittest.TestCase):
+
+    @staticmethod
+    def _respond(url: str) -> bytes:
+        if url.endswith("participants.json"):
+            return b'[{"participant": {"id": 1}}, {"participant": {"id": 2}}]'
+
+        return b'{"tournament": {"id": 9, "state": "underway"}}'
+
+    def test_composite_calls_have_child_spans(self):
+        import requests
+
+        respond = self._respond
+
+        class Session:
+            def request(self, method, url, **kwargs):
+                response = requests.Response()
+                response.status_code, response._content = 200, respond(url)
+                return response
+
+        tracer = RecordingTracer()
+        api = ChallongeApi(tracer=tracer)
+        api.http.session = Session()
+
+        api.tournaments.start("9")
+
+        start = tracer.spans[-1]
+        get_all = tracer.children(start)[0]
+
+        self.assertEqual((start.name, start.attributes), ("TournamentAPI.start", {"challonge.tournament_id": "9"}))
+        self.assertEqual([s.name for s in tracer.children(start)],
+                         ["ParticipantAPI.get_all", "POST tournaments/{tournament}/start.json"])
+        self.assertEqual([s.name for s in tracer.children(get_all)], ["GET tournaments/{tournament}/participants.json"])
+        self.assertEqual(tracer.children(get_all)[0].attributes["http.response.status_code"], 200)
+        self.assertIsNone(current_span())
+
+    def test_spans_follow_worker_threads(self):
+        tracer = RecordingTracer()
+        parent = tracer.start_span("bulk")
+        token = _current_span.set(parent)
+
+        try:
+            parents = [r.result for r in run_batches(range(4), lambda batch: [current_span() for _ in batch],
+                                                     batch_size=1, max_workers=4)]
+        finally:
+            _current_span.reset(token)
+
+        self.assertEqual(parents, [parent] * 4)
+
+    def test_spans_follow_coroutines(self):
+        tracer = RecordingTracer()
+        api = AsyncChallongeApi(tracer=tracer)
+        respond = self._respond
+
+        async def send(method, url, params=None, headers=None, attempt=0):
+            return 200, {}, respond(url)
+
+        api.http._send = send
+
+        asyncio.run(api.tournaments.start("9"))
+
+        start = tracer.spans[-1]
+
+        self.assertEqual(start.name, "AsyncTournamentAPI.start")
+        self.assertEqual([s.name for s in tracer.children(start)], ["ParticipantAPI.get_all"])
+
+    def test_streamed_imports_are_traced_until_consumed(self):
+        import requests
+
+        class Session:
+            def request(self, method, url, **kwargs):
+                names = [v for k, v in kwargs["data"] if k == "participants[][name]"]
+                response = requests.Response()
+                response.status_code = 200
+                response._content = json.dumps([{"participant": {"name": n}} for n in names]).encode("utf-8")
+                return response
+
+        tracer = RecordingTracer()
+        api = ChallongeApi(tracer=tracer)
+        api.http.session = Session()
+
+        results = list(api.participants.import_participants("9", ["a", "b", "c", "d", "e"], chunk_size=2))
+
+        self.assertTrue(all(r.ok for r in results))
+
+        spans = list(tracer.spans)
+        imported = spans[-1]
+
+        self.assertEqual(imported.name, "ParticipantAPI.import_participants")
+        self.assertEqual([s.name for s in tracer.children(imported)],
+                         ["POST tournaments/{tournament}/participants/bulk_add.json"] * 3)
+        self.assertTrue(all(s.parent is imported for s in spans[:-1]))
+        self.assertGreaterEqual(imported.end, max(s.end for s in spans[:-1]))
+
+    def test_no_spans_without_tracer(self):
+        self.assertIsNone(ChallongeApi().http.tracer)
+        self.assertEqual(TournamentAPI.start.__name__, "start")
+
+
+class FakeChallongeTests(unittest.TestCase):
+
+    @staticmethod
+    def client(server, **kwargs):
+        api = ChallongeApi(**kwargs)
+        api.http.base_challonge_url = server.base_url
+        return api
+
+    def test_lifecycle(self):
+        from benchmarks.fake_challonge import FakeChallonge
+
+        with FakeChallonge() as server:
+            api = self.client(server)
+            tournament = api.tournaments.create(name="Fake", tournament_type="single elimination")
+            added = api.participants.add_multiple(tournament["id"], names=[f"P{i}" for i in range(5)])
+
+            self.assertEqual(len(added), 5)
+
+            api.tournaments.start(tournament["id"])
+
+            while True:
+                matches = api.matches.get_all(tournament["id"], state="open")
+
+                if not matches:
+                    break
+
+                for m in matches:
+                    api.matches.update(tournament["id"], m["id"], "2-0", m["player1_id"])
+
+            api.tournaments.finalize(tournament["id"])
+
+            self.assertEqual(api.tournaments.get(tournament["id"])["state"], "complete")
+            self.assertEqual(len(api.matches.get_all(tournament["id"])), 4)
+
+    def test_errors(self):
+        from benchmarks.fake_challonge import FakeChallonge
+
+        with FakeChallonge() as server:
+            api = self.client(server, validation_policy=ValidationPolicy(SERVER))
+            tournament = api.tournaments.create(name="Fake")
+            api.participants.add(tournament["id"], name="Alone")
+
+            with self.assertRaises(ChallongeValidationException) as raised:
+                api.tournaments.start(tournament["id"])
+
+            self.assertTrue(raised.exception.server_side)
+            self.assertEqual(raised.exception.check, MIN_PARTICIPANTS)
+
+            with self.assertRaises(ChallongeNotFoundException):
+                api.tournaments.get(tournament["id"] + 1)
+
+        with FakeChallonge(error_rate=1.0) as server:
+            with self.assertRaises(ChallongeServerException) as raised:
+                self.client(server).tournaments.get_all()
+
+            self.assertEqual(raised.exception.status, 502)
+            self.assertIn("Bad gateway", str(raised.exception))
+
+    def test_throttling_is_absorbed(self):
+        from benchmarks.fake_challonge import FakeChallonge
+
+        with FakeChallonge(throttle_rate=0.3, seed=7) as server:
+            api = self.client(server, rate_limiter=TokenBucket(rate=1000, min_rate=100, max_throttle_retries=20))
+            tournament = api.tournaments.create(name="Fake")
+
+            for i in range(10):
+                api.participants.add(tournament["id"], name=f"P{i}")
+
+            self.assertEqual(len(api.participants.get_all(tournament["id"])), 10)
+            self.assertGreater(server.injected["throttled"], 0)
+
+    def test_async_client_authenticates(self):
+        import warnings
+        from benchmarks.fake_challonge import FakeChallonge
+
+        async def create(base_url):
+            async with AsyncChallongeApi() as api:
+                api.http.base_challonge_url = base_url
+                return await api.tournaments.create(name="Fake")
+
+        with FakeChallonge() as server, warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+
+            self.assertEqual(asyncio.run(create(server.base_url))["name"], "Fake")
+
+    def test_async_update_keeps_archive_until_it_succeeds(self):
+        from benchmarks.fake_challonge import FakeChallonge
+
+        archive, tracer = TournamentArchive(":memory:"), RecordingTracer()
+
+        async def update(base_url):
+            async with AsyncChallongeApi(archive=archive, tracer=tracer) as api:
+                api.http.base_challonge_url = base_url
+                tournament = await api.tournaments.create(name="Fake")
+                missing = tournament["id"] + 1
+
+                for tournament_id in (tournament["id"], missing):
+                    archive.put(dict(tournament, id=tournament_id, url=str(tournament_id), state="complete"))
+
+                with self.assertRaises(ChallongeNotFoundException):
+                    await api.tournaments.update(missing, name="Renamed")
+
+                self.assertEqual(len(archive), 2)
+                self.assertEqual((await api.tournaments.update(tournament["id"], name="Renamed"))["name"], "Renamed")
+                self.assertEqual(list(archive.ids()), [missing])
+
+        with FakeChallonge() as server:
+            asyncio.run(update(server.base_url))
+
+        self.assertEqual([s.name for s in tracer.spans].count("TournamentAPI.update"), 2)